@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Единая командная строка AIFC Court Monitor без интерактивных вопросов.
+Каждая команда загружает только нужные ей модули; --json выводит результат для конвейеров.
+
+    python aifc_cli.py scan                  # сканирование листингов без скачивания
+    python aifc_cli.py download --limit 20   # скачивание новых и недостающих файлов
+    python aifc_cli.py verify --fix          # сверка базы с диском
+    python aifc_cli.py reorganize --apply    # перенос файлов по правильным папкам
+    python aifc_cli.py report --json         # отчет
+    python aifc_cli.py retry                 # повтор неудачных скачиваний
+    python aifc_cli.py queue plan            # постановка работы в общую очередь
+    python aifc_cli.py queue work            # исполнитель: скачивание URL из очереди
+"""
+
+import sys
+import json
+import time
+import logging
+import argparse
+from contextlib import redirect_stdout
+
+from settings import CONFIG_FILE
+from logging_setup import setup_logging
+
+logger = logging.getLogger('aifc_cli')
+
+def cmd_scan(args):
+    """Сканирование листингов и обновление discovered_files.json"""
+    from document_monitor import HumanLikeDocumentMonitor
+
+    monitor = HumanLikeDocumentMonitor(args.config)
+    listings = {}
+    try:
+        for url in args.url or monitor.config['urls']:
+            documents, pagination, complete = monitor.crawl_listing(url)
+            result = {'documents': len(documents), 'changed': False, 'added': 0, 'removed': 0}
+
+            listing_diff = monitor.diff_listing(url, documents, pagination, complete) if documents else None
+            if listing_diff is not None:
+                added, removed, _ = listing_diff
+                monitor.update_discovered_files(added, removed)
+                result.update(changed=True, added=len(added), removed=len(removed))
+
+            listings[url] = result
+        monitor.save_discovered_files()
+    finally:
+        monitor.close_browser_bot()
+
+    return {'listings': listings}
+
+def cmd_download(args):
+    """Скачивание новых и недостающих файлов по очереди приоритетов"""
+    import timing
+    from run_aifc_monitor import UnifiedAIFCMonitor
+
+    monitor = UnifiedAIFCMonitor(args.config)
+    try:
+        files_to_download = monitor.get_files_to_download()
+        if args.limit:
+            files_to_download = files_to_download[:args.limit]
+
+        results = {'successful': 0, 'failed': 0}
+        if files_to_download:
+            results = monitor.download_files_smart(files_to_download)
+    finally:
+        monitor.close()
+
+    return dict(results, queued=len(files_to_download), profile=timing.run_profile.summary())
+
+def cmd_verify(args):
+    """Сверка записей с файлами на диске"""
+    from smart_file_analyzer import run_reconciliation, DOWNLOAD_CATEGORIES
+
+    file_status = run_reconciliation(logger, fix_records=args.fix, config_file=args.config)
+    if file_status is None:
+        raise RuntimeError("Файлы состояния не найдены")
+
+    return {
+        'counts': file_status['counts'],
+        'fixed_records': file_status['fixed_records'],
+        'to_download': [info['url'] for category in DOWNLOAD_CATEGORIES for info in file_status[category]]
+    }
+
+def cmd_reorganize(args):
+    """Перенос файлов в правильные папки (без --apply - только просмотр)"""
+    import file_reorganizer
+
+    if args.apply:
+        return file_reorganizer.reorganize_files(args.config) or {}
+    changes = file_reorganizer.preview_reorganization(args.config)
+    return {'planned_moves': len(changes), 'changes': changes}
+
+def cmd_report(args):
+    """Отчет о состоянии коллекции документов"""
+    from settings import load_settings
+    from report_generator import ReportGenerator
+
+    generator = ReportGenerator(args.dir or load_settings(args.config)['download_dir'])
+    if args.output:
+        generator.generate_json_report(args.output)
+    return generator.build_report()
+
+def cmd_retry(args):
+    """Повтор неудачных скачиваний с защитой от блокировок"""
+    from smart_retry import smart_retry_with_anti_blocking
+
+    return smart_retry_with_anti_blocking(args.config)
+
+def cmd_queue(args):
+    """Общая очередь работ: plan и collect - координатор, work - исполнитель, status - состояние"""
+    from settings import load_settings
+    from work_queue import WorkQueue, plan_work, run_worker, collect_results
+
+    queue = WorkQueue.from_config(load_settings(args.config))
+    try:
+        if args.action == 'status':
+            return {'counts': queue.counts()}
+
+        from document_monitor import HumanLikeDocumentMonitor
+
+        monitor = HumanLikeDocumentMonitor(args.config)
+        try:
+            if args.action == 'work':
+                batch_size = args.batch or monitor.config['work_queue_batch_size']
+                result = {'worker': run_worker(monitor, queue, args.worker_id, batch_size, args.limit)}
+            else:
+                # Результаты прошлого плана сливаются до перепланирования
+                result = {'collected': collect_results(monitor, queue)}
+                if args.action == 'plan':
+                    result['queued'] = plan_work(monitor, queue)
+        finally:
+            monitor.close_browser_bot()
+        return dict(result, counts=queue.counts())
+    finally:
+        queue.close()
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="AIFC Court Monitor: команды без интерактивных вопросов")
+    parser.add_argument('--config', default=CONFIG_FILE, help="файл конфигурации")
+    parser.add_argument('--json', action='store_true', help="вывести результат в JSON")
+    parser.add_argument('--quiet', '-q', action='store_true', help="только предупреждения и ошибки в логе")
+    parser.add_argument('--profile', action='store_true', help="выборочное профилирование (стеки для flamegraph и tracemalloc)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    scan = subparsers.add_parser('scan', help="сканирование листингов без скачивания")
+    scan.add_argument('--url', action='append', help="листинг для сканирования (можно несколько)")
+    scan.set_defaults(handler=cmd_scan)
+
+    download = subparsers.add_parser('download', help="скачивание новых и недостающих файлов")
+    download.add_argument('--limit', type=int, default=0, help="не больше N файлов за запуск")
+    download.set_defaults(handler=cmd_download)
+
+    verify = subparsers.add_parser('verify', help="сверка базы с файлами на диске")
+    verify.add_argument('--fix', action='store_true', help="исправить устаревшие записи")
+    verify.set_defaults(handler=cmd_verify)
+
+    reorganize = subparsers.add_parser('reorganize', help="перенос файлов по правильным папкам")
+    reorganize.add_argument('--apply', action='store_true', help="переместить файлы (иначе только просмотр)")
+    reorganize.set_defaults(handler=cmd_reorganize)
+
+    report = subparsers.add_parser('report', help="отчет о коллекции документов")
+    report.add_argument('--dir', '-d', help="директория с документами (по умолчанию download_dir из конфигурации)")
+    report.add_argument('--output', '-o', help="сохранить JSON отчет в файл")
+    report.set_defaults(handler=cmd_report)
+
+    retry = subparsers.add_parser('retry', help="повтор неудачных скачиваний")
+    retry.set_defaults(handler=cmd_retry)
+
+    queue = subparsers.add_parser('queue', help="общая очередь работ для нескольких исполнителей")
+    queue.add_argument('action', choices=['plan', 'work', 'status', 'collect'],
+                       help="plan - поставить работу, work - исполнитель, status - состояние, collect - слить результаты")
+    queue.add_argument('--worker-id', help="имя исполнителя (по умолчанию хост:pid)")
+    queue.add_argument('--batch', type=int, default=0, help="размер арендуемой пачки")
+    queue.add_argument('--limit', type=int, default=0, help="не больше N файлов за запуск исполнителя")
+    queue.set_defaults(handler=cmd_queue)
+
+    return parser
+
+def print_result(result, as_json):
+    if as_json:
+        print(json.dumps(result, indent=2, ensure_ascii=False, default=str))
+        return
+
+    for key, value in result.items():
+        if isinstance(value, (dict, list)):
+            value = json.dumps(value, ensure_ascii=False, default=str)
+        print(f"{key}: {value}")
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        from settings import load_settings
+        config = load_settings(args.config)
+    except (OSError, ValueError):
+        config = None  # Ошибку конфигурации сообщит сама команда
+    # Логи идут в stderr и aifc_monitor.log, stdout остается для результата
+    setup_logging('aifc_monitor.log', level=logging.WARNING if args.quiet else None, config=config)
+
+    started = time.monotonic()
+    try:
+        # Инструменты печатают ход работы через print(): в stderr, чтобы не портить результат в stdout
+        with redirect_stdout(sys.stderr):
+            if args.profile:
+                import sampling_profiler
+                from settings import load_settings
+                sampling_profiler.enable()
+                with sampling_profiler.profiled(args.command, load_settings(args.config)):
+                    result = args.handler(args) or {}
+            else:
+                result = args.handler(args) or {}
+    except Exception as e:
+        logger.error(f"❌ {args.command}: {e}")
+        print_result({'command': args.command, 'ok': False, 'error': str(e)}, args.json)
+        return 1
+
+    result = dict(result, command=args.command, ok=True,
+                  duration_seconds=round(time.monotonic() - started, 3))
+    print_result(result, args.json)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Офлайн-бенчмарк конвейера на локальном сервере-заменителе court.aifc.kz.
+Сервер отдает синтетические листинги (с пагинацией) и корпус из N PDF заданных размеров,
+поддерживает ETag/If-None-Match и Range, умеет добавлять задержку и ошибки.
+Конвейер: обнаружение -> скачивание -> сверка -> реорганизация -> отчет,
+все файлы состояния пишутся во временную папку, сеть не нужна.
+
+    python benchmark_offline.py --files 500 --latency-ms 50 --error-rate 0.02 -o bench.json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+import tracemalloc
+from urllib.parse import quote, unquote, urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Модули монитора импортируются из папки скрипта, где бы он ни запускался
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+LISTINGS = ('judgments', 'legislation')
+
+class SyntheticCorpus:
+    """Детерминированный корпус документов: содержимое генерируется по номеру документа"""
+
+    def __init__(self, files, min_kb, max_kb, seed=1):
+        rng = random.Random(seed)
+        self.seed = seed
+        self.documents = []
+        for doc_id in range(1, files + 1):
+            listing = LISTINGS[doc_id % 2]
+            if listing == 'judgments':
+                path = f"/uploads/Case No. {doc_id} of {2019 + doc_id % 6}.pdf"
+            else:
+                path = f"/files/legals/{doc_id}/file/aifc-rules-{doc_id}-{rng.choice(['fees', 'guidance', 'regulations'])}.pdf"
+            self.documents.append({
+                'id': doc_id,
+                'listing': listing,
+                'path': path,
+                'size': rng.randint(min_kb * 1024, max_kb * 1024)
+            })
+        self.by_path = {doc['path']: doc for doc in self.documents}
+
+    def content(self, doc):
+        body = random.Random(self.seed * 1000003 + doc['id']).randbytes(doc['size'] - 9)
+        return b'%PDF-1.4\n' + body
+
+    def etag(self, doc):
+        return f'"{doc["id"]}-{doc["size"]}"'
+
+    def listing_page(self, listing, page, page_size):
+        documents = [doc for doc in self.documents if doc['listing'] == listing]
+        pages = max((len(documents) + page_size - 1) // page_size, 1)
+        chunk = documents[(page - 1) * page_size:page * page_size]
+
+        links = [f'<li><a href="{quote(doc["path"])}">Document {doc["id"]}</a></li>' for doc in chunk]
+        if page < pages:
+            links.append(f'<li><a href="/en/{listing}?page={page + 1}">Next</a></li>')
+        return f"<html><body><h1>{listing}</h1><ul>{''.join(links)}</ul></body></html>".encode('utf-8')
+
+class CorpusServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, corpus, latency_ms=0, error_rate=0.0, page_size=50, seed=1):
+        super().__init__(('127.0.0.1', 0), CorpusHandler)
+        self.corpus = corpus
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.page_size = page_size
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.requests = 0
+        self.injected_errors = 0
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def roll(self):
+        """Задержка и решение об ошибке для очередного запроса"""
+        with self.rng_lock:
+            self.requests += 1
+            delay = self.rng.uniform(0, self.latency_ms) / 1000
+            failed = self.rng.random() < self.error_rate
+            if failed:
+                self.injected_errors += 1
+        return delay, failed
+
+class CorpusHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        delay, failed = self.server.roll()
+        if delay:
+            time.sleep(delay)
+        if failed:
+            self.send_body(503, b'Service Unavailable', 'text/plain')
+            return
+
+        parsed = urlparse(self.path)
+        listing = re.fullmatch(r'/en/(\w+)', parsed.path)
+        if listing and listing.group(1) in LISTINGS:
+            page = int(parse_qs(parsed.query).get('page', ['1'])[0])
+            body = self.server.corpus.listing_page(listing.group(1), page, self.server.page_size)
+            self.send_body(200, body, 'text/html; charset=utf-8')
+            return
+
+        doc = self.server.corpus.by_path.get(unquote(parsed.path))
+        if doc is None:
+            self.send_body(404, b'Not Found', 'text/plain')
+            return
+        self.send_document(doc)
+
+    def send_document(self, doc):
+        corpus = self.server.corpus
+        etag = corpus.etag(doc)
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        content = corpus.content(doc)
+        status = 200
+        range_match = re.fullmatch(r'bytes=(\d*)-(\d*)', self.headers.get('Range', ''))
+        if range_match and any(range_match.groups()):
+            start_text, end_text = range_match.groups()
+            if start_text:
+                start, end = int(start_text), int(end_text or len(content) - 1)
+            else:
+                start, end = len(content) - int(end_text), len(content) - 1
+            end = min(end, len(content) - 1)
+            if start > end:
+                self.send_body(416, b'', 'text/plain', {'Content-Range': f'bytes */{len(content)}'})
+                return
+            headers = {'Content-Range': f'bytes {start}-{end}/{len(content)}'}
+            content = content[start:end + 1]
+            status = 206
+        else:
+            headers = {}
+
+        headers.update({'ETag': etag, 'Accept-Ranges': 'bytes'})
+        self.send_body(status, content, 'application/pdf', headers)
+
+    def send_body(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def peak_rss_mb():
+    """Пиковая память процесса (Unix), None на Windows"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1048576 if sys.platform == 'darwin' else 1024), 1)
+
+class Phase:
+    """Замер одной фазы: время и пик памяти Python (при --trace-memory)"""
+
+    def __init__(self, results, name):
+        self.results = results
+        self.name = name
+        self.extra = {}
+
+    def __enter__(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.extra['seconds'] = round(time.perf_counter() - self.started, 3)
+        if tracemalloc.is_tracing():
+            self.extra['python_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 1048576, 1)
+        self.results[self.name] = self.extra
+
+def crawl(monitor, listing_url):
+    """Обход листинга со всеми страницами пагинации через HTTP-сессию монитора"""
+    from link_extractor import parse_listing
+
+    documents, pagination_seen, queue = [], [], [listing_url]
+    while queue:
+        page_url = queue.pop(0)
+        response = monitor.session.get(page_url, timeout=monitor.config['timeout'])
+        response.raise_for_status()
+        page_documents, pagination = parse_listing(response.text, page_url, monitor.config['file_extensions'])
+        documents.extend(doc['url'] for doc in page_documents)
+        for next_url in pagination:
+            if next_url not in pagination_seen:
+                pagination_seen.append(next_url)
+                queue.append(next_url)
+    return documents, pagination_seen
+
+def run_pipeline():
+    """Полный конвейер против локального сервера, результаты по фазам"""
+    import timing
+    from document_monitor import HumanLikeDocumentMonitor
+    from smart_file_analyzer import run_reconciliation
+    import file_reorganizer
+    from report_generator import ReportGenerator
+
+    logger = logging.getLogger('benchmark')
+    results = {}
+    timing.run_profile.reset()
+
+    monitor = HumanLikeDocumentMonitor()
+    try:
+        with Phase(results, 'discovery') as phase:
+            all_documents = []
+            for listing_url in monitor.config['urls']:
+                documents, pagination = crawl(monitor, listing_url)
+                listing_diff = monitor.diff_listing(listing_url, documents, pagination, complete=True)
+                if listing_diff:
+                    monitor.update_discovered_files(listing_diff[0], listing_diff[1])
+                all_documents.extend(documents)
+            monitor.save_discovered_files()
+            phase.extra['documents'] = len(all_documents)
+
+        with Phase(results, 'download') as phase:
+            outcomes = {}
+            for url in monitor.get_files_to_download(all_documents):
+                save_dir = monitor.create_aifc_directory_structure(url, monitor.config['download_dir'])
+                save_path = os.path.join(save_dir, monitor.get_clean_filename(url))
+                result = monitor.download_file_simple(url, save_path)
+                outcomes[result] = outcomes.get(result, 0) + 1
+            monitor.save_downloaded_history()
+            monitor.save_discovered_files()
+
+            summary = timing.run_profile.summary()
+            file_stats = summary['stages'].get(timing.FILE_STAGE, {})
+            transferred = summary['stages'].get('transfer', {}).get('bytes', 0)
+            phase.extra.update(
+                outcomes=outcomes,
+                bytes=transferred,
+                latency_p50_ms=file_stats.get('p50_ms'),
+                latency_p95_ms=file_stats.get('p95_ms')
+            )
+    finally:
+        monitor.close_browser_bot()
+
+    with Phase(results, 'verify') as phase:
+        file_status = run_reconciliation(logger)
+        phase.extra['counts'] = file_status['counts'] if file_status else None
+
+    with Phase(results, 'reorganize') as phase:
+        phase.extra['stats'] = file_reorganizer.reorganize_files()
+
+    with Phase(results, 'report') as phase:
+        report = ReportGenerator(monitor.config['download_dir']).build_report()
+        phase.extra['report_keys'] = len(report)
+
+    download = results['download']
+    if download['seconds']:
+        download['files_per_second'] = round(sum(download['outcomes'].values()) / download['seconds'], 1)
+        download['mb_per_second'] = round(download['bytes'] / 1048576 / download['seconds'], 2)
+    return results
+
+def write_config(base_url):
+    config = {
+        'urls': [f"{base_url}/en/{listing}" for listing in LISTINGS],
+        'download_dir': 'aifc_documents',
+        'browser_enabled': False,
+        'browser_worker': False,
+        'timeout': 30
+    }
+    with open('monitor_config.json', 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Офлайн-бенчмарк конвейера на локальном сервере")
+    parser.add_argument('--files', type=int, default=200, help="число документов в корпусе")
+    parser.add_argument('--min-kb', type=int, default=20, help="минимальный размер документа (КБ)")
+    parser.add_argument('--max-kb', type=int, default=500, help="максимальный размер документа (КБ)")
+    parser.add_argument('--page-size', type=int, default=50, help="документов на странице листинга")
+    parser.add_argument('--latency-ms', type=float, default=0, help="случайная задержка ответа 0..N мс")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="доля ответов 503")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', '-o', help="сохранить результаты в JSON")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="пик памяти Python по фазам через tracemalloc (замедляет замер)")
+    parser.add_argument('--keep', action='store_true', help="не удалять рабочую папку")
+    args = parser.parse_args(argv)
+
+    from logging_setup import setup_logging
+    setup_logging(level='WARNING')
+
+    corpus = SyntheticCorpus(args.files, args.min_kb, args.max_kb, args.seed)
+    server = CorpusServer(corpus, args.latency_ms, args.error_rate, args.page_size, args.seed)
+    threading.Thread(target=server.serve_forever, name='corpus-server', daemon=True).start()
+
+    work_dir = tempfile.mkdtemp(prefix='aifc_bench_')
+    original_dir = os.getcwd()
+    os.chdir(work_dir)
+    if args.trace_memory:
+        tracemalloc.start()
+    try:
+        write_config(server.base_url)
+        started = time.perf_counter()
+        phases = run_pipeline()
+        total_seconds = time.perf_counter() - started
+    finally:
+        tracemalloc.stop()
+        os.chdir(original_dir)
+        server.shutdown()
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    results = {
+        'parameters': vars(args),
+        'corpus_mb': round(sum(doc['size'] for doc in corpus.documents) / 1048576, 1),
+        'server': {'requests': server.requests, 'injected_errors': server.injected_errors},
+        'phases': phases,
+        'total_seconds': round(total_seconds, 3),
+        'peak_rss_mb': peak_rss_mb(),
+        'work_dir': work_dir if args.keep else None
+    }
+
+    print(f"{'Фаза':<12} {'сек':>8} {'пик Python, МБ':>15}")
+    for name, phase in phases.items():
+        print(f"{name:<12} {phase['seconds']:>8.2f} {phase.get('python_peak_mb', '-'):>15}")
+    download = phases['download']
+    print(f"\nСкачивание: {download['outcomes']}, {download.get('files_per_second')} файл/с, "
+          f"{download.get('mb_per_second')} МБ/с, p50 {download['latency_p50_ms']} мс, p95 {download['latency_p95_ms']} мс")
+    print(f"Всего: {results['total_seconds']} сек, пик RSS: {results['peak_rss_mb']} МБ")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False, default=str)
+    return results
+
+if __name__ == "__main__":
+    main()
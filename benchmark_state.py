@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Генератор синтетического состояния и микробенчмарки путей состояния и отчетов
+на 10k-1M документов: update_discovered_files, get_files_to_download,
+analyze_file_status, categorize_documents и сохранение JSON.
+Результаты сравниваются с сохраненными базовыми значениями, превышение порога
+дает код возврата 1 (для CI).
+
+    python benchmark_state.py generate --count 100000 --dir /tmp/aifc_state --files-on-disk 2000
+    python benchmark_state.py run --sizes 10000,100000 --save-baseline
+    python benchmark_state.py run --sizes 10000,100000 --threshold 0.2
+"""
+
+import os
+import sys
+import copy
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from settings import DEFAULT_CONFIG
+from monitor_core import (
+    get_expected_path, save_json_state, load_downloaded_history, load_discovered_files,
+    save_downloaded_history, save_discovered_files
+)
+
+BASELINE_FILE = 'benchmark_baselines.json'
+
+# Допустимое замедление относительно базового значения
+DEFAULT_THRESHOLD = 0.2
+
+PARTIES = ('Aurora AG Limited', 'Star Asian Mining Company LLP', 'Astana Finance JSC', 'Kazakh Invest LLP',
+           'Silk Road Trading Ltd', 'Steppe Energy Holdings', 'Caspian Logistics LLP', 'Nomad Capital Partners')
+LEGAL_SLUGS = ('aifc-rules-on-keeping-records', 'fees', 'gen-', 'cis', 'llreg', 'fr', 'aifc-personal-property-regulations',
+               'aifc-rules-on-currency-regulation', 'guidance-on-spr', 'aifc-amlcft-practical-guidance')
+
+def make_url(index, rng):
+    """URL в формате реального сайта: решения в /uploads/, акты в /files/legals/<id>/fileN/"""
+    if rng.random() < 0.35:
+        year = rng.randint(2018, 2025)
+        plaintiff, defendant = rng.sample(PARTIES, 2)
+        name = f"Case No. {index} of {year} - {plaintiff} v {defendant}_{rng.choice(['eng', 'rus', 'kaz'])}.pdf"
+        return f"https://court.aifc.kz/uploads/{quote(name)}"
+
+    slot = rng.choice(['file', 'file', 'file2', 'file3'])
+    version = f"v{rng.randint(1, 20)}_{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.{rng.randint(2017, 2025)}"
+    return f"https://court.aifc.kz/files/legals/{index}/{slot}/{rng.choice(LEGAL_SLUGS)}_{version}.pdf"
+
+def generate_state(count, seed=1, downloaded_ratio=0.85, removed_ratio=0.02, now=None):
+    """Синтетические discovered_files и downloaded_files на count документов"""
+    rng = random.Random(seed)
+    now = now or datetime.now()
+    config = {'download_dir': DEFAULT_CONFIG['download_dir'], 'max_filename_length': 150}
+
+    files = {}
+    downloaded = {}
+    for index in range(1, count + 1):
+        url = make_url(index, rng)
+        first_seen = (now - timedelta(days=rng.randint(1, 900))).isoformat()
+        info = {'first_seen': first_seen, 'last_seen': now.isoformat(), 'downloaded': False, 'is_new': True}
+
+        if rng.random() < downloaded_ratio:
+            downloaded_at = now - timedelta(days=rng.randint(0, 400))
+            checks = rng.randint(0, 12)
+            stable = rng.randint(0, checks)
+            info.update(downloaded=True, is_new=False, last_downloaded=downloaded_at.isoformat())
+            downloaded[url] = {
+                'hash': '%032x' % rng.getrandbits(128),
+                'path': get_expected_path(url, config),
+                'downloaded_at': downloaded_at.isoformat(),
+                'size': rng.randint(20_000, 3_000_000),
+                'method': rng.choice(['browser_bot', 'requests', 'unified_monitor']),
+                'checks': checks,
+                'changes': checks - stable,
+                'stable_checks': stable,
+                'last_change': downloaded_at.isoformat(),
+                'last_checked': (downloaded_at + timedelta(days=stable)).isoformat(),
+                'next_check': (now + timedelta(days=rng.randint(-30, 60))).isoformat()
+            }
+        if rng.random() < removed_ratio:
+            info['removed_at'] = now.isoformat()
+        files[url] = info
+
+    discovered = {
+        'files': files,
+        'last_full_scan': now.isoformat(),
+        'initial_scan_completed': True,
+        'scan_start_date': (now - timedelta(days=900)).isoformat()
+    }
+    return discovered, downloaded
+
+def write_state(work_dir, discovered, downloaded, files_on_disk=0):
+    """Файлы состояния и дерево документов (первые files_on_disk скачанных файлов)"""
+    os.makedirs(work_dir, exist_ok=True)
+    save_json_state(os.path.join(work_dir, 'discovered_files.json'), discovered)
+    save_json_state(os.path.join(work_dir, 'downloaded_files.json'), downloaded)
+    with open(os.path.join(work_dir, 'monitor_config.json'), 'w', encoding='utf-8') as f:
+        json.dump({'download_dir': DEFAULT_CONFIG['download_dir']}, f)
+
+    for record in list(downloaded.values())[:files_on_disk]:
+        path = os.path.join(work_dir, record['path'])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b'%PDF-1.4\n')
+
+def make_monitor(discovered, downloaded):
+    """Монитор без сети поверх синтетического состояния (в текущей папке)"""
+    from document_monitor import HumanLikeDocumentMonitor
+    from failure_ledger import FailureLedger
+
+    return HumanLikeDocumentMonitor(
+        discovered_files=discovered,
+        downloaded_files=downloaded,
+        failure_ledger=FailureLedger(autosave=False)
+    )
+
+def bench_update_discovered_files(discovered, downloaded, count):
+    # Повторное сканирование: все известные ссылки плюс 1% новых
+    documents = list(discovered['files']) + [f"https://court.aifc.kz/files/legals/{count + i}/file/new.pdf"
+                                             for i in range(max(count // 100, 1))]
+
+    def setup():
+        return make_monitor(copy.deepcopy(discovered), downloaded), documents
+
+    return setup, lambda monitor, documents: monitor.update_discovered_files(documents)
+
+def bench_get_files_to_download(discovered, downloaded, count):
+    monitor = make_monitor(discovered, downloaded)
+    documents = list(discovered['files'])
+    return (lambda: (monitor, documents)), lambda monitor, documents: monitor.get_files_to_download(documents)
+
+def bench_analyze_file_status(discovered, downloaded, count):
+    from smart_file_analyzer import analyze_file_status
+    return (lambda: ()), analyze_file_status
+
+def bench_categorize_documents(discovered, downloaded, count):
+    from report_generator import ReportGenerator
+    generator = ReportGenerator(DEFAULT_CONFIG['download_dir'])
+    return (lambda: (downloaded,)), generator.categorize_documents
+
+def bench_save_downloaded(discovered, downloaded, count):
+    loaded = load_downloaded_history()  # Словарь со снимком, как у монитора после загрузки
+    return (lambda: (loaded,)), save_downloaded_history
+
+def bench_save_discovered(discovered, downloaded, count):
+    loaded = load_discovered_files()
+    return (lambda: (loaded,)), save_discovered_files
+
+BENCHMARKS = {
+    'update_discovered_files': bench_update_discovered_files,
+    'get_files_to_download': bench_get_files_to_download,
+    'analyze_file_status': bench_analyze_file_status,
+    'categorize_documents': bench_categorize_documents,
+    'save_downloaded_files': bench_save_downloaded,
+    'save_discovered_files': bench_save_discovered
+}
+
+def measure(setup, func, repeat):
+    """Лучшее время из repeat запусков (подготовка не входит в замер)"""
+    best = None
+    for _ in range(repeat):
+        args = setup()
+        started = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def run_benchmarks(sizes, names, repeat, files_on_disk, seed):
+    """Результаты {'имя@размер': секунды}"""
+    results = {}
+    original_dir = os.getcwd()
+    for count in sizes:
+        discovered, downloaded = generate_state(count, seed)
+        work_dir = tempfile.mkdtemp(prefix='aifc_state_bench_')
+        try:
+            write_state(work_dir, discovered, downloaded, min(files_on_disk, count))
+            os.chdir(work_dir)
+            for name in names:
+                setup, func = BENCHMARKS[name](discovered, downloaded, count)
+                seconds = measure(setup, func, repeat)
+                results[f"{name}@{count}"] = round(seconds, 5)
+                print(f"{name:<26} {count:>9} {seconds * 1000:>12.1f} мс")
+        finally:
+            os.chdir(original_dir)
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+def compare(results, baselines, threshold):
+    """Список регрессий: (ключ, база, сейчас, отношение)"""
+    regressions = []
+    for key, seconds in results.items():
+        baseline = baselines.get(key)
+        if baseline and seconds > baseline * (1 + threshold):
+            regressions.append((key, baseline, seconds, seconds / baseline))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Синтетическое состояние и микробенчмарки")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    generate = subparsers.add_parser('generate', help="записать синтетическое состояние в папку")
+    generate.add_argument('--count', type=int, default=10000)
+    generate.add_argument('--dir', required=True)
+    generate.add_argument('--files-on-disk', type=int, default=0, help="сколько файлов документов создать")
+    generate.add_argument('--seed', type=int, default=1)
+
+    run = subparsers.add_parser('run', help="запустить микробенчмарки")
+    run.add_argument('--sizes', default='10000,100000', help="размеры состояния через запятую")
+    run.add_argument('--only', action='append', choices=sorted(BENCHMARKS), help="только указанные бенчмарки")
+    run.add_argument('--repeat', type=int, default=3)
+    run.add_argument('--files-on-disk', type=int, default=1000)
+    run.add_argument('--seed', type=int, default=1)
+    run.add_argument('--baseline', default=BASELINE_FILE, help="файл базовых значений")
+    run.add_argument('--save-baseline', action='store_true', help="сохранить результаты как базовые")
+    run.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="допустимое замедление (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    from logging_setup import setup_logging
+    setup_logging(level='WARNING')
+
+    if args.command == 'generate':
+        discovered, downloaded = generate_state(args.count, args.seed)
+        write_state(args.dir, discovered, downloaded, args.files_on_disk)
+        print(f"✅ {len(discovered['files'])} обнаруженных, {len(downloaded)} скачанных записей в {args.dir}")
+        return 0
+
+    baseline_path = os.path.abspath(args.baseline)
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    results = run_benchmarks(sizes, args.only or list(BENCHMARKS), args.repeat, args.files_on_disk, args.seed)
+
+    if args.save_baseline:
+        baselines = {}
+        if os.path.exists(baseline_path):
+            with open(baseline_path, 'r', encoding='utf-8') as f:
+                baselines = json.load(f)
+        baselines.update(results)
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"💾 Базовые значения сохранены в {baseline_path}")
+        return 0
+
+    if not os.path.exists(baseline_path):
+        print("ℹ️ Базовых значений нет, сравнение пропущено (запустите с --save-baseline)")
+        return 0
+
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        regressions = compare(results, json.load(f), args.threshold)
+    for key, baseline, seconds, ratio in regressions:
+        print(f"❌ Регрессия {key}: {baseline * 1000:.1f} -> {seconds * 1000:.1f} мс (x{ratio:.2f})")
+    if regressions:
+        return 1
+    print(f"✅ Регрессий нет (порог {args.threshold:.0%})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+Долгоживущий процесс браузера: Chrome запускается один раз за запуск,
+монитор общается с ним через локальный канал (multiprocessing Pipe).
+Проверки здоровья, перезапуск по памяти и после падения.
+"""
+
+import os
+import time
+import atexit
+import logging
+import importlib.util
+import multiprocessing
+
+import metrics
+
+# Методы бота, которые можно вызвать через канал
+ALLOWED_METHODS = {
+    'visit_page_like_human',
+    'visit_page_with_retry',
+    'simulate_human_browsing',
+    'find_document_links',
+    'get_cookies',
+    'get_user_agent',
+    'get_current_url',
+    'get_page_source',
+    'reset_session'
+}
+
+# Методы без побочных эффектов: после зависания их можно повторить в новом процессе
+SAFE_TO_REPEAT = {
+    'find_document_links',
+    'get_cookies',
+    'get_user_agent',
+    'get_current_url',
+    'get_page_source'
+}
+
+class BrowserWorkerError(Exception):
+    """Ошибка внутри процесса браузера или потеря связи с ним"""
+
+def get_process_tree_memory_mb(pid):
+    """Память процесса вместе с дочерними (Chrome); None, если psutil недоступен"""
+    try:
+        import psutil
+    except ImportError:
+        return None
+
+    try:
+        process = psutil.Process(pid)
+        total = process.memory_info().rss
+        for child in process.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                continue
+        return total / (1024 * 1024)
+    except psutil.Error:
+        return None
+
+def _worker_main(conn, bot_kwargs):
+    """Цикл процесса браузера: выполняет команды из канала"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - [browser] %(message)s')
+
+    try:
+        from document_monitor import load_browser_bot_class
+        bot = load_browser_bot_class()(**bot_kwargs)
+    except ImportError as e:
+        # Не установлен selenium или модуль бота - браузер недоступен, а не сломан
+        conn.send(('import_error', f"{type(e).__name__}: {e}"))
+        return
+    except Exception as e:
+        conn.send(('error', f"{type(e).__name__}: {e}"))
+        return
+    conn.send(('ok', None))
+
+    try:
+        while True:
+            try:
+                command, method, args, kwargs = conn.recv()
+            except (EOFError, OSError):
+                break  # Родительский процесс завершился
+
+            if command == 'close':
+                conn.send(('ok', None))
+                break
+
+            if command == 'ping':
+                conn.send(('ok', {'pid': os.getpid(), 'memory_mb': get_process_tree_memory_mb(os.getpid())}))
+                continue
+
+            try:
+                result = getattr(bot, method)(*args, **kwargs)
+                conn.send(('ok', result))
+            except Exception as e:
+                conn.send(('error', f"{type(e).__name__}: {e}"))
+    finally:
+        bot.close()
+
+class BrowserWorkerClient:
+    """Клиент процесса браузера с тем же интерфейсом, что и браузерный бот"""
+
+    def __init__(self, bot_kwargs=None, call_timeout=600, health_interval=60,
+                 max_memory_mb=1500, max_calls=500, startup_timeout=120, logger=None):
+        self.bot_kwargs = bot_kwargs or {}
+        self.call_timeout = call_timeout
+        self.startup_timeout = startup_timeout
+        self.health_interval = health_interval
+        self.max_memory_mb = max_memory_mb
+        self.max_calls = max_calls
+        self.logger = logger or logging.getLogger(__name__)
+        self.process = None
+        self.conn = None
+        self.calls_since_start = 0
+        self.restarts = 0
+        self.last_health_check = 0
+        self.memory_warning_logged = False
+        atexit.register(self.close)
+
+    def start(self):
+        """Запуск процесса браузера"""
+        parent_conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_worker_main,
+            args=(child_conn, self.bot_kwargs),
+            name='aifc-browser-worker'
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+
+        # Ждем, пока в процессе поднимется браузер
+        try:
+            if not self.conn.poll(self.startup_timeout):
+                raise BrowserWorkerError("Браузер не запустился вовремя")
+            status, payload = self.conn.recv()
+        except (EOFError, OSError):
+            status, payload = 'error', "Процесс браузера завершился при запуске"
+
+        if status == 'import_error':
+            self._stop(graceful=False)
+            raise ImportError(payload)
+        if status == 'error':
+            self._stop(graceful=False)
+            raise BrowserWorkerError(payload)
+
+        self.calls_since_start = 0
+        self.last_health_check = time.monotonic()
+        self.logger.info(f"🤖 Процесс браузера запущен (pid {self.process.pid})")
+        if not self.memory_warning_logged and importlib.util.find_spec('psutil') is None:
+            self.memory_warning_logged = True
+            self.logger.warning("⚠️ psutil не установлен: перезапуск браузера по памяти отключен (pip install psutil)")
+        return self
+
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def _stop(self, graceful=True):
+        """Остановка процесса браузера"""
+        if self.process is None:
+            return
+
+        if graceful and self.is_alive():
+            try:
+                self.conn.send(('close', None, (), {}))
+                if self.conn.poll(30):
+                    self.conn.recv()
+            except (EOFError, OSError):
+                pass
+            self.process.join(30)
+
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(10)
+
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+
+        self.process = None
+        self.conn = None
+
+    def restart(self, reason, cause=None, graceful=None):
+        """Перезапуск процесса браузера (cause - короткая причина для метрик)"""
+        self.logger.warning(f"🔄 Перезапуск процесса браузера: {reason}")
+        self._stop(graceful=reason != 'crash' if graceful is None else graceful)
+        self.restarts += 1
+        metrics.BROWSER_RESTARTS.inc(1, cause or reason)
+        self.start()
+
+    def _request(self, command, method=None, args=(), kwargs=None, timeout=None):
+        self.conn.send((command, method, args, kwargs or {}))
+        if not self.conn.poll(timeout if timeout is not None else self.call_timeout):
+            raise TimeoutError(f"Процесс браузера не ответил на {method or command}")
+
+        status, payload = self.conn.recv()
+        if status == 'error':
+            raise BrowserWorkerError(payload)
+        return payload
+
+    def health_check(self):
+        """Проверка здоровья и перезапуск при превышении лимитов"""
+        self.last_health_check = time.monotonic()
+
+        if not self.is_alive():
+            self.restart('crash')
+            return
+
+        try:
+            status = self._request('ping', timeout=30)
+        except (TimeoutError, EOFError, OSError):
+            self.restart('crash')
+            return
+
+        memory_mb = status.get('memory_mb')
+        if memory_mb is not None and memory_mb > self.max_memory_mb:
+            self.restart(f"память {memory_mb:.0f} МБ > {self.max_memory_mb} МБ", cause='memory')
+        elif self.calls_since_start >= self.max_calls:
+            self.restart(f"{self.calls_since_start} вызовов", cause='calls')
+
+    def call(self, method, *args, **kwargs):
+        """
+        Вызов метода бота в процессе браузера (с одним перезапуском при падении).
+        Зависший вызов повторяется после перезапуска, только если метод без побочных эффектов.
+        """
+        if method not in ALLOWED_METHODS:
+            raise AttributeError(method)
+
+        if self.process is None:
+            self.start()
+        elif time.monotonic() - self.last_health_check > self.health_interval:
+            self.health_check()
+
+        for attempt in range(2):
+            try:
+                result = self._request('call', method, args, kwargs)
+                self.calls_since_start += 1
+                return result
+            except (EOFError, OSError, TimeoutError) as e:
+                if attempt == 1:
+                    raise BrowserWorkerError(f"Процесс браузера недоступен: {e}")
+                timed_out = isinstance(e, TimeoutError)
+                # Зависший процесс не ответит на штатное закрытие, а в канале остался его ответ
+                self.restart('timeout' if timed_out else 'crash', graceful=False)
+                if timed_out and method not in SAFE_TO_REPEAT:
+                    raise BrowserWorkerError(f"Процесс браузера не ответил на {method}, вызов не повторяется")
+
+    def __getattr__(self, name):
+        if name in ALLOWED_METHODS:
+            return lambda *args, **kwargs: self.call(name, *args, **kwargs)
+        raise AttributeError(name)
+
+    def close(self):
+        """Закрытие процесса браузера"""
+        if self.process is not None:
+            self._stop()
+            self.logger.info("🔒 Процесс браузера закрыт")
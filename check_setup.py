@@ -8,7 +8,17 @@ import subprocess
 import importlib
 import os
 import json
-import requests
+
+# Бюджет времени импорта (секунды) для офлайн-инструментов и основного модуля
+IMPORT_TIME_BUDGETS = {
+    'monitor_core': 0.15,
+    'report_generator': 0.15,
+    'smart_file_analyzer': 0.25,
+    'document_monitor': 1.0
+}
+
+# Тяжелые модули, которые не должны загружаться при импорте
+HEAVY_MODULES = ['selenium', 'undetected_chromedriver', 'bs4']
 
 def check_python_version():
     """Проверка версии Python"""
@@ -27,7 +37,8 @@ def check_dependencies():
     required_packages = {
         'requests': 'requests',
         'beautifulsoup4': 'bs4',
-        'schedule': 'schedule'
+        'schedule': 'schedule',
+        'psutil': 'psutil'
     }
     
     missing_packages = []
@@ -63,6 +74,13 @@ def check_internet_connection():
     """Проверка интернет-соединения"""
     print("\n🌐 Проверка интернет-соединения...")
     
+    # Импорт здесь, чтобы остальные проверки (в т.ч. --import-budget) работали без requests
+    try:
+        import requests
+    except ImportError:
+        print("❌ Модуль requests не установлен")
+        return False
+    
     try:
         response = requests.get("https://court.aifc.kz", timeout=10)
         if response.status_code == 200:
@@ -76,44 +94,36 @@ def check_internet_connection():
         return False
 
 def create_default_config():
-    """Создание конфигурационного файла по умолчанию"""
+    """Создание конфигурационного файла по умолчанию (тот же файл, что читает монитор)"""
     print("\n⚙️ Создание конфигурационного файла...")
     
-    config = {
-        "urls": [
-            "https://court.aifc.kz/en/judgments",
-            "https://court.aifc.kz/en/legislation"
-        ],
-        "download_dir": "aifc_documents",
-        "check_interval_minutes": 120,
-        "file_extensions": [".pdf", ".doc", ".docx", ".xls", ".xlsx", ".txt", ".zip", ".rar"],
-        "max_depth": 3,
-        "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        "timeout": 30,
-        "special_patterns": {
-            "aifc_court": {
-                "base_url": "https://court.aifc.kz",
-                "judgment_selector": "a[href*='/uploads/']",
-                "download_link_selector": "a[href*='.pdf'], a[href*='.doc'], a[href*='.docx']",
-                "folder_mapping": {
-                    "judgments": "Judgments",
-                    "legislation": "Legislation"
-                }
-            }
-        }
-    }
-    
-    config_file = "aifc_monitor_config.json"
-    
     try:
-        with open(config_file, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=4, ensure_ascii=False)
-        print(f"✅ Создан файл конфигурации: {config_file}")
+        from settings import DEFAULT_CONFIG, CONFIG_FILE
+        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
+            json.dump(DEFAULT_CONFIG, f, indent=4, ensure_ascii=False)
+        print(f"✅ Создан файл конфигурации: {CONFIG_FILE}")
         return True
     except Exception as e:
         print(f"❌ Ошибка создания конфигурации: {str(e)}")
         return False
 
+def check_config():
+    """Проверка существующей конфигурации по схеме"""
+    from settings import CONFIG_FILE, ConfigError, parse_settings
+    
+    try:
+        parse_settings(CONFIG_FILE)
+        print(f"\n⚙️ Конфигурация {CONFIG_FILE} корректна")
+        return True
+    except ConfigError as e:
+        print(f"\n❌ Ошибки конфигурации {CONFIG_FILE}:")
+        for error in e.errors:
+            print(f"  • {error}")
+        return False
+    except ValueError as e:
+        print(f"\n❌ {CONFIG_FILE} не является корректным JSON: {e}")
+        return False
+
 def check_files():
     """Проверка наличия необходимых файлов"""
     print("\n📁 Проверка файлов программы...")
@@ -146,7 +156,7 @@ def test_basic_functionality():
         print("✅ Основной модуль загружается корректно")
         
         # Тестируем создание экземпляра
-        monitor = document_monitor.DocumentMonitor('aifc_monitor_config.json')
+        monitor = document_monitor.DocumentMonitor()
         print("✅ Монитор создается успешно")
         
         return True
@@ -154,6 +164,58 @@ def test_basic_functionality():
         print(f"❌ Ошибка при тестировании: {str(e)}")
         return False
 
+def measure_import_time(module_name, runs=3):
+    """Время импорта модуля в чистом интерпретаторе (лучшее из нескольких запусков)"""
+    code = (
+        "import sys, time, json\n"
+        "start = time.perf_counter()\n"
+        f"import {module_name}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"print(json.dumps({{'elapsed': elapsed, 'heavy': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))\n"
+    )
+    
+    best = None
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-c', code],
+            capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        if result.returncode != 0:
+            raise ImportError(result.stderr.strip().splitlines()[-1] if result.stderr else module_name)
+        
+        measurement = json.loads(result.stdout.strip().splitlines()[-1])
+        if best is None or measurement['elapsed'] < best['elapsed']:
+            best = measurement
+    
+    return best
+
+def check_import_budget():
+    """Проверка времени запуска: импорт не должен тянуть браузер и превышать бюджет"""
+    print("\n⏱️ Проверка времени импорта...")
+    
+    all_ok = True
+    for module_name, budget in IMPORT_TIME_BUDGETS.items():
+        try:
+            measurement = measure_import_time(module_name)
+        except ImportError as e:
+            # Сломанный импорт - тоже провал проверки, а не пропуск
+            print(f"❌ {module_name} - не удалось импортировать: {e}")
+            all_ok = False
+            continue
+        
+        elapsed_ms = measurement['elapsed'] * 1000
+        if measurement['heavy']:
+            print(f"❌ {module_name} - загружает тяжелые модули: {', '.join(measurement['heavy'])}")
+            all_ok = False
+        elif measurement['elapsed'] > budget:
+            print(f"❌ {module_name} - {elapsed_ms:.0f} мс (бюджет {budget * 1000:.0f} мс)")
+            all_ok = False
+        else:
+            print(f"✅ {module_name} - {elapsed_ms:.0f} мс (бюджет {budget * 1000:.0f} мс)")
+    
+    return all_ok
+
 def main():
     """Основная функция проверки"""
     print("=" * 50)
@@ -185,24 +247,28 @@ def main():
         print("⚠️ Проблемы с интернет-соединением могут повлиять на работу")
     
     # Создание конфигурации
-    if not os.path.exists('aifc_monitor_config.json'):
+    if not os.path.exists('monitor_config.json'):
         if not create_default_config():
             all_ok = False
-    else:
-        print("\n⚙️ Конфигурационный файл уже существует")
+    elif not check_config():
+        all_ok = False
     
     # Тестирование функциональности
     if all_ok and not missing_files:
         if not test_basic_functionality():
             all_ok = False
+        
+        if not check_import_budget():
+            all_ok = False
     
     # Итоговый результат
     print("\n" + "=" * 50)
     if all_ok:
         print("🎉 ВСЕ ПРОВЕРКИ ПРОЙДЕНЫ УСПЕШНО!")
         print("\nТеперь вы можете запустить программу:")
-        print("  python run_aifc_monitor.py --once     # Однократная проверка")
-        print("  python run_aifc_monitor.py            # Непрерывный мониторинг")
+        print("  python document_monitor.py            # Однократная сессия")
+        print("  python document_monitor.py --daemon   # Непрерывный мониторинг")
+        print("  python aifc_cli.py --help             # Отдельные этапы: scan, download, verify, ...")
     else:
         print("❌ ОБНАРУЖЕНЫ ПРОБЛЕМЫ!")
         print("Исправьте указанные проблемы и запустите проверку снова.")
@@ -212,4 +278,6 @@ def main():
     return 0 if all_ok else 1
 
 if __name__ == "__main__":
+    if '--import-budget' in sys.argv:
+        sys.exit(0 if check_import_budget() else 1)
     sys.exit(main())
\ No newline at end of file
@@ -1,56 +1,97 @@
-# Заменить импорт
-try:
-    from enhanced_browser_bot import SuperHumanBrowserBot as AdvancedBrowserBot
-except ImportError:
-    from browser_bot import AdvancedBrowserBot
 import os
 import requests
 import time
 import json
 import hashlib
-import re
 import random
-from urllib.parse import urljoin, urlparse, unquote
-from bs4 import BeautifulSoup
+from urllib.parse import urljoin, urlparse
 from pathlib import Path
 import logging
 from datetime import datetime, timedelta
-import schedule
+import monitor_core
+from monitor_core import DocumentState
+from logging_setup import setup_logging, fields
+from link_extractor import parse_listing, fingerprint_listing
+from download_queue import build_download_queue, FIRST_DOWNLOAD, REVALIDATION
+import revalidation
+from failure_ledger import FailureLedger
+from retry_policy import get_http_status, is_retryable
+from download_validator import download_to_part, commit_part, discard_part
+import timing
+import metrics
+import sampling_profiler
+from sources import get_registry, MultiSourceEngine
 
-class HumanLikeDocumentMonitor:
-    def __init__(self, config_file='monitor_config.json'):
-        self.config_file = config_file
-        self.config = self.load_config()
+_browser_bot_class = None
+
+def load_browser_bot_class():
+    """Импорт браузерного бота при первом использовании (selenium тяжелый)"""
+    global _browser_bot_class
+    if _browser_bot_class is None:
+        try:
+            from enhanced_browser_bot import SuperHumanBrowserBot as AdvancedBrowserBot
+        except ImportError:
+            from browser_bot import AdvancedBrowserBot
+        _browser_bot_class = AdvancedBrowserBot
+    return _browser_bot_class
+
+class HumanLikeDocumentMonitor(DocumentState):
+    def __init__(self, config_file='monitor_config.json', config=None,
+                 downloaded_files=None, discovered_files=None, failure_ledger=None):
+        super().__init__(config_file, config, downloaded_files, discovered_files)
         self.setup_logging()
-        self.downloaded_files = self.load_downloaded_history()
-        self.discovered_files = self.load_discovered_files()
+        self.failure_ledger = failure_ledger if failure_ledger is not None else FailureLedger(config=self.config)
         self.session = requests.Session()
         self.setup_human_like_session()
         self.initial_scan_completed = self.check_initial_scan_status()
         self.is_first_run = self.check_if_first_run()
         self.browser_bot = None
+        self.browser_sessions = {}  # Домен -> время переноса кук, User-Agent и Referer браузера
         
     def get_browser_bot(self):
         """Получить экземпляр браузерного бота (ленивая инициализация)"""
         if self.browser_bot is None:
-            try:
-                from browser_bot import AdvancedBrowserBot
-                # Запускаем в headless режиме для продакшна, с GUI для отладки
-                headless_mode = self.config.get('browser_headless', True)
-                self.browser_bot = AdvancedBrowserBot(
-                    headless=headless_mode, 
-                    stealth_mode=True
-                )
-                self.logger.info("🤖 Браузерный бот инициализирован")
-            except ImportError:
-                self.logger.warning("⚠️ Браузерный бот недоступен. Установите: pip install selenium undetected-chromedriver")
-                self.browser_bot = None
-            except Exception as e:
-                self.logger.error(f"❌ Ошибка инициализации браузерного бота: {e}")
-                self.browser_bot = None
+            # Запускаем в headless режиме для продакшна, с GUI для отладки
+            bot_kwargs = {
+                'headless': self.config.get('browser_headless', True),
+                'stealth_mode': True
+            }
+            with timing.span('browser_start'):
+                try:
+                    if self.config.get('browser_worker', True):
+                        # Один долгоживущий процесс Chrome на весь запуск
+                        from browser_worker import BrowserWorkerClient
+                        self.browser_bot = BrowserWorkerClient(
+                            bot_kwargs,
+                            call_timeout=self.config.get('browser_worker_call_timeout', 600),
+                            health_interval=self.config.get('browser_worker_health_interval', 60),
+                            max_memory_mb=self.config.get('browser_worker_max_memory_mb', 1500),
+                            max_calls=self.config.get('browser_worker_max_calls', 500),
+                            logger=self.logger
+                        ).start()
+                    else:
+                        AdvancedBrowserBot = load_browser_bot_class()
+                        self.browser_bot = AdvancedBrowserBot(**bot_kwargs)
+                    self.logger.info("🤖 Браузерный бот инициализирован")
+                except ImportError:
+                    self.logger.warning("⚠️ Браузерный бот недоступен. Установите: pip install selenium undetected-chromedriver")
+                    self.browser_bot = None
+                except Exception as e:
+                    self.logger.error(f"❌ Ошибка инициализации браузерного бота: {e}")
+                    self.browser_bot = None
         
         return self.browser_bot
     
+    def close_browser_bot(self):
+        """Закрытие браузерного бота (процесса браузера)"""
+        if self.browser_bot:
+            try:
+                self.browser_bot.close()
+                self.logger.info("🔒 Браузерный бот закрыт")
+            except Exception as e:
+                self.logger.error(f"Ошибка закрытия браузерного бота: {e}")
+            self.browser_bot = None
+    
     def check_if_first_run(self):
         """Проверка первого запуска программы"""
         first_run_file = 'first_run_completed.json'
@@ -97,99 +138,13 @@ class HumanLikeDocumentMonitor:
     
     def load_config(self):
         """Загрузка конфигурации из файла"""
-        default_config = {
-            "urls": [
-                "https://court.aifc.kz/en/judgments",
-                "https://court.aifc.kz/en/legislation"
-            ],
-            "download_dir": "aifc_documents",
-            "check_interval_minutes": 120,
-            "file_extensions": [".pdf", ".doc", ".docx", ".xls", ".xlsx", ".txt", ".zip", ".rar"],
-            "max_depth": 3,
-            "timeout": 30,
-            "browser_enabled": True,
-            "browser_headless": True,
-            "browser_fallback": True,
-            "max_filename_length": 150,
-            "human_behavior": {
-                "browsing_probability": 0.7,
-                "min_session_time": 120,
-                "max_session_time": 600,
-                "pages_per_session": [3, 8],
-                "interval_variation": 0.3,
-                "short_break_probability": 0.05,
-                "long_break_probability": 0.05,
-                "mini_visit_probability": 0.001,
-                "initial_scan_days": 15,
-                "monitoring_cycle_days_min": 7,
-                "monitoring_cycle_days_max": 10,
-                "working_hours_start": 9,
-                "working_hours_end": 18,
-                "working_days": [0, 1, 2, 3, 4],
-                "first_run_always_download": True,
-                "initial_download_probability_min": 0.5,
-                "initial_download_probability_max": 0.8,
-                "monitoring_download_probability_min": 0.15,
-                "monitoring_download_probability_max": 0.45
-            }
-        }
-        
-        try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                for key, value in default_config.items():
-                    if key not in config:
-                        config[key] = value
-                return config
-        except FileNotFoundError:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(default_config, f, indent=4, ensure_ascii=False)
-            print(f"Создан файл конфигурации: {self.config_file}")
-            return default_config
+        return monitor_core.load_config(self.config_file)
     
     def setup_logging(self):
         """Настройка логирования"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('document_monitor.log', encoding='utf-8'),
-                logging.StreamHandler()
-            ]
-        )
+        setup_logging('document_monitor.log', config=self.config)
         self.logger = logging.getLogger(__name__)
         
-    def load_downloaded_history(self):
-        """Загрузка истории скачанных файлов"""
-        try:
-            with open('downloaded_files.json', 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {}
-    
-    def save_downloaded_history(self):
-        """Сохранение истории скачанных файлов"""
-        with open('downloaded_files.json', 'w', encoding='utf-8') as f:
-            json.dump(self.downloaded_files, f, indent=2, ensure_ascii=False)
-    
-    def load_discovered_files(self):
-        """Загрузка списка всех обнаруженных файлов"""
-        try:
-            with open('discovered_files.json', 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {
-                'files': {},
-                'last_full_scan': None,
-                'initial_scan_completed': False,
-                'scan_start_date': datetime.now().isoformat()
-            }
-    
-    def save_discovered_files(self):
-        """Сохранение списка обнаруженных файлов"""
-        with open('discovered_files.json', 'w', encoding='utf-8') as f:
-            json.dump(self.discovered_files, f, indent=2, ensure_ascii=False)
-    
     def check_initial_scan_status(self):
         """Проверка статуса первоначального сканирования"""
         # Упрощенная версия - всегда возвращаем False для демо
@@ -248,268 +203,339 @@ class HumanLikeDocumentMonitor:
         self.logger.info("🔍 Режим мониторинга - проверяем новые и измененные документы")
         return True
     
-    def crawl_with_browser_bot(self, url):
-        """Обход сайта с помощью браузерного бота"""
+    def crawl_listing(self, url, budget=None):
+        """
+        Обход листинга браузерным ботом со страницами пагинации:
+        (ссылки на документы, ссылки пагинации, обойдены ли все страницы).
+        budget - бюджет запросов источника, слот берется на каждую страницу
+        """
         bot = self.get_browser_bot()
         if not bot:
             self.logger.warning("🔄 Браузерный бот недоступен, используем обычный метод")
-            return []
+            return [], [], False
+        
+        max_pages = self.config['max_listing_pages']
+        document_urls = []
+        pagination_seen = []
+        queue = [url]
+        pages = 0
         
         try:
             self.logger.info(f"🤖 Используем браузерный бот для: {url}")
             
             # Имитируем человеческое поведение
-            bot.simulate_human_browsing("https://court.aifc.kz")
+            bot.simulate_human_browsing(self.sources.for_url(url).base_url)
             
-            # Переходим на целевую страницу
-            if bot.visit_page_like_human(url):
+            while queue and pages < max_pages:
+                page_url = queue.pop(0)
+                if pages:
+                    self.human_delay(2, 5)
                 
-                # Ищем документы
-                documents = bot.find_document_links()
+                # Переходим на страницу листинга
+                if budget:
+                    budget.acquire()
+                if not bot.visit_page_like_human(page_url):
+                    self.logger.warning(f"❌ Не удалось загрузить страницу в браузере: {page_url}")
+                    return document_urls, pagination_seen, False
+                pages += 1
+                
+                # Ищем документы в HTML страницы (разбор кешируется по хешу страницы)
+                documents, pagination = parse_listing(
+                    bot.get_page_source(),
+                    bot.get_current_url(),
+                    self.config['file_extensions']
+                )
                 
-                # Преобразуем в нужный формат
-                document_urls = []
                 for doc in documents:
-                    document_urls.append(doc['url'])
-                    self.logger.info(f"🔗 Найден браузером: {doc['url']}")
+                    if doc['url'] not in document_urls:
+                        document_urls.append(doc['url'])
+                        self.logger.debug("🔗 Найден браузером: %s", doc['url'])
                 
-                return document_urls
-            else:
-                self.logger.warning(f"❌ Не удалось загрузить страницу в браузере: {url}")
-                return []
+                for next_url in pagination:
+                    if next_url != url and next_url not in pagination_seen:
+                        pagination_seen.append(next_url)
+                        queue.append(next_url)
+            
+            complete = not queue
+            if not complete:
+                self.logger.warning(f"⚠️ Листинг {url}: обойдено только {pages} страниц (max_listing_pages)")
+            return document_urls, pagination_seen, complete
                 
         except Exception as e:
             self.logger.error(f"❌ Ошибка работы браузерного бота: {e}")
-            return []
+            return document_urls, pagination_seen, False
     
-    def create_aifc_directory_structure(self, url, base_dir):
-        """Создание структуры папок специально для AIFC Court с улучшенной классификацией"""
-        parsed_url = urlparse(url)
-        url_lower = url.lower()
-        
-        # Подробная классификация документов
-        folder_name = 'Other_Documents'  # По умолчанию
-        
-        # Судебные решения и дела
-        if any(keyword in url_lower for keyword in [
-            'judgments', '/uploads/', 'case%20no', 'judgment', 
-            'case_no', 'case-no', 'decision', 'ruling'
-        ]):
-            folder_name = 'Judgments'
-            self.logger.debug(f"📂 Классифицировано как судебное решение: {url}")
-        
-        # Законодательство и правила
-        elif any(keyword in url_lower for keyword in [
-            'legislation', '/legals/', 'regulations', 'rules', 
-            'policy', 'consultation-paper', 'guidance', 'notice',
-            'amendment', 'circular', 'directive', 'order'
-        ]):
-            folder_name = 'Legislation'
-            self.logger.debug(f"📂 Классифицировано как законодательство: {url}")
-        
-        # Если содержит специфические ключевые слова AIFC
-        elif any(keyword in url_lower for keyword in [
-            'aifc-court-regulations', 'aifc-court-rules', 
-            'template-of-offering', 'afsa-policy'
-        ]):
-            folder_name = 'Legislation'
-            self.logger.debug(f"📂 Классифицировано как AIFC законодательство: {url}")
+    def crawl_with_browser_bot(self, url):
+        """Обход сайта с помощью браузерного бота"""
+        return self.crawl_listing(url)[0]
+    
+    def diff_listing(self, listing_url, document_urls, pagination_urls=(), complete=True):
+        """
+        Сравнение листинга с сохраненным отпечатком.
+        Возвращает None, если листинг не изменился, иначе множества ссылок
+        (добавленные, удаленные, оставшиеся), посчитанные за один проход.
+        Удаленные считаются только после полного обхода всех страниц (complete):
+        документ, сдвинутый новыми на непросмотренную страницу, не исчез с сайта.
+        Документ, который есть в другом листинге (перенесен или опубликован в двух), тоже не удален.
+        """
+        listings = self.discovered_files.setdefault('listings', {})
+        previous = listings.get(listing_url)
+        fingerprint = fingerprint_listing(document_urls, pagination_urls)
+        current_time = datetime.now().isoformat()
+        self.discovered_files['last_full_scan'] = current_time
         
+        # После неполного обхода отпечаток не подтверждает список ссылок
+        if previous and previous.get('fingerprint') == fingerprint and previous.get('complete', True):
+            previous['checked_at'] = current_time
+            return None
+        
+        previous_links = set(previous.get('links', [])) if previous else set()
+        current_links = set(document_urls)
+        added = [doc_url for doc_url in document_urls if doc_url not in previous_links]
+        if complete:
+            removed_here = previous_links - current_links
+            if removed_here:
+                for other_url, other in listings.items():
+                    if other_url != listing_url:
+                        removed_here.difference_update(other.get('links', ()))
+            removed = sorted(removed_here)
+            stored_links = current_links
         else:
-            self.logger.debug(f"📂 Классифицировано как прочие документы: {url}")
-        
-        # Создаем основную структуру
-        full_path = os.path.join(base_dir, 'AIFC_Court', folder_name)
-        
-        # Для решений судов создаем подпапки по годам
-        if folder_name == 'Judgments':
-            year_match = re.search(r'20\d{2}', url)
-            if year_match:
-                year = year_match.group()
-                full_path = os.path.join(full_path, year)
-                self.logger.debug(f"📅 Создана подпапка для года: {year}")
-        
-        # Для законодательства можно создать подпапки по типу
-        elif folder_name == 'Legislation':
-            if 'consultation-paper' in url_lower:
-                full_path = os.path.join(full_path, 'Consultation_Papers')
-            elif 'guidance' in url_lower:
-                full_path = os.path.join(full_path, 'Guidance_Documents')
-            elif 'notice' in url_lower:
-                full_path = os.path.join(full_path, 'Notices')
-            elif 'template' in url_lower:
-                full_path = os.path.join(full_path, 'Templates')
-        
-        # Включаем поддержку длинных путей в Windows
-        if os.name == 'nt':  # Windows
-            if not full_path.startswith('\\\\?\\'):
-                full_path = '\\\\?\\' + os.path.abspath(full_path)
-        
-        try:
-            os.makedirs(full_path, exist_ok=True)
-        except OSError as e:
-            if "path too long" in str(e).lower() or e.errno == 2:
-                # Fallback: создаем более короткий путь
-                self.logger.warning(f"⚠️ Путь слишком длинный, создаем сокращенную версию")
-                short_path = os.path.join(base_dir, 'AIFC_Court', folder_name[:20])
-                os.makedirs(short_path, exist_ok=True)
-                return short_path
-            else:
-                raise
-        
-        return full_path
+            removed = []
+            stored_links = current_links | previous_links  # Непросмотренные страницы не теряются
+        still_present = current_links & previous_links
+        
+        listings[listing_url] = {
+            'fingerprint': fingerprint,
+            'links': sorted(stored_links),
+            'pagination': sorted(set(pagination_urls)),
+            'complete': complete,
+            'checked_at': current_time,
+            'changed_at': current_time
+        }
+        return added, removed, still_present
+    
+    @property
+    def sources(self):
+        """Реестр источников документов для текущей конфигурации"""
+        return get_registry(self.config)
+    
+    def create_aifc_directory_structure(self, url, base_dir):
+        """Создание структуры папок по правилам источника документа (AIFC Court по умолчанию)"""
+        source = self.sources.for_url(url)
+        return monitor_core.ensure_document_dir(url, base_dir, source.document_dir(url, base_dir))
     
     def get_clean_filename(self, url, content_disposition=None):
         """Получение чистого имени файла с обработкой длинных имен"""
         max_length = self.config.get('max_filename_length', 150)
-        
-        if content_disposition:
-            filename_match = re.search(r'filename[*]?=["\']?([^"\';\r\n]+)', content_disposition)
-            if filename_match:
-                filename = filename_match.group(1).strip()
-                if filename:
-                    filename = unquote(filename)
-        else:
-            parsed_url = urlparse(url)
-            filename = os.path.basename(unquote(parsed_url.path))
-        
-        if 'court.aifc.kz' in url:
-            if filename:
-                filename = filename.replace('%20', ' ')
-                filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
-                
-                if '.' not in filename and '/uploads/' in url:
-                    filename += '.pdf'
-        
-        # Обработка слишком длинных имен файлов
-        if len(filename) > max_length:
-            name, ext = os.path.splitext(filename)
-            
-            # Создаем сокращенную версию
-            if len(name) > max_length - len(ext) - 10:  # Оставляем место для расширения и хеша
-                # Берем первые слова + хеш URL для уникальности
-                words = name.split('-')
-                short_name = '-'.join(words[:3])  # Первые 3 слова
-                url_hash = hashlib.md5(url.encode()).hexdigest()[:8]
-                
-                # Ограничиваем длину
-                available_length = max_length - len(ext) - len(url_hash) - 1
-                if len(short_name) > available_length:
-                    short_name = short_name[:available_length]
-                
-                filename = f"{short_name}_{url_hash}{ext}"
-                
-                self.logger.info(f"📝 Сокращено длинное имя файла:")
-                self.logger.info(f"   Исходное: {name[:50]}...")
-                self.logger.info(f"   Новое: {filename}")
-        
-        # Финальная проверка
-        if not filename or '.' not in filename:
-            url_hash = hashlib.md5(url.encode()).hexdigest()[:8]
-            if 'judgments' in url.lower():
-                filename = f"judgment_{url_hash}.pdf"
-            elif 'legislation' in url.lower() or 'legals' in url.lower():
-                filename = f"legislation_{url_hash}.pdf"
-            else:
-                filename = f"document_{url_hash}.pdf"
-        
-        return filename
-    
-    def update_discovered_files(self, documents):
-        """Обновление списка обнаруженных файлов"""
+        return self.sources.for_url(url).clean_filename(url, max_length, content_disposition)
+    
+    def update_discovered_files(self, documents, removed=()):
+        """
+        Применение разницы сканирования к списку обнаруженных файлов.
+        Меняются только затронутые записи: новые документы добавляются,
+        исчезнувшие с сайта получают отметку removed_at, вернувшиеся - ее теряют.
+        Возвращает число измененных записей.
+        """
+        files = self.discovered_files['files']
         current_time = datetime.now().isoformat()
+        changed = 0
         
         for doc_url in documents:
-            if doc_url not in self.discovered_files['files']:
-                self.discovered_files['files'][doc_url] = {
+            file_info = files.get(doc_url)
+            
+            if file_info is None:
+                files[doc_url] = {
                     'first_seen': current_time,
                     'last_seen': current_time,
                     'downloaded': False,
                     'is_new': True  # Помечаем как новый
                 }
-                self.logger.info(f"🆕 Обнаружен новый документ: {doc_url}")
-            else:
-                self.discovered_files['files'][doc_url]['last_seen'] = current_time
+                changed += 1
+                metrics.record_result('discovered')
+                self.logger.info("🆕 Обнаружен новый документ: %s", doc_url, extra=fields(url=doc_url, stage='discovery'))
+            
+            elif file_info.get('removed_at'):
+                # Документ снова появился на сайте
+                del file_info['removed_at']
+                file_info['last_seen'] = current_time
+                changed += 1
+                self.logger.info("↩️ Документ снова на сайте: %s", doc_url, extra=fields(url=doc_url, stage='discovery'))
+            
+            elif not file_info.get('downloaded', False) and not file_info.get('is_new', False):
                 # Если файл уже был, но не скачан - тоже считаем новым
-                if not self.discovered_files['files'][doc_url].get('downloaded', False):
-                    self.discovered_files['files'][doc_url]['is_new'] = True
+                file_info['is_new'] = True
+                changed += 1
+        
+        for doc_url in removed:
+            file_info = files.get(doc_url)
+            if file_info is not None and not file_info.get('removed_at'):
+                file_info['removed_at'] = current_time
+                file_info['is_new'] = False
+                changed += 1
+                self.logger.info("🪦 Документ исчез с сайта: %s", doc_url, extra=fields(url=doc_url, stage='discovery'))
+        
+        if changed:
+            self.save_discovered_files()
         
-        self.discovered_files['last_full_scan'] = current_time
-        self.save_discovered_files()
+        return changed
     
     def get_files_to_download(self, documents):
         """Определить какие файлы нужно скачать"""
+        # URL после недавних неудач ждут своего времени
+        documents, deferred = self.failure_ledger.filter_eligible(documents)
+        if deferred:
+            self.logger.info(f"⏸️ Отложено после неудач: {len(deferred)} файлов")
+        
         if self.is_first_run:
             # Первый запуск - скачиваем ВСЕ документы
             self.logger.info(f"📋 Первый запуск: планируем скачать ВСЕ {len(documents)} документов")
-            return documents
+            return self.prioritize_downloads(documents)
         
-        # Режим мониторинга - только новые и измененные
+        # Режим мониторинга - новые файлы и те, кому пора на перепроверку
         files_to_download = []
+        not_due = 0
+        now = datetime.now()
         
         for doc_url in documents:
             file_info = self.discovered_files['files'].get(doc_url, {})
             
+            # Документ удален с сайта
+            if file_info.get('removed_at'):
+                continue
+            
             # Новый файл
             if file_info.get('is_new', False):
                 files_to_download.append(doc_url)
-                self.logger.info(f"🆕 К скачиванию: новый файл {doc_url}")
+                self.logger.debug("🆕 К скачиванию: новый файл %s", doc_url)
             
             # Файл не был скачан ранее
             elif not file_info.get('downloaded', False):
                 files_to_download.append(doc_url)
-                self.logger.info(f"📥 К скачиванию: не скачанный файл {doc_url}")
+                self.logger.debug("📥 К скачиванию: не скачанный файл %s", doc_url)
             
-            # Проверяем на изменения уже скачанные файлы
+            # Проверяем на изменения уже скачанные файлы по их графику
             elif doc_url in self.downloaded_files:
-                files_to_download.append(doc_url)
-                self.logger.debug(f"🔄 К проверке на изменения: {doc_url}")
+                if revalidation.is_due(self.downloaded_files[doc_url], now):
+                    files_to_download.append(doc_url)
+                    self.logger.debug("🔄 К проверке на изменения: %s", doc_url)
+                else:
+                    not_due += 1
         
-        self.logger.info(f"📊 К обработке: {len(files_to_download)} из {len(documents)} файлов")
-        return files_to_download
+        self.logger.info(f"📊 К обработке: {len(files_to_download)} из {len(documents)} файлов "
+                         f"(перепроверка отложена: {not_due})")
+        return self.prioritize_downloads(files_to_download)
+    
+    def prioritize_downloads(self, urls):
+        """Порядок скачивания: сначала первые скачивания, затем перепроверка, по приоритету"""
+        queue = build_download_queue(urls, self.discovered_files, self.downloaded_files,
+                                     self.failure_ledger.failure_counts())
+        self.logger.info(f"📊 Очередь: {queue.depth(FIRST_DOWNLOAD)} новых, "
+                         f"{queue.depth(REVALIDATION)} на перепроверку")
+        return list(queue.drain())
     
     def get_file_hash(self, content):
         """Получение хеша файла для проверки изменений"""
         return hashlib.md5(content).hexdigest()
     
-    def download_with_browser_bot(self, url, save_path):
-        """Скачивание файла через браузерный бот с проверкой изменений"""
+    def prime_http_session(self, url, force=False):
+        """
+        Перенос кук браузера в общую HTTP-сессию (браузер нужен, только если сессии
+        для домена URL нет или она истекла). Возвращает состояние сессии домена или None.
+        """
+        target = urlparse(url)
+        ttl = timedelta(minutes=self.config.get('browser_session_ttl_minutes', 30))
+        browser_session = self.browser_sessions.get(target.netloc)
+        if not force and browser_session and datetime.now() - browser_session['primed_at'] < ttl:
+            return browser_session
+        
         bot = self.get_browser_bot()
         if not bot:
-            return self.download_file_simple(url, save_path)
+            return None
         
-        try:
-            # Проверяем нужно ли перезаписывать файл
-            file_exists = os.path.exists(save_path)
-            old_hash = None
+        with timing.span('session_prime'):
+            current_url = bot.get_current_url() or ''
             
-            if file_exists and url in self.downloaded_files:
-                old_hash = self.downloaded_files[url]['hash']
+            # Открываем сайт в браузере, только если он еще не на нужном домене
+            if force or urlparse(current_url).netloc != target.netloc:
+                if not bot.visit_page_like_human(f"{target.scheme}://{target.netloc}"):
+                    return None
+                current_url = bot.get_current_url()
             
-            # Используем браузер для получения файла
-            if bot.visit_page_like_human(url):
+            for cookie in bot.get_cookies():
+                self.session.cookies.set(
+                    cookie['name'], cookie['value'],
+                    domain=cookie.get('domain'), path=cookie.get('path', '/')
+                )
+            # Заголовки общей сессии не меняем: ее параллельно используют другие источники
+            browser_session = {
+                'primed_at': datetime.now(),
+                'user_agent': bot.get_user_agent(),
+                'referer': current_url
+            }
+            self.browser_sessions[target.netloc] = browser_session
+            self.logger.info(f"🍪 Куки браузера перенесены в HTTP-сессию ({target.netloc})")
+            return browser_session
+    
+    def is_session_failure(self, response, url):
+        """Ответ означает потерю сессии: отказ в доступе или HTML-страница вместо файла"""
+        if response.status_code in (401, 403, 419, 440):
+            return True
+        
+        content_type = response.headers.get('Content-Type', '').lower()
+        is_document_url = urlparse(url).path.lower().endswith(tuple(self.config['file_extensions']))
+        return is_document_url and 'text/html' in content_type
+    
+    def download_with_browser_bot(self, url, save_path):
+        """Скачивание файла по HTTP с куками браузера и проверкой изменений"""
+        with timing.span(timing.FILE_STAGE, key=url) as file_span:
+            try:
+                # Браузер используется только для получения сессии
+                browser_session = self.prime_http_session(url)
+                if not browser_session:
+                    return self.download_file_simple(url, save_path)
+                
+                # Проверяем нужно ли перезаписывать файл
+                file_exists = os.path.exists(save_path)
+                old_hash = None
                 
-                # Получаем куки из браузера
-                cookies = bot.driver.get_cookies()
-                session_cookies = {}
-                for cookie in cookies:
-                    session_cookies[cookie['name']] = cookie['value']
+                if file_exists and url in self.downloaded_files:
+                    old_hash = self.downloaded_files[url]['hash']
                 
-                # Скачиваем через requests с куками браузера
                 headers = {
-                    'User-Agent': bot.driver.execute_script("return navigator.userAgent;"),
-                    'Referer': bot.driver.current_url
+                    'Accept': 'application/pdf,application/octet-stream,*/*',
+                    'Referer': browser_session['referer'],
+                    'User-Agent': browser_session['user_agent']
                 }
+                response = self.session.get(url, headers=headers, stream=True, timeout=self.config['timeout'])
+                
+                if self.is_session_failure(response, url):
+                    # Сессия истекла - обновляем ее через браузер и повторяем один раз
+                    self.logger.info("🔑 Сессия отклонена (HTTP %d), обновляем куки через браузер", response.status_code,
+                                     extra=fields(url=url, stage='download'))
+                    response.close()
+                    browser_session = self.prime_http_session(url, force=True)
+                    if not browser_session:
+                        self.failure_ledger.record_failure(url, http_status=response.status_code, error_class='session')
+                        return "failed"
+                    headers['Referer'] = browser_session['referer']
+                    headers['User-Agent'] = browser_session['user_agent']
+                    response = self.session.get(url, headers=headers, stream=True, timeout=self.config['timeout'])
                 
-                response = self.session.get(url, headers=headers, cookies=session_cookies, stream=True)
                 response.raise_for_status()
                 
-                file_content = response.content
-                file_hash = self.get_file_hash(file_content)
+                # Проверка и хеширование на лету во временный файл
+                with timing.span('transfer', key=url) as transfer:
+                    part_path, file_hash, file_size = download_to_part(response, save_path)
+                    transfer.bytes = file_size
                 
                 # Проверяем изменения
                 if old_hash and old_hash == file_hash:
-                    self.logger.debug(f"⚪ Файл не изменился: {os.path.basename(save_path)}")
+                    discard_part(part_path)
+                    with self.state_lock:
+                        revalidation.record_check(self.downloaded_files[url], changed=False, config=self.config)
+                    self.failure_ledger.record_success(url)
+                    self.logger.debug("⚪ Файл не изменился: %s", save_path, extra=fields(url=url, stage='download'))
                     return "unchanged"
                 
                 # Создаем резервную копию если файл изменился
@@ -517,195 +543,233 @@ class HumanLikeDocumentMonitor:
                     backup_path = save_path + f".backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
                     import shutil
                     shutil.copy2(save_path, backup_path)
-                    self.logger.info(f"🔄 Файл изменился! Создана резервная копия: {os.path.basename(backup_path)}")
+                    self.logger.info("🔄 Файл изменился! Создана резервная копия: %s", os.path.basename(backup_path),
+                                     extra=fields(url=url, stage='download'))
                 
                 # Сохраняем новый файл
-                os.makedirs(os.path.dirname(save_path), exist_ok=True)
-                with open(save_path, 'wb') as f:
-                    f.write(file_content)
+                with timing.span('commit', key=url):
+                    commit_part(part_path, save_path)
                 
-                # Обновляем метаданные
-                self.downloaded_files[url] = {
-                    'hash': file_hash,
-                    'path': save_path,
-                    'downloaded_at': datetime.now().isoformat(),
-                    'size': len(file_content),
-                    'method': 'browser_bot'
-                }
-                
-                # Помечаем файл как скачанный
-                if url in self.discovered_files['files']:
-                    self.discovered_files['files'][url]['downloaded'] = True
-                    self.discovered_files['files'][url]['last_downloaded'] = datetime.now().isoformat()
-                    self.discovered_files['files'][url]['is_new'] = False
+                # Обновляем метаданные (статистика изменений сохраняется)
+                with self.state_lock:
+                    record = self.downloaded_files.setdefault(url, {})
+                    record.update({
+                        'hash': file_hash,
+                        'path': save_path,
+                        'downloaded_at': datetime.now().isoformat(),
+                        'size': file_size,
+                        'method': 'browser_bot'
+                    })
+                    if old_hash:
+                        revalidation.record_check(record, changed=True, config=self.config)
+                    else:
+                        revalidation.start_schedule(record, self.config)
+                    
+                    # Помечаем файл как скачанный
+                    if url in self.discovered_files['files']:
+                        self.discovered_files['files'][url]['downloaded'] = True
+                        self.discovered_files['files'][url]['last_downloaded'] = datetime.now().isoformat()
+                        self.discovered_files['files'][url]['is_new'] = False
+                    
+                self.failure_ledger.record_success(url)
                 
+                log_fields = fields(url=url, stage='download', bytes=file_size, duration_ms=file_span.elapsed_ms())
                 if file_exists and old_hash != file_hash:
-                    self.logger.info(f"🔄📄 Обновлен файл: {os.path.basename(save_path)} ({len(file_content)} байт)")
+                    self.logger.info("🔄📄 Обновлен файл: %s (%d байт)", save_path, file_size, extra=log_fields)
                     return "updated"
                 else:
-                    self.logger.info(f"🆕📄 Скачан новый файл: {os.path.basename(save_path)} ({len(file_content)} байт)")
+                    self.logger.info("🆕📄 Скачан новый файл: %s (%d байт)", save_path, file_size, extra=log_fields)
                     return "new"
             
-        except Exception as e:
-            self.logger.error(f"❌ Ошибка скачивания через браузер {url}: {e}")
-            # Fallback на обычный метод
-            return self.download_file_simple(url, save_path)
-        
-        return "failed"
+            except Exception as e:
+                self.logger.error("❌ Ошибка скачивания через браузер %s: %s", url, e, extra=fields(url=url, stage='download'))
+                if get_http_status(e) is not None and not is_retryable(e):
+                    # Постоянная ошибка (например, 404) - повтор другим способом не поможет
+                    self.failure_ledger.record_failure(url, e)
+                    return "failed"
+                # Fallback на обычный метод
+                return self.download_file_simple(url, save_path)
     
     def download_file_simple(self, url, save_path):
         """Простое скачивание файла через requests"""
-        try:
-            headers = {
-                'User-Agent': self.get_random_user_agent(),
-                'Accept': 'application/pdf,application/vnd.ms-excel,*/*',
-            }
-            
-            response = self.session.get(url, headers=headers, timeout=self.config['timeout'], stream=True)
-            response.raise_for_status()
-            
-            file_content = response.content
-            file_hash = self.get_file_hash(file_content)
-            
-            if url in self.downloaded_files and self.downloaded_files[url]['hash'] == file_hash:
-                self.logger.debug(f"Файл не изменился: {url}")
-                return "unchanged"
-            
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-            
-            with open(save_path, 'wb') as f:
-                f.write(file_content)
-            
-            self.downloaded_files[url] = {
-                'hash': file_hash,
-                'path': save_path,
-                'downloaded_at': datetime.now().isoformat(),
-                'size': len(file_content),
-                'method': 'requests'
-            }
-            
-            self.logger.info(f"📄 Скачан файл: {save_path} ({len(file_content)} байт)")
-            return "new"
-            
-        except Exception as e:
-            self.logger.error(f"Ошибка при скачивании {url}: {str(e)}")
-            return "failed"
+        with timing.span(timing.FILE_STAGE, key=url) as file_span:
+            try:
+                headers = {
+                    'User-Agent': self.get_random_user_agent(),
+                    'Accept': 'application/pdf,application/vnd.ms-excel,*/*',
+                }
+                
+                response = self.session.get(url, headers=headers, timeout=self.config['timeout'], stream=True)
+                response.raise_for_status()
+                
+                with timing.span('transfer', key=url) as transfer:
+                    part_path, file_hash, file_size = download_to_part(response, save_path)
+                    transfer.bytes = file_size
+                
+                file_exists = os.path.exists(save_path)
+                old_hash = self.downloaded_files.get(url, {}).get('hash')
+                if file_exists and old_hash == file_hash:
+                    discard_part(part_path)
+                    with self.state_lock:
+                        revalidation.record_check(self.downloaded_files[url], changed=False, config=self.config)
+                    self.failure_ledger.record_success(url)
+                    self.logger.debug("Файл не изменился: %s", url, extra=fields(url=url, stage='download'))
+                    return "unchanged"
+                
+                with timing.span('commit', key=url):
+                    commit_part(part_path, save_path)
+                
+                with self.state_lock:
+                    record = self.downloaded_files.setdefault(url, {})
+                    record.update({
+                        'hash': file_hash,
+                        'path': save_path,
+                        'downloaded_at': datetime.now().isoformat(),
+                        'size': file_size,
+                        'method': 'requests'
+                    })
+                    if old_hash:
+                        revalidation.record_check(record, changed=old_hash != file_hash, config=self.config)
+                    else:
+                        revalidation.start_schedule(record, self.config)
+                
+                self.failure_ledger.record_success(url)
+                log_fields = fields(url=url, stage='download', bytes=file_size, duration_ms=file_span.elapsed_ms())
+                if old_hash and old_hash != file_hash:
+                    self.logger.info("🔄📄 Обновлен файл: %s (%d байт)", save_path, file_size, extra=log_fields)
+                    return "updated"
+                self.logger.info("📄 Скачан файл: %s (%d байт)", save_path, file_size, extra=log_fields)
+                return "new"
+                
+            except Exception as e:
+                self.failure_ledger.record_failure(url, e)
+                self.logger.error("Ошибка при скачивании %s: %s", url, e, extra=fields(url=url, stage='download'))
+                return "failed"
     
-    def human_like_session(self):
+    def human_like_session(self, close_browser=True):
         """Проведение человекоподобной сессии на сайте"""
-        base_url = "https://court.aifc.kz"
-        
-        self.logger.info("🚀 Начинаем новую сессию на сайте...")
-        
-        # Показываем время и статус рабочих часов
-        now = datetime.now()
-        time_str = now.strftime("%H:%M")
-        day_str = ["Понедельник", "Вторник", "Среда", "Четверг", "Пятница", "Суббота", "Воскресенье"][now.weekday()]
-        
-        if self.is_first_run:
-            self.logger.info(f"🕐 {day_str} {time_str} - Первый запуск программы")
-        elif self.is_working_hours():
-            self.logger.info(f"🕐 {day_str} {time_str} - Рабочие часы")
-        else:
-            self.logger.info(f"🕐 {day_str} {time_str} - Нерабочее время")
-        
-        # Определяем, что будем делать в этой сессии
-        will_download = self.should_download_now()
-        
-        if will_download:
-            self.logger.info("📋 Планируем скачать документы в этой сессии")
-        else:
-            self.logger.info("👀 Просто изучаем сайт в этой сессии")
-        
-        if will_download:
-            # Переходим к скачиванию документов
+        with sampling_profiler.profiled('human_like_session', self.config):
+            self.logger.info("🚀 Начинаем новую сессию на сайте...")
+            timing.run_profile.reset()
+            
+            # Показываем время и статус рабочих часов
+            now = datetime.now()
+            time_str = now.strftime("%H:%M")
+            day_str = ["Понедельник", "Вторник", "Среда", "Четверг", "Пятница", "Суббота", "Воскресенье"][now.weekday()]
+            
             if self.is_first_run:
-                self.logger.info("📥 ПЕРВЫЙ ЗАПУСК: Скачиваем ВСЕ документы с сайта...")
+                self.logger.info(f"🕐 {day_str} {time_str} - Первый запуск программы")
+            elif self.is_working_hours():
+                self.logger.info(f"🕐 {day_str} {time_str} - Рабочие часы")
             else:
-                self.logger.info("📥 МОНИТОРИНГ: Проверяем новые и измененные документы...")
+                self.logger.info(f"🕐 {day_str} {time_str} - Нерабочее время")
             
-            total_new = 0
-            total_updated = 0
-            total_unchanged = 0
-            total_failed = 0
+            # Определяем, что будем делать в этой сессии
+            will_download = self.should_download_now()
             
-            for url in self.config['urls']:
-                self.human_delay(3, 8)
-                
-                # Используем браузерный бот если доступен
-                documents = self.crawl_with_browser_bot(url)
+            if will_download:
+                self.logger.info("📋 Планируем скачать документы в этой сессии")
+            else:
+                self.logger.info("👀 Просто изучаем сайт в этой сессии")
+            
+            if will_download:
+                # Переходим к скачиванию документов
+                if self.is_first_run:
+                    self.logger.info("📥 ПЕРВЫЙ ЗАПУСК: Скачиваем ВСЕ документы с сайта...")
+                else:
+                    self.logger.info("📥 МОНИТОРИНГ: Проверяем новые и измененные документы...")
                 
-                self.logger.info(f"📊 Найдено документов на {url}: {len(documents)}")
+                total_new = 0
+                total_updated = 0
+                total_unchanged = 0
+                total_failed = 0
                 
-                if documents:
-                    # Обновляем список обнаруженных файлов
-                    self.update_discovered_files(documents)
+                for url in self.config['urls']:
+                    self.human_delay(3, 8)
                     
-                    # Определяем какие файлы нужно скачать
-                    files_to_download = self.get_files_to_download(documents)
+                    # Используем браузерный бот если доступен
+                    with timing.span('listing'):
+                        documents, pagination, complete = self.crawl_listing(url)
                     
-                    if files_to_download:
-                        self.logger.info(f"🎯 К обработке: {len(files_to_download)} файлов")
+                    self.logger.info(f"📊 Найдено документов на {url}: {len(documents)}")
+                    
+                    if documents:
+                        # Обновляем список обнаруженных файлов только при изменении листинга
+                        listing_diff = self.diff_listing(url, documents, pagination, complete)
+                        if listing_diff is None:
+                            self.logger.info(f"⚪ Листинг не изменился: {url}")
+                        else:
+                            added, removed, still_present = listing_diff
+                            self.logger.info(f"🔀 Изменения листинга: +{len(added)} / -{len(removed)} / ={len(still_present)}")
+                            if added or removed:
+                                self.update_discovered_files(added, removed)
                         
-                        for i, doc_url in enumerate(files_to_download):
-                            try:
-                                # Показываем прогресс
-                                self.logger.info(f"📥 [{i+1}/{len(files_to_download)}] Обрабатываем: {os.path.basename(doc_url)}")
-                                
-                                self.human_delay(1, 3)  # Уменьшенная задержка для массового скачивания
-                                
-                                save_dir = self.create_aifc_directory_structure(doc_url, self.config['download_dir'])
-                                filename = self.get_clean_filename(doc_url)
-                                save_path = os.path.join(save_dir, filename)
-                                
-                                result = self.download_with_browser_bot(doc_url, save_path)
-                                
-                                if result == "new":
-                                    total_new += 1
-                                elif result == "updated":
-                                    total_updated += 1
-                                elif result == "unchanged":
-                                    total_unchanged += 1
-                                else:
-                                    total_failed += 1
-                                
-                                # Периодически сохраняем прогресс
-                                if (i + 1) % 5 == 0:
-                                    self.save_downloaded_history()
-                                    self.save_discovered_files()
-                                    self.logger.info(f"💾 Прогресс сохранен ({i+1}/{len(files_to_download)})")
+                        # Определяем какие файлы нужно скачать
+                        files_to_download = self.get_files_to_download(documents)
+                        
+                        if files_to_download:
+                            self.logger.info(f"🎯 К обработке: {len(files_to_download)} файлов")
+                            
+                            for i, doc_url in enumerate(files_to_download):
+                                try:
+                                    # Показываем прогресс
+                                    self.logger.debug("📥 [%d/%d] Обрабатываем: %s", i + 1, len(files_to_download), doc_url)
+                                    
+                                    self.human_delay(1, 3)  # Уменьшенная задержка для массового скачивания
+                                    
+                                    save_dir = self.create_aifc_directory_structure(doc_url, self.config['download_dir'])
+                                    filename = self.get_clean_filename(doc_url)
+                                    save_path = os.path.join(save_dir, filename)
                                     
-                            except Exception as e:
-                                self.logger.error(f"Ошибка при обработке {doc_url}: {str(e)}")
-                                total_failed += 1
+                                    result = self.download_with_browser_bot(doc_url, save_path)
+                                    metrics.record_result(result)
+                                    
+                                    if result == "new":
+                                        total_new += 1
+                                    elif result == "updated":
+                                        total_updated += 1
+                                    elif result == "unchanged":
+                                        total_unchanged += 1
+                                    else:
+                                        total_failed += 1
+                                    
+                                    # Периодически сохраняем прогресс
+                                    if (i + 1) % 5 == 0:
+                                        self.save_downloaded_history()
+                                        self.save_discovered_files()
+                                        self.logger.info(f"💾 Прогресс сохранен ({i+1}/{len(files_to_download)})")
+                                        
+                                except Exception as e:
+                                    self.logger.error("Ошибка при обработке %s: %s", doc_url, e, extra=fields(url=doc_url, stage='download'))
+                                    total_failed += 1
+                        else:
+                            self.logger.info("📂 Новых файлов для скачивания не найдено")
                     else:
-                        self.logger.info("📂 Новых файлов для скачивания не найдено")
-                else:
-                    self.logger.warning(f"⚠️ Документы не найдены на {url}")
-        
-            # Итоговая статистика
-            self.print_download_statistics(total_new, total_updated, total_unchanged, total_failed)
+                        self.logger.warning(f"⚠️ Документы не найдены на {url}")
             
-            # Отмечаем первый запуск как завершенный
-            if self.is_first_run:
-                self.mark_first_run_completed()
-                self.logger.info("🎉 Первый запуск завершен! Все документы скачаны.")
-                self.logger.info("🔄 Следующие запуски будут только отслеживать изменения.")
-        
-        self.logger.info("🏁 Завершаем сессию")
-        
-        # Сохраняем финальные данные
-        self.save_downloaded_history()
-        self.save_discovered_files()
-        
-        # Закрываем браузерный бот
-        if self.browser_bot:
-            try:
-                self.browser_bot.close()
-                self.browser_bot = None
-                self.logger.info("🔒 Браузерный бот закрыт")
-            except Exception as e:
-                self.logger.error(f"Ошибка закрытия браузерного бота: {e}")
+                # Итоговая статистика
+                self.print_download_statistics(total_new, total_updated, total_unchanged, total_failed)
+                
+                # Отмечаем первый запуск как завершенный
+                if self.is_first_run:
+                    self.mark_first_run_completed()
+                    self.logger.info("🎉 Первый запуск завершен! Все документы скачаны.")
+                    self.logger.info("🔄 Следующие запуски будут только отслеживать изменения.")
+            
+            self.logger.info("🏁 Завершаем сессию")
+            
+            # Сохраняем финальные данные
+            self.save_downloaded_history()
+            self.save_discovered_files()
+            
+            profile = timing.run_profile.format_summary()
+            if profile:
+                self.logger.info("⏱️ Профиль сессии:\n%s", profile)
+            metrics.export(self.config, self.logger)
+            
+            # Закрываем браузерный бот (в непрерывном режиме он остается запущенным)
+            if close_browser:
+                self.close_browser_bot()
     
     def print_download_statistics(self, new, updated, unchanged, failed):
         """Вывод статистики скачивания"""
@@ -771,23 +835,29 @@ class HumanLikeDocumentMonitor:
         self.logger.info("🔄 Проверяем файлы для повторного скачивания...")
         
         retry_count = 0
+        skipped = 0
         for url, file_info in self.discovered_files['files'].items():
-            if not file_info.get('downloaded', False):
+            if not file_info.get('downloaded', False) and not file_info.get('removed_at'):
+                if not self.failure_ledger.is_eligible(url):
+                    skipped += 1
+                    continue
+                
                 try:
-                    self.logger.info(f"🔄 Повторная попытка: {os.path.basename(url)}")
+                    self.logger.info("🔄 Повторная попытка: %s", url, extra=fields(url=url, stage='retry'))
                     
                     save_dir = self.create_aifc_directory_structure(url, self.config['download_dir'])
                     filename = self.get_clean_filename(url)
                     save_path = os.path.join(save_dir, filename)
                     
                     result = self.download_with_browser_bot(url, save_path)
+                    metrics.record_result(result)
                     
                     if result in ["new", "updated"]:
                         retry_count += 1
-                        self.logger.info(f"✅ Успешно скачан при повторной попытке: {filename}")
+                        self.logger.info("✅ Успешно скачан при повторной попытке: %s", filename, extra=fields(url=url, stage='retry'))
                     
                 except Exception as e:
-                    self.logger.error(f"❌ Повторная попытка неудачна для {url}: {e}")
+                    self.logger.error("❌ Повторная попытка неудачна для %s: %s", url, e, extra=fields(url=url, stage='retry'))
         
         if retry_count > 0:
             self.logger.info(f"🎉 Успешно скачано при повторных попытках: {retry_count} файлов")
@@ -795,6 +865,9 @@ class HumanLikeDocumentMonitor:
             self.save_discovered_files()
         else:
             self.logger.info("📂 Нет файлов для повторного скачивания")
+        
+        if skipped:
+            self.logger.info(f"⏸️ Пропущено (еще не время после неудач): {skipped} файлов")
 
     def test_classification_logic(self):
         """Тестовая функция для проверки классификации"""
@@ -847,6 +920,19 @@ def enable_long_paths_windows():
 
 def main():
     """Главная функция"""
+    import argparse
+    parser = argparse.ArgumentParser(description="Человекоподобный монитор документов AIFC Court")
+    parser.add_argument('--daemon', action='store_true',
+                        help="непрерывный мониторинг по расписанию в одном процессе")
+    parser.add_argument('--profile', action='store_true',
+                        help="выборочное профилирование сессии (стеки для flamegraph и tracemalloc)")
+    parser.add_argument('--all-sources', action='store_true',
+                        help="параллельный обход всех источников из конфигурации (секция sources)")
+    args = parser.parse_args()
+    
+    if args.profile:
+        sampling_profiler.enable()
+    
     print("🤖 Человекоподобный монитор документов AIFC Court")
     print("=" * 50)
     
@@ -870,7 +956,16 @@ def main():
     print(f"🎭 Режим: Имитация реального пользователя с браузерным ботом")
     print(f"📏 Максимальная длина имени файла: {monitor.config.get('max_filename_length', 150)} символов")
     
-    monitor.human_like_session()
+    if args.daemon:
+        from monitor_daemon import MonitorDaemon
+        MonitorDaemon(monitor).run()
+    elif args.all_sources:
+        try:
+            MultiSourceEngine(monitor).run()
+        finally:
+            monitor.close_browser_bot()
+    else:
+        monitor.human_like_session()
 
 if __name__ == "__main__":
     main()
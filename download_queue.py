@@ -0,0 +1,125 @@
+"""
+Приоритетная очередь скачивания.
+Две полосы: первые скачивания идут раньше перепроверки уже скачанных файлов,
+внутри полосы - по приоритету (новизна, категория, давность проверки, ошибки, размер).
+"""
+
+import heapq
+import itertools
+from datetime import datetime
+
+from monitor_core import classify_url
+import metrics
+
+FIRST_DOWNLOAD = 'first_download'
+REVALIDATION = 'revalidation'
+
+# Порядок опустошения полос
+LANES = (FIRST_DOWNLOAD, REVALIDATION)
+
+# Вес категорий: решения суда интересуют пользователей в первую очередь
+CATEGORY_WEIGHTS = {
+    'Judgments': 30,
+    'Legislation': 20,
+    'Other_Documents': 10
+}
+
+def _age_days(timestamp, now):
+    """Возраст ISO-отметки времени в днях (0, если отметки нет)"""
+    if not timestamp:
+        return 0
+    try:
+        return max((now - datetime.fromisoformat(timestamp)).total_seconds() / 86400, 0)
+    except (TypeError, ValueError):
+        return 0
+
+def score_item(url, file_info, download_record=None, failure_count=0, now=None):
+    """Приоритет документа: чем больше, тем раньше скачиваем"""
+    now = now or datetime.now()
+    download_record = download_record or {}
+
+    score = CATEGORY_WEIGHTS.get(classify_url(url), 10)
+
+    # Новые документы - главный приоритет
+    if file_info.get('is_new', False):
+        score += 100
+
+    # Давно не проверявшиеся файлы поднимаются (до месяца)
+    last_verified = (download_record.get('last_checked') or
+                     download_record.get('downloaded_at') or
+                     file_info.get('first_seen'))
+    score += min(_age_days(last_verified, now), 30)
+
+    # Постоянно падающие ссылки опускаются вниз
+    score -= failure_count * 15
+
+    # Маленькие файлы раньше больших (до 10 очков за размер в МБ)
+    score -= min(download_record.get('size', 0) / (1024 * 1024), 10)
+
+    return score
+
+def lane_for(file_info, download_record=None):
+    """Полоса очереди: первое скачивание или перепроверка"""
+    if file_info.get('downloaded', False) and download_record:
+        return REVALIDATION
+    return FIRST_DOWNLOAD
+
+class DownloadQueue:
+    """Очередь с приоритетами и раздельными полосами"""
+
+    def __init__(self):
+        self._heaps = {lane: [] for lane in LANES}
+        self._counter = itertools.count()  # Стабильный порядок при равном приоритете
+        self._queued = set()
+
+    def push(self, url, score, lane=FIRST_DOWNLOAD):
+        """Добавление URL (повторное добавление игнорируется)"""
+        if url in self._queued:
+            return False
+        self._queued.add(url)
+        heapq.heappush(self._heaps[lane], (-score, next(self._counter), url))
+        return True
+
+    def pop(self):
+        """Следующий URL: (полоса, url) или None, если очередь пуста"""
+        for lane in LANES:
+            heap = self._heaps[lane]
+            if heap:
+                _, _, url = heapq.heappop(heap)
+                self._queued.discard(url)
+                return lane, url
+        return None
+
+    def depth(self, lane=None):
+        """Глубина очереди (всей или одной полосы)"""
+        if lane is not None:
+            return len(self._heaps[lane])
+        return sum(len(heap) for heap in self._heaps.values())
+
+    def __len__(self):
+        return self.depth()
+
+    def drain(self):
+        """Опустошение очереди в порядке приоритета"""
+        while True:
+            item = self.pop()
+            if item is None:
+                return
+            yield item[1]
+
+def build_download_queue(urls, discovered_data, downloaded_data, failure_counts=None, now=None):
+    """Очередь для набора URL по данным discovered/downloaded"""
+    now = now or datetime.now()
+    failure_counts = failure_counts or {}
+    files = discovered_data.get('files', {})
+
+    queue = DownloadQueue()
+    for url in urls:
+        file_info = files.get(url, {})
+        download_record = downloaded_data.get(url)
+        score = score_item(url, file_info, download_record, failure_counts.get(url, 0), now)
+        queue.push(url, score, lane_for(file_info, download_record))
+
+    for lane in LANES:
+        metrics.QUEUE_DEPTH.set(queue.depth(lane), lane)
+    return queue
@@ -0,0 +1,126 @@
+"""
+Проверка скачиваемого файла на лету: Content-Type, сигнатура по первым байтам,
+совпадение Content-Length с полученным объемом.
+Данные пишутся во временный .part файл и попадают на место только после проверки.
+"""
+
+import os
+import hashlib
+import threading
+
+from retry_policy import ClassifiedError, ContentTooSmall, INVALID_CONTENT
+
+# Сигнатуры форматов по расширению
+SIGNATURES = {
+    '.pdf': (b'%PDF-',),
+    '.docx': (b'PK\x03\x04', b'PK\x05\x06'),
+    '.xlsx': (b'PK\x03\x04', b'PK\x05\x06'),
+    '.zip': (b'PK\x03\x04', b'PK\x05\x06'),
+    '.doc': (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1',),
+    '.xls': (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1',),
+    '.rar': (b'Rar!\x1a\x07',)
+}
+
+# Типы содержимого, которые никогда не являются документом
+REJECTED_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', 'application/json')
+
+# Сколько байт нужно для проверки сигнатуры
+SNIFF_SIZE = 16
+
+class DownloadValidationError(ClassifiedError):
+    """Ответ сервера не похож на ожидаемый документ"""
+
+    def __init__(self, message):
+        super().__init__(INVALID_CONTENT, message)
+
+def get_expected_length(response):
+    """Ожидаемый размер тела (None, если сервер сжимает ответ или не сообщил длину)"""
+    headers = response.headers
+    if headers.get('Content-Encoding', 'identity').lower() != 'identity':
+        return None  # requests распаковывает тело, длины не совпадут
+    try:
+        return int(headers.get('Content-Length'))
+    except (TypeError, ValueError):
+        return None
+
+def validate_headers(response):
+    """Проверка заголовков до чтения тела"""
+    content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+    if content_type in REJECTED_CONTENT_TYPES:
+        raise DownloadValidationError(f"Content-Type {content_type} вместо документа")
+
+def validate_signature(head, extension):
+    """Проверка первых байт: не HTML и совпадает с форматом файла"""
+    sample = head.lstrip()[:SNIFF_SIZE].lower()
+    if sample.startswith((b'<!doctype html', b'<html', b'<head', b'<?xml')):
+        raise DownloadValidationError("Получена HTML-страница вместо документа")
+
+    signatures = SIGNATURES.get(extension.lower())
+    if signatures and not head.startswith(signatures):
+        raise DownloadValidationError(f"Сигнатура {head[:8]!r} не соответствует формату {extension}")
+
+def discard_part(part_path):
+    """Удаление временного файла"""
+    try:
+        os.remove(part_path)
+    except OSError:
+        pass
+
+def commit_part(part_path, save_path):
+    """Атомарная замена целевого файла проверенным"""
+    os.replace(part_path, save_path)
+
+def get_part_path(save_path):
+    """Временный файл, свой для каждого процесса и потока (один файл могут качать параллельно)"""
+    return f"{save_path}.{os.getpid()}-{threading.get_ident()}.part"
+
+def download_to_part(response, save_path, min_size=0, chunk_size=65536):
+    """
+    Потоковое скачивание во временный .part файл с проверкой и хешированием.
+    Возвращает (part_path, md5, size); при ошибке .part удаляется и
+    выбрасывается DownloadValidationError или ContentTooSmall.
+    """
+    validate_headers(response)
+
+    extension = os.path.splitext(save_path)[1]
+    expected_length = get_expected_length(response)
+    part_path = get_part_path(save_path)
+    file_hash = hashlib.md5()
+    size = 0
+    head = b''
+
+    os.makedirs(os.path.dirname(save_path), exist_ok=True)
+    try:
+        with open(part_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if not chunk:
+                    continue
+
+                # Сигнатура проверяется до записи первых данных: короткие куски копятся в head
+                if len(head) < SNIFF_SIZE:
+                    head += chunk
+                    if len(head) < SNIFF_SIZE:
+                        continue
+                    validate_signature(head, extension)
+                    chunk, head = head, head[:SNIFF_SIZE]
+
+                file_hash.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+
+            if len(head) < SNIFF_SIZE:
+                # Весь ответ короче окна сигнатуры
+                validate_signature(head, extension)
+                file_hash.update(head)
+                f.write(head)
+                size += len(head)
+        if expected_length is not None and size != expected_length:
+            raise DownloadValidationError(f"Получено {size} байт из {expected_length} (обрыв)")
+        if size < min_size:
+            raise ContentTooSmall(size, min_size)
+    except BaseException:
+        discard_part(part_path)
+        response.close()
+        raise
+
+    return part_path, file_hash.hexdigest(), size
@@ -14,10 +14,21 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.keys import Keys
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
 import undetected_chromedriver as uc
 from urllib.parse import urlparse, urljoin
 import os
+import re
+from link_extractor import extract_document_links, DEFAULT_EXTENSIONS
+from retry_policy import RetryPolicy, HTTPStatusError, PageBlocked
+from download_validator import download_to_part, commit_part
+
+# Признаки страницы блокировки (поиск без копирования page_source в нижний регистр)
+BLOCKING_PATTERN = re.compile('|'.join(re.escape(indicator) for indicator in [
+    'access denied', 'blocked', 'forbidden', 'captcha',
+    'too many requests', 'rate limit', 'bot detection',
+    'please wait', 'checking your browser'
+]), re.IGNORECASE)
 
 class SuperHumanBrowserBot:
     def __init__(self, headless=False, stealth_mode=True, ultra_stealth=True):
@@ -43,7 +54,6 @@ class SuperHumanBrowserBot:
             'break_probability': 0.15,  # вероятность паузы
             'long_break_duration': (30, 120),  # длинная пауза
             'short_break_duration': (5, 15),   # короткая пауза
-            'retry_delays': [10, 30, 60, 120, 300],  # задержки при повторах
         }
     
     def setup_driver(self):
@@ -259,64 +269,40 @@ class SuperHumanBrowserBot:
                     self.driver.execute_script(f"window.scrollBy(0, -{scroll_amount});")
                 self.human_like_delay(1, 4, "navigation")
     
+    def open_page(self, url):
+        """Одна попытка открыть страницу; блокировка - исключение PageBlocked"""
+        self.logger.info(f"🌐 Открываем: {url}")
+        
+        # Переходим на страницу
+        self.driver.get(url)
+        
+        # Ждем загрузки
+        WebDriverWait(self.driver, 15).until(
+            EC.presence_of_element_located((By.TAG_NAME, "body"))
+        )
+        
+        # Проверяем на блокировку
+        if BLOCKING_PATTERN.search(self.driver.title) or BLOCKING_PATTERN.search(self.driver.page_source):
+            self.logger.warning("🚫 Обнаружена блокировка")
+            raise PageBlocked(url)
+        
+        # Успешная загрузка - имитируем изучение страницы
+        self.simulate_page_reading()
+        return True
+    
+    def on_blocked_retry(self, error, attempt_number):
+        """Перед повтором после блокировки имитируем поведение заблокированного пользователя"""
+        if isinstance(error, PageBlocked):
+            self.simulate_blocked_user_behavior()
+    
     def visit_page_with_retry(self, url, max_retries=3):
         """Посещение страницы с умными повторами при блокировке"""
-        for attempt in range(max_retries):
-            try:
-                self.logger.info(f"🌐 Попытка {attempt + 1}/{max_retries}: {url}")
-                
-                # Если не первая попытка, делаем увеличивающуюся задержку
-                if attempt > 0:
-                    retry_delay = self.human_behavior_patterns['retry_delays'][min(attempt-1, 4)]
-                    jittered_delay = retry_delay + random.uniform(-10, 30)
-                    self.logger.info(f"⏳ Задержка перед повтором: {jittered_delay:.1f} сек")
-                    time.sleep(jittered_delay)
-                
-                # Переходим на страницу
-                self.driver.get(url)
-                
-                # Ждем загрузки
-                WebDriverWait(self.driver, 15).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "body"))
-                )
-                
-                # Проверяем на блокировку
-                page_title = self.driver.title.lower()
-                page_source = self.driver.page_source.lower()
-                
-                blocking_indicators = [
-                    'access denied', 'blocked', 'forbidden', 'captcha',
-                    'too many requests', 'rate limit', 'bot detection',
-                    'please wait', 'checking your browser'
-                ]
-                
-                is_blocked = any(indicator in page_title or indicator in page_source 
-                               for indicator in blocking_indicators)
-                
-                if is_blocked:
-                    self.logger.warning(f"🚫 Обнаружена блокировка на попытке {attempt + 1}")
-                    if attempt < max_retries - 1:
-                        # Имитируем поведение заблокированного пользователя
-                        self.simulate_blocked_user_behavior()
-                        continue
-                    else:
-                        return False
-                
-                # Успешная загрузка - имитируем изучение страницы
-                self.simulate_page_reading()
-                return True
-                
-            except TimeoutException:
-                self.logger.warning(f"⏰ Таймаут на попытке {attempt + 1}")
-                if attempt == max_retries - 1:
-                    return False
-                    
-            except Exception as e:
-                self.logger.error(f"❌ Ошибка на попытке {attempt + 1}: {e}")
-                if attempt == max_retries - 1:
-                    return False
-        
-        return False
+        try:
+            return RetryPolicy(max_attempts=max_retries, logger=self.logger, on_retry=self.on_blocked_retry).run(
+                self.open_page, url, description=url)
+        except Exception as e:
+            self.logger.error(f"❌ Не удалось открыть {url}: {e}")
+            return False
     
     def simulate_blocked_user_behavior(self):
         """Имитация поведения пользователя при блокировке"""
@@ -362,80 +348,99 @@ class SuperHumanBrowserBot:
             self.human_like_delay(1, 3, "navigation")
     
     def smart_download_file(self, url, save_path, max_retries=5):
-        """Умное скачивание файла с обходом блокировок"""
-        for attempt in range(max_retries):
-            try:
-                self.logger.info(f"📥 Скачивание (попытка {attempt + 1}/{max_retries}): {os.path.basename(url)}")
-                
-                # Посещаем страницу с файлом
-                if not self.visit_page_with_retry(url, max_retries=2):
-                    self.logger.warning(f"❌ Не удалось загрузить страницу: {url}")
-                    continue
-                
-                # Получаем куки из браузера для requests
-                cookies = self.driver.get_cookies()
-                session_cookies = {cookie['name']: cookie['value'] for cookie in cookies}
-                
-                # Получаем заголовки браузера
-                user_agent = self.driver.execute_script("return navigator.userAgent;")
-                
-                headers = {
-                    'User-Agent': user_agent,
-                    'Referer': self.driver.current_url,
-                    'Accept': 'application/pdf,application/octet-stream,*/*',
-                    'Accept-Language': 'en-US,en;q=0.9,ru;q=0.8',
-                    'Accept-Encoding': 'gzip, deflate, br',
-                    'Connection': 'keep-alive',
-                    'Upgrade-Insecure-Requests': '1',
-                    'Sec-Fetch-Dest': 'document',
-                    'Sec-Fetch-Mode': 'navigate',
-                    'Sec-Fetch-Site': 'same-origin'
-                }
-                
-                # Пауза перед скачиванием (пользователь принимает решение)
-                self.human_like_delay(2, 6, "downloading")
+        """Умное скачивание файла с обходом блокировок (одна политика повторов на все шаги)"""
+        def attempt():
+            self.logger.info(f"📥 Скачивание: {os.path.basename(url)}")
+            
+            # Посещаем страницу с файлом (повторы - во внешней политике)
+            self.open_page(url)
+            
+            # Получаем куки из браузера для requests
+            cookies = self.driver.get_cookies()
+            session_cookies = {cookie['name']: cookie['value'] for cookie in cookies}
+            
+            # Получаем заголовки браузера
+            user_agent = self.driver.execute_script("return navigator.userAgent;")
+            
+            headers = {
+                'User-Agent': user_agent,
+                'Referer': self.driver.current_url,
+                'Accept': 'application/pdf,application/octet-stream,*/*',
+                'Accept-Language': 'en-US,en;q=0.9,ru;q=0.8',
+                'Accept-Encoding': 'gzip, deflate, br',
+                'Connection': 'keep-alive',
+                'Upgrade-Insecure-Requests': '1',
+                'Sec-Fetch-Dest': 'document',
+                'Sec-Fetch-Mode': 'navigate',
+                'Sec-Fetch-Site': 'same-origin'
+            }
+            
+            # Пауза перед скачиванием (пользователь принимает решение)
+            self.human_like_delay(2, 6, "downloading")
+            
+            # Скачиваем через requests с куками браузера
+            response = requests.get(
+                url, 
+                headers=headers, 
+                cookies=session_cookies, 
+                stream=True,
+                timeout=30
+            )
+            
+            if response.status_code == 200:
+                # Проверка содержимого до записи на место
+                part_path, _, file_size = download_to_part(response, save_path)
+                commit_part(part_path, save_path)
                 
-                # Скачиваем через requests с куками браузера
-                response = requests.get(
-                    url, 
-                    headers=headers, 
-                    cookies=session_cookies, 
-                    stream=True,
-                    timeout=30
-                )
+                self.logger.info(f"✅ Файл скачан: {os.path.basename(save_path)} ({file_size} байт)")
                 
-                if response.status_code == 200:
-                    os.makedirs(os.path.dirname(save_path), exist_ok=True)
-                    
-                    with open(save_path, 'wb') as f:
-                        for chunk in response.iter_content(chunk_size=8192):
-                            f.write(chunk)
-                    
-                    file_size = os.path.getsize(save_path)
-                    self.logger.info(f"✅ Файл скачан: {os.path.basename(save_path)} ({file_size} байт)")
-                    
-                    # Небольшая пауза после успешного скачивания
-                    self.human_like_delay(1, 3, "navigation")
-                    return True
-                    
-                else:
-                    self.logger.warning(f"⚠️ HTTP {response.status_code} для {url}")
-                    
-            except requests.exceptions.RequestException as e:
-                self.logger.warning(f"🌐 Сетевая ошибка (попытка {attempt + 1}): {e}")
-                
-            except Exception as e:
-                self.logger.error(f"❌ Ошибка скачивания (попытка {attempt + 1}): {e}")
+                # Небольшая пауза после успешного скачивания
+                self.human_like_delay(1, 3, "navigation")
+                return True
             
-            # Задержка перед следующей попыткой
-            if attempt < max_retries - 1:
-                retry_delay = self.human_behavior_patterns['retry_delays'][min(attempt, 4)]
-                jittered_delay = retry_delay + random.uniform(-5, 15)
-                self.logger.info(f"⏳ Пауза перед повтором: {jittered_delay:.1f} сек")
-                time.sleep(jittered_delay)
+            self.logger.warning(f"⚠️ HTTP {response.status_code} для {url}")
+            raise HTTPStatusError(response)
         
-        return False
+        try:
+            return RetryPolicy(max_attempts=max_retries, logger=self.logger, on_retry=self.on_blocked_retry).run(
+                attempt, description=os.path.basename(url))
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка скачивания {url}: {e}")
+            return False
     
+    def visit_page_like_human(self, url):
+        """Посещение страницы как человек (интерфейс AdvancedBrowserBot)"""
+        return self.visit_page_with_retry(url)
+
+    def simulate_human_browsing(self, start_url):
+        """Короткое знакомство с сайтом перед основной работой"""
+        if self.visit_page_with_retry(start_url, max_retries=2):
+            self.human_like_delay(1, 4, "navigation")
+
+    def find_document_links(self, extensions=DEFAULT_EXTENSIONS):
+        """Поиск ссылок на документы на текущей странице"""
+        return extract_document_links(self.driver.page_source, self.driver.current_url, extensions)
+
+    def get_cookies(self):
+        """Куки текущей сессии браузера"""
+        return self.driver.get_cookies()
+
+    def get_user_agent(self):
+        """User-Agent браузера"""
+        return self.driver.execute_script("return navigator.userAgent;")
+
+    def get_current_url(self):
+        """Текущий адрес страницы"""
+        return self.driver.current_url
+
+    def get_page_source(self):
+        """HTML текущей страницы"""
+        return self.driver.page_source
+
+    def reset_session(self):
+        """Сброс сессии без перезапуска браузера"""
+        self.driver.delete_all_cookies()
+
     def close(self):
         """Закрытие браузера"""
         if self.driver:
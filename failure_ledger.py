@@ -0,0 +1,125 @@
+"""
+Журнал неудачных скачиваний по URL (failure_ledger.json) с автоматическим выключателем.
+Для каждого URL хранится класс ошибки, HTTP-статус, число попыток и время,
+когда URL снова можно пробовать. Постоянно падающие URL "паркуются" надолго.
+"""
+
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from monitor_core import FAILURE_LEDGER, state_file
+from retry_policy import classify_error, classify_status, get_http_status, OTHER
+
+# HTTP-статусы, после которых повторять почти бессмысленно
+PERMANENT_STATUSES = {400, 401, 403, 404, 410, 451}
+
+DEFAULT_BACKOFF_MINUTES = 30
+DEFAULT_BACKOFF_MAX_HOURS = 24
+DEFAULT_BREAKER_THRESHOLD = 5
+DEFAULT_PARK_DAYS = 7
+
+def classify_failure(error=None, http_status=None):
+    """Класс ошибки для журнала (те же классы, что и в политике повторов)"""
+    if error is not None:
+        return classify_error(error)
+    if http_status is not None:
+        return classify_status(http_status)
+    return OTHER
+
+class FailureLedger:
+    """Журнал неудач с экспоненциальной паузой и выключателем"""
+
+    def __init__(self, path=FAILURE_LEDGER, config=None, autosave=True):
+        config = config or {}
+        self.path = path
+        self.autosave = autosave
+        self.backoff = timedelta(minutes=config.get('failure_backoff_minutes', DEFAULT_BACKOFF_MINUTES))
+        self.backoff_max = timedelta(hours=config.get('failure_backoff_max_hours', DEFAULT_BACKOFF_MAX_HOURS))
+        self.threshold = config.get('failure_breaker_threshold', DEFAULT_BREAKER_THRESHOLD)
+        self.park_time = timedelta(days=config.get('failure_park_days', DEFAULT_PARK_DAYS))
+        self.state = state_file(path)
+        self.entries = self.state.load({})
+        self.lock = threading.RLock()
+        self.local = threading.local()
+
+    def save(self):
+        with self.lock:
+            self.state.save(self.entries)
+
+    @contextmanager
+    def suppress_failures(self):
+        """Неудачи внутри блока не учитываются (их учтет вызывающий один раз за URL)"""
+        self.local.suppressed = getattr(self.local, 'suppressed', 0) + 1
+        try:
+            yield
+        finally:
+            self.local.suppressed -= 1
+
+    def record_failure(self, url, error=None, http_status=None, error_class=None, now=None):
+        """Учет неудачной попытки и расчет следующего допустимого времени"""
+        if getattr(self.local, 'suppressed', 0):
+            return self.entries.get(url)
+        now = now or datetime.now()
+        if http_status is None and error is not None:
+            http_status = get_http_status(error)
+
+        with self.lock:
+            entry = self.entries.setdefault(url, {'attempts': 0, 'first_failed': now.isoformat()})
+            entry['attempts'] += 1
+            entry['error_class'] = error_class or classify_failure(error, http_status)
+            entry['http_status'] = http_status
+            entry['message'] = str(error)[:300] if error is not None else None
+            entry['last_failed'] = now.isoformat()
+
+            attempts = entry['attempts']
+            permanent = http_status in PERMANENT_STATUSES
+            if attempts >= self.threshold or (permanent and attempts >= 2):
+                # Выключатель: паркуем URL, каждая следующая неудача удваивает срок
+                overflow = max(attempts - self.threshold, 0)
+                entry['parked'] = True
+                entry['next_eligible'] = (now + self.park_time * (2 ** min(overflow, 4))).isoformat()
+            else:
+                entry['parked'] = False
+                delay = min(self.backoff * (2 ** (attempts - 1)), self.backoff_max)
+                entry['next_eligible'] = (now + delay).isoformat()
+
+            if self.autosave:
+                self.save()
+            return entry
+
+    def record_success(self, url):
+        """Успешное скачивание снимает URL с учета"""
+        with self.lock:
+            if self.entries.pop(url, None) is not None and self.autosave:
+                self.save()
+
+    def is_eligible(self, url, now=None):
+        """Можно ли сейчас пробовать скачать URL"""
+        entry = self.entries.get(url)
+        if not entry or not entry.get('next_eligible'):
+            return True
+        try:
+            return datetime.fromisoformat(entry['next_eligible']) <= (now or datetime.now())
+        except (TypeError, ValueError):
+            return True
+
+    def is_parked(self, url, now=None):
+        """URL отключен выключателем"""
+        entry = self.entries.get(url)
+        return bool(entry and entry.get('parked')) and not self.is_eligible(url, now)
+
+    def failure_count(self, url):
+        return self.entries.get(url, {}).get('attempts', 0)
+
+    def failure_counts(self):
+        """Число неудач по URL (для приоритетов очереди)"""
+        return {url: entry.get('attempts', 0) for url, entry in self.entries.items()}
+
+    def filter_eligible(self, urls, now=None):
+        """Разделение URL на доступные сейчас и отложенные"""
+        now = now or datetime.now()
+        eligible, deferred = [], []
+        for url in urls:
+            (eligible if self.is_eligible(url, now) else deferred).append(url)
+        return eligible, deferred
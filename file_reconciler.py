@@ -0,0 +1,106 @@
+"""
+Потоковая сверка обнаруженных файлов с записями о скачивании и файлами на диске
+"""
+
+import os
+
+# Категории результата сверки (совпадают с ключами analyze_file_status)
+MISSING_COMPLETELY = 'missing_completely'   # Файла нет вообще
+MISSING_ON_DISK = 'missing_on_disk'         # Запись есть, файла нет
+OUTDATED_RECORDS = 'outdated_records'       # Файл есть, запись устарела
+CORRECTLY_TRACKED = 'correctly_tracked'     # Все правильно
+NEEDS_REDOWNLOAD = 'needs_redownload'       # Нужно перескачать
+
+CATEGORIES = [
+    MISSING_COMPLETELY,
+    MISSING_ON_DISK,
+    OUTDATED_RECORDS,
+    CORRECTLY_TRACKED,
+    NEEDS_REDOWNLOAD
+]
+
+# Категории, требующие скачивания
+DOWNLOAD_CATEGORIES = (MISSING_COMPLETELY, MISSING_ON_DISK, NEEDS_REDOWNLOAD)
+
+class DirectoryInventory:
+    """Ленивая опись файлов на диске: каждая папка читается не более одного раза"""
+
+    def __init__(self):
+        self._listings = {}
+
+    def _listing(self, directory):
+        listing = self._listings.get(directory)
+        if listing is None:
+            try:
+                listing = frozenset(os.path.normcase(name) for name in os.listdir(directory))
+            except OSError:
+                listing = frozenset()
+            self._listings[directory] = listing
+        return listing
+
+    def exists(self, path):
+        """Проверка наличия файла по кешированному содержимому папки"""
+        directory, name = os.path.split(path)
+        return os.path.normcase(name) in self._listing(directory)
+
+    def forget(self, path):
+        """Сброс кеша папки после изменения ее содержимого"""
+        self._listings.pop(os.path.dirname(path), None)
+
+def reconcile_files(discovered_data, downloaded_data, resolve_path, inventory=None):
+    """
+    Однопроходная сверка: для каждой обнаруженной записи лениво выдает
+    пару (категория, информация о файле).
+
+    resolve_path(url) должен возвращать ожидаемый путь файла на диске.
+    Документы, удаленные с сайта (removed_at), пропускаются.
+    """
+    if inventory is None:
+        inventory = DirectoryInventory()
+
+    for url, file_info in discovered_data.get('files', {}).items():
+        if file_info.get('removed_at'):
+            continue
+
+        expected_path = resolve_path(url)
+
+        file_exists_on_disk = inventory.exists(expected_path)
+        download_record = downloaded_data.get(url)
+        is_in_download_records = download_record is not None
+        is_marked_downloaded = file_info.get('downloaded', False)
+
+        if not file_exists_on_disk and not is_in_download_records:
+            yield MISSING_COMPLETELY, {
+                'url': url,
+                'expected_path': expected_path,
+                'reason': 'Файл не скачан'
+            }
+
+        elif not file_exists_on_disk and is_in_download_records:
+            yield MISSING_ON_DISK, {
+                'url': url,
+                'expected_path': expected_path,
+                'recorded_path': download_record.get('path', 'unknown'),
+                'reason': 'Файл потерян с диска'
+            }
+
+        elif file_exists_on_disk and not is_marked_downloaded:
+            yield OUTDATED_RECORDS, {
+                'url': url,
+                'existing_path': expected_path,
+                'reason': 'Нужно обновить записи'
+            }
+
+        elif is_marked_downloaded and is_in_download_records:
+            yield CORRECTLY_TRACKED, {
+                'url': url,
+                'path': expected_path,
+                'reason': 'Отслеживается корректно'
+            }
+
+        else:
+            yield NEEDS_REDOWNLOAD, {
+                'url': url,
+                'expected_path': expected_path,
+                'reason': f"Неопределенный статус (exists:{file_exists_on_disk}, marked:{is_marked_downloaded}, recorded:{is_in_download_records})"
+            }
@@ -3,92 +3,37 @@
 """
 
 import os
-import json
 import shutil
 import logging
+import logging_setup
 from pathlib import Path
 from urllib.parse import urlparse
+import monitor_core
+from sources import get_registry
 
 def setup_logging():
     """Настройка логирования"""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler('file_reorganizer.log', encoding='utf-8'),
-            logging.StreamHandler()
-        ]
-    )
+    logging_setup.setup_logging('file_reorganizer.log')
     return logging.getLogger(__name__)
 
 def load_downloaded_files():
     """Загрузка информации о скачанных файлах"""
-    try:
-        with open('downloaded_files.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
+    downloaded_files = monitor_core.downloaded_state().load()
+    if downloaded_files is None:
         print("❌ Файл downloaded_files.json не найден!")
         return {}
+    return downloaded_files
 
 def classify_url(url):
     """Классификация URL для определения правильной папки"""
-    url_lower = url.lower()
-    
-    # Судебные решения и дела
-    if any(keyword in url_lower for keyword in [
-        'judgments', '/uploads/', 'case%20no', 'judgment', 
-        'case_no', 'case-no', 'decision', 'ruling'
-    ]):
-        return 'Judgments'
-    
-    # Законодательство и правила
-    elif any(keyword in url_lower for keyword in [
-        'legislation', '/legals/', 'regulations', 'rules', 
-        'policy', 'consultation-paper', 'guidance', 'notice',
-        'amendment', 'circular', 'directive', 'order'
-    ]):
-        return 'Legislation'
-    
-    # Специфические ключевые слова AIFC
-    elif any(keyword in url_lower for keyword in [
-        'aifc-court-regulations', 'aifc-court-rules', 
-        'template-of-offering', 'afsa-policy'
-    ]):
-        return 'Legislation'
-    
-    else:
-        return 'Other_Documents'
+    return monitor_core.classify_url(url)
 
-def get_correct_path(url, base_dir):
-    """Получение правильного пути для файла"""
-    folder_name = classify_url(url)
-    
-    # Создаем основную структуру
-    correct_path = os.path.join(base_dir, 'AIFC_Court', folder_name)
-    
-    # Для решений судов создаем подпапки по годам
-    if folder_name == 'Judgments':
-        import re
-        year_match = re.search(r'20\d{2}', url)
-        if year_match:
-            year = year_match.group()
-            correct_path = os.path.join(correct_path, year)
-    
-    # Для законодательства создаем подпапки по типу
-    elif folder_name == 'Legislation':
-        url_lower = url.lower()
-        if 'consultation-paper' in url_lower:
-            correct_path = os.path.join(correct_path, 'Consultation_Papers')
-        elif 'guidance' in url_lower:
-            correct_path = os.path.join(correct_path, 'Guidance_Documents')
-        elif 'notice' in url_lower:
-            correct_path = os.path.join(correct_path, 'Notices')
-        elif 'template' in url_lower:
-            correct_path = os.path.join(correct_path, 'Templates')
-    
-    return correct_path
+def get_correct_path(url, base_dir, config=None):
+    """Получение правильного пути для файла (по правилам его источника)"""
+    config = config or monitor_core.load_config()
+    return get_registry(config).for_url(url).document_dir(url, base_dir)
 
-def reorganize_files():
+def reorganize_files(config_file=monitor_core.CONFIG_FILE):
     """Основная функция реорганизации файлов"""
     logger = setup_logging()
     
@@ -99,9 +44,10 @@ def reorganize_files():
     
     if not downloaded_files:
         logger.error("❌ Нет информации о скачанных файлах")
-        return
+        return None
     
-    base_dir = "aifc_documents"
+    config = monitor_core.load_config(config_file)
+    base_dir = config['download_dir']
     moved_count = 0
     error_count = 0
     already_correct_count = 0
@@ -118,7 +64,7 @@ def reorganize_files():
                 continue
             
             # Определяем правильный путь
-            correct_dir = get_correct_path(url, base_dir)
+            correct_dir = get_correct_path(url, base_dir, config)
             filename = os.path.basename(current_path)
             correct_path = os.path.join(correct_dir, filename)
             
@@ -179,11 +125,17 @@ def reorganize_files():
     cleanup_empty_directories(base_dir)
     
     logger.info("🎉 Реорганизация завершена!")
+    
+    return {
+        'moved': moved_count,
+        'already_correct': already_correct_count,
+        'errors': error_count,
+        'total': len(downloaded_files)
+    }
 
 def save_updated_database(downloaded_files):
     """Сохранение обновленной базы данных"""
-    with open('downloaded_files.json', 'w', encoding='utf-8') as f:
-        json.dump(downloaded_files, f, indent=2, ensure_ascii=False)
+    monitor_core.save_downloaded_history(downloaded_files)
 
 def cleanup_empty_directories(base_dir):
     """Удаление пустых папок"""
@@ -203,7 +155,7 @@ def cleanup_empty_directories(base_dir):
     except Exception as e:
         logger.warning(f"⚠️ Ошибка при очистке пустых папок: {e}")
 
-def preview_reorganization():
+def preview_reorganization(config_file=monitor_core.CONFIG_FILE):
     """Предварительный просмотр изменений без фактического перемещения"""
     logger = setup_logging()
     
@@ -212,9 +164,10 @@ def preview_reorganization():
     downloaded_files = load_downloaded_files()
     
     if not downloaded_files:
-        return
+        return []
     
-    base_dir = "aifc_documents"
+    config = monitor_core.load_config(config_file)
+    base_dir = config['download_dir']
     changes = []
     
     for url, file_info in downloaded_files.items():
@@ -223,7 +176,7 @@ def preview_reorganization():
         if not current_path:
             continue
         
-        correct_dir = get_correct_path(url, base_dir)
+        correct_dir = get_correct_path(url, base_dir, config)
         filename = os.path.basename(current_path)
         correct_path = os.path.join(correct_dir, filename)
         
@@ -254,6 +207,8 @@ def preview_reorganization():
                 logger.info(f"   ... и еще {len(files) - 5} файлов")
     else:
         logger.info("✅ Все файлы уже находятся в правильных папках!")
+    
+    return changes
 
 if __name__ == "__main__":
     print("🔧 Утилита реорганизации файлов AIFC Court")
@@ -0,0 +1,178 @@
+"""
+Быстрое извлечение ссылок на документы из HTML страниц-листингов.
+lxml, если установлен, иначе потоковый html.parser из стандартной библиотеки.
+Результаты кешируются по хешу содержимого страницы.
+"""
+
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlparse, quote
+
+DEFAULT_EXTENSIONS = ('.pdf', '.doc', '.docx', '.xls', '.xlsx', '.txt', '.zip', '.rar')
+
+# Признаки ссылок пагинации
+PAGINATION_PATH = re.compile(r'/page/\d+/?$', re.IGNORECASE)
+PAGINATION_TEXTS = {'next', 'prev', 'previous', '»', '«', '>', '<', 'далее', 'назад'}
+
+# Сколько страниц держать в кеше разобранных ссылок
+CACHE_SIZE = 256
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()  # Кеш общий для потоков источников
+_backend = None
+
+class _AnchorParser(HTMLParser):
+    """Потоковый сбор ссылок <a href> без построения дерева документа"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.anchors = []
+        self._text = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag != 'a':
+            return
+        href = dict(attrs).get('href')
+        if href:
+            self.anchors.append([href, ''])
+            self._text = []
+
+    def handle_data(self, data):
+        if self._text is not None:
+            self._text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == 'a' and self._text is not None:
+            self.anchors[-1][1] = ''.join(self._text).strip()
+            self._text = None
+
+def _iter_anchors_lxml(html):
+    import lxml.html
+    if isinstance(html, str):
+        html = html.encode('utf-8', 'surrogatepass')  # bytes допускают <?xml encoding?>
+    root = lxml.html.fromstring(html)
+    for element in root.iter('a'):
+        href = element.get('href')
+        if href:
+            yield href, element.text_content().strip()
+
+def _iter_anchors_stdlib(html):
+    parser = _AnchorParser()
+    parser.feed(html)
+    parser.close()
+    return parser.anchors
+
+def _get_backend():
+    """Выбор парсера при первом использовании"""
+    global _backend
+    if _backend is None:
+        try:
+            import lxml.html  # noqa: F401
+            _backend = _iter_anchors_lxml
+        except ImportError:
+            _backend = _iter_anchors_stdlib
+    return _backend
+
+def page_hash(html):
+    """Хеш содержимого страницы"""
+    if isinstance(html, str):
+        html = html.encode('utf-8', 'surrogatepass')
+    return hashlib.sha1(html).hexdigest()
+
+def iter_anchors(html):
+    """Все ссылки страницы: пары (href, текст)"""
+    if not html or not html.strip():
+        return []
+    return _get_backend()(html)
+
+# Символы, которые браузер (a.href) оставляет в пути и запросе как есть; готовые %XX не трогаются
+PATH_SAFE = "/%:@!$&'()*+,;=-._~"
+QUERY_SAFE = PATH_SAFE + "?"
+
+def normalize_link(url):
+    """
+    Нормализация ссылки для сравнения: регистр схемы и домена, без фрагмента,
+    путь и запрос закодированы так же, как их отдает браузер (пробел -> %20),
+    чтобы ключи совпадали с уже сохраненными в discovered_files.json
+    """
+    parsed = urlparse(url.strip())
+    return parsed._replace(
+        scheme=parsed.scheme.lower(),
+        netloc=parsed.netloc.lower(),
+        path=quote(parsed.path, safe=PATH_SAFE),
+        query=quote(parsed.query, safe=QUERY_SAFE),
+        fragment=''
+    ).geturl()
+
+def is_pagination_link(parsed_url, text):
+    """Ссылка на другую страницу того же листинга"""
+    query = parsed_url.query.lower()
+    return (
+        'page=' in query or
+        PAGINATION_PATH.search(parsed_url.path) is not None or
+        text.strip().lower() in PAGINATION_TEXTS
+    )
+
+def parse_listing(html, base_url, file_extensions=DEFAULT_EXTENSIONS):
+    """
+    Документы и ссылки пагинации за один проход по странице.
+    Повторный разбор той же страницы берется из кеша.
+    """
+    extensions = tuple(ext.lower() for ext in file_extensions)
+    key = (page_hash(html), base_url, extensions)
+
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+    if cached is not None:
+        documents, pagination = cached
+        return [dict(doc) for doc in documents], list(pagination)
+
+    base_netloc = urlparse(base_url).netloc.lower()
+    documents = []
+    pagination = []
+    seen = set()
+    for href, text in iter_anchors(html):
+        absolute_url = normalize_link(urljoin(base_url, href.strip()))
+        if absolute_url in seen:
+            continue
+        parsed = urlparse(absolute_url)
+        if parsed.scheme not in ('http', 'https'):
+            continue
+
+        if parsed.path.lower().endswith(extensions):
+            seen.add(absolute_url)
+            documents.append({'url': absolute_url, 'text': text})
+        elif parsed.netloc == base_netloc and is_pagination_link(parsed, text):
+            seen.add(absolute_url)
+            pagination.append(absolute_url)
+
+    with _cache_lock:
+        _cache[key] = (tuple(documents), tuple(pagination))
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+    return [dict(doc) for doc in documents], pagination
+
+def extract_document_links(html, base_url, file_extensions=DEFAULT_EXTENSIONS):
+    """Ссылки на документы с нужными расширениями за один проход по странице"""
+    return parse_listing(html, base_url, file_extensions)[0]
+
+def fingerprint_listing(document_urls, pagination_urls=()):
+    """Отпечаток листинга: хеш нормализованного набора ссылок и пагинации"""
+    fingerprint = hashlib.sha256()
+    for url in sorted({normalize_link(u) for u in document_urls}):
+        fingerprint.update(url.encode('utf-8') + b'\n')
+    fingerprint.update(b'--pagination--\n')
+    for url in sorted({normalize_link(u) for u in pagination_urls}):
+        fingerprint.update(url.encode('utf-8') + b'\n')
+    return fingerprint.hexdigest()
+
+def clear_cache():
+    """Очистка кеша разобранных страниц"""
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,103 @@
+"""
+Единая настройка логирования: запись в файл и на консоль идет в фоновом потоке
+(QueueHandler/QueueListener), файл может писаться в JSON со структурными полями
+url, stage, duration_ms, bytes.
+
+    logger.info("Скачан %s", name, extra=fields(url=url, stage='download', bytes=size))
+"""
+
+import copy
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Структурные поля, которые попадают в JSON-лог
+STRUCTURED_FIELDS = ('url', 'stage', 'duration_ms', 'bytes')
+
+_listener = None
+
+class JsonFormatter(logging.Formatter):
+    """Одна JSON-строка на запись"""
+
+    def format(self, record):
+        entry = {
+            'ts': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for name in STRUCTURED_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler, который не вклеивает трассировку в сообщение: она передается
+    слушателю в exc_text, и каждый обработчик форматирует ее сам (JSON - в поле exc)
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+def fields(**values):
+    """extra= для структурных полей (пустые пропускаются)"""
+    return {name: value for name, value in values.items() if value is not None}
+
+def setup_logging(log_file=None, level=None, log_format=None, console=True, config=None):
+    """
+    Настройка корневого логгера (повторные вызовы ничего не меняют, как basicConfig).
+    Уровень и формат файла по умолчанию берутся из уже загруженной конфигурации
+    config (log_level, log_format), без нее - INFO и text.
+    """
+    global _listener
+    root = logging.getLogger()
+    if _listener is not None or root.handlers:
+        return root
+
+    config = config or {}
+    level = level or config.get('log_level', 'INFO')
+    log_format = log_format or config.get('log_format', 'text')
+
+    handlers = []
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        handlers.append(console_handler)
+    if log_file:
+        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        file_handler.setFormatter(JsonFormatter() if log_format == 'json' else logging.Formatter(TEXT_FORMAT))
+        handlers.append(file_handler)
+
+    # Вызывающий поток только кладет запись в очередь, ввод-вывод - в потоке слушателя
+    log_queue = queue.SimpleQueue()
+    root.addHandler(_QueueHandler(log_queue))
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return root
+
+def shutdown_logging():
+    """Дописать очередь и остановить фоновый поток"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,181 @@
+"""
+Метрики монитора в текстовом формате Prometheus.
+Отдаются по HTTP на localhost (/metrics) при metrics_port > 0 или пишутся
+в файл для textfile-коллектора node_exporter при заданном metrics_textfile.
+Длительности и объемы берутся из замеров timing, результаты - из кодов методов скачивания.
+"""
+
+import os
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import timing
+import retry_policy
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Границы корзин гистограмм (секунды)
+DOWNLOAD_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+SAVE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    """Базовая метрика с метками"""
+
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, *labelvalues):
+        with self.lock:
+            self.values[labelvalues] = self.values.get(labelvalues, 0) + amount
+
+    def render(self):
+        with self.lock:
+            items = sorted(self.values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in items]
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value, *labelvalues):
+        with self.lock:
+            self.values[labelvalues] = value
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (float('inf'),)
+
+    def observe(self, value, *labelvalues):
+        with self.lock:
+            state = self.values.get(labelvalues)
+            if state is None:
+                state = self.values[labelvalues] = [[0] * len(self.buckets), 0.0, 0]
+            state[0][bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self):
+        lines = self.header()
+        with self.lock:
+            items = sorted((key, (list(state[0]), state[1], state[2])) for key, state in self.values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, [('le', _number(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+DOCUMENTS = Counter('aifc_documents_total', "Документы по результату обработки", ['result'])
+DOWNLOADED_BYTES = Counter('aifc_downloaded_bytes_total', "Скачано байт")
+DOWNLOAD_SECONDS = Histogram('aifc_download_duration_seconds', "Время обработки одного файла", DOWNLOAD_BUCKETS)
+STATE_SAVE_SECONDS = Histogram('aifc_state_save_duration_seconds', "Время сохранения JSON-состояния", SAVE_BUCKETS)
+QUEUE_DEPTH = Gauge('aifc_download_queue_depth', "Размер очереди скачивания при последнем планировании", ['lane'])
+BROWSER_RESTARTS = Counter('aifc_browser_restarts_total', "Перезапуски процесса браузера", ['reason'])
+
+REGISTRY = [DOCUMENTS, DOWNLOADED_BYTES, DOWNLOAD_SECONDS, STATE_SAVE_SECONDS, QUEUE_DEPTH, BROWSER_RESTARTS]
+
+def record_result(result):
+    """Учет кода результата метода скачивания: new, updated, unchanged, failed"""
+    DOCUMENTS.inc(1, result or 'failed')
+
+def observe_span(stage, seconds, nbytes, key):
+    """Замеры timing, которые попадают в метрики"""
+    if stage == timing.FILE_STAGE:
+        DOWNLOAD_SECONDS.observe(seconds)
+    elif stage == 'transfer':
+        DOWNLOADED_BYTES.inc(nbytes)
+    elif stage == 'state_save':
+        STATE_SAVE_SECONDS.observe(seconds)
+
+timing.run_profile.listeners.append(observe_span)
+
+def render_retry_metrics():
+    """Счетчики общей политики повторов (retry_policy.metrics)"""
+    snapshot = retry_policy.metrics.snapshot()
+    lines = ["# HELP aifc_retry_events_total События политики повторов",
+             "# TYPE aifc_retry_events_total counter"]
+    lines += [f'aifc_retry_events_total{{event="{event}"}} {count}' for event, count in sorted(snapshot['counters'].items())]
+    lines += ["# HELP aifc_retry_errors_total Ошибки по классам",
+              "# TYPE aifc_retry_errors_total counter"]
+    lines += [f'aifc_retry_errors_total{{class="{error_class}"}} {count}' for error_class, count in sorted(snapshot['errors'].items())]
+    lines += ["# HELP aifc_retry_sleep_seconds_total Суммарные паузы между попытками",
+              "# TYPE aifc_retry_sleep_seconds_total counter",
+              f"aifc_retry_sleep_seconds_total {snapshot['sleep_seconds']}"]
+    return lines
+
+def render():
+    """Все метрики в текстовом формате Prometheus"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    lines.extend(render_retry_metrics())
+    return '\n'.join(lines) + '\n'
+
+def write_textfile(path):
+    """Запись для textfile-коллектора (атомарно, чтобы коллектор не прочитал половину)"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(render())
+    os.replace(tmp_path, path)
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Опросы Prometheus не засоряют лог
+
+def start_http_server(port, host='127.0.0.1'):
+    """HTTP /metrics в фоновом потоке; возвращает сервер (server.shutdown() для остановки)"""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
+
+def export(config, logger=None):
+    """Запись textfile, если он задан в конфигурации"""
+    path = config.get('metrics_textfile')
+    if not path:
+        return
+    try:
+        write_textfile(path)
+    except OSError as e:
+        if logger:
+            logger.warning(f"⚠️ Не удалось записать метрики в {path}: {e}")
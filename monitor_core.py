@@ -0,0 +1,423 @@
+"""
+Легкое ядро монитора: конфигурация, классификация, пути и состояние.
+Без сетевых и браузерных зависимостей - подходит для офлайн-анализа и отчетов.
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse, unquote
+from datetime import datetime
+from settings import DEFAULT_CONFIG, CONFIG_FILE, load_settings  # DEFAULT_CONFIG - реэкспорт для внешних скриптов
+import timing
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DOWNLOADED_FILES = 'downloaded_files.json'
+DISCOVERED_FILES = 'discovered_files.json'
+FIRST_RUN_FILE = 'first_run_completed.json'
+FAILURE_LEDGER = 'failure_ledger.json'
+
+# Сколько ждать блокировку файла состояния, занятого другим процессом (сек)
+STATE_LOCK_TIMEOUT = 60
+
+JUDGMENT_KEYWORDS = [
+    'judgments', '/uploads/', 'case%20no', 'judgment',
+    'case_no', 'case-no', 'decision', 'ruling'
+]
+
+LEGISLATION_KEYWORDS = [
+    'legislation', '/legals/', 'regulations', 'rules',
+    'policy', 'consultation-paper', 'guidance', 'notice',
+    'amendment', 'circular', 'directive', 'order'
+]
+
+AIFC_LEGISLATION_KEYWORDS = [
+    'aifc-court-regulations', 'aifc-court-rules',
+    'template-of-offering', 'afsa-policy'
+]
+
+logger = logging.getLogger(__name__)
+
+class StateLockTimeout(TimeoutError):
+    """Файл состояния слишком долго заблокирован другим процессом"""
+
+def load_config(config_file=CONFIG_FILE):
+    """Загрузка проверенной неизменяемой конфигурации (из кеша, если файл не менялся)"""
+    return load_settings(config_file)
+
+def load_json_state(path, default):
+    """
+    Загрузка JSON-файла состояния без блокировки: файлы заменяются атомарно,
+    поэтому читатель всегда видит целостный снимок
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+@contextmanager
+def file_lock(path, timeout=STATE_LOCK_TIMEOUT):
+    """Межпроцессная блокировка записи файла состояния (файл path.lock)"""
+    deadline = time.monotonic() + timeout
+    with open(path + '.lock', 'a+b') as handle:
+        while True:
+            try:
+                if fcntl:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise StateLockTimeout(f"Файл {path} заблокирован другим процессом дольше {timeout} сек")
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+def _write_atomic(path, text):
+    """Запись через временный файл и os.replace: читатели не увидят половину файла"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    for attempt in range(20):
+        try:
+            os.replace(tmp_path, path)
+            return
+        except PermissionError:
+            # Windows не дает заменить файл, пока его читают
+            if attempt == 19:
+                raise
+            time.sleep(0.05)
+
+def _file_stamp(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+def save_json_state(path, data):
+    """Сохранение JSON-файла состояния целиком (атомарно, под блокировкой)"""
+    with timing.span('state_save'):
+        text = json.dumps(data, indent=2, ensure_ascii=False)
+        with file_lock(path):
+            _write_atomic(path, text)
+
+def merge_state(base, ours, theirs, depth=1):
+    """
+    Трехстороннее слияние: в версию с диска (theirs) переносятся только ключи,
+    которые этот процесс изменил или удалил относительно своего снимка (base).
+    depth - на сколько уровней вложенности сливать по ключам.
+    """
+    merged = dict(theirs)
+    for key in base.keys() - ours.keys():
+        merged.pop(key, None)
+    for key, value in ours.items():
+        if key in base and value == base[key]:
+            continue
+        if depth > 1 and isinstance(value, dict) and isinstance(base.get(key), dict) \
+                and isinstance(theirs.get(key), dict):
+            merged[key] = merge_state(base[key], value, theirs[key], depth - 1)
+        else:
+            merged[key] = value
+    return merged
+
+def _apply_in_place(target, merged, depth):
+    """Перенос результата слияния в словарь, на который ссылается монитор"""
+    for key in [key for key in target if key not in merged]:
+        del target[key]
+    for key, value in merged.items():
+        current = target.get(key)
+        if depth > 1 and isinstance(current, dict) and isinstance(value, dict):
+            _apply_in_place(current, value, depth - 1)
+        elif key not in target or current != value:
+            target[key] = value
+
+class StateDict(dict):
+    """Словарь состояния со снимком файла, из которого он загружен (база для слияния)"""
+
+    def __init__(self, data=(), base_text=None, stamp=None):
+        super().__init__(data)
+        self.base_text = base_text  # Текст файла на момент загрузки/последней записи этого словаря
+        self.stamp = stamp
+
+class StateFile:
+    """
+    Файл состояния с несколькими писателями: загруженный словарь помнит свой снимок,
+    при сохранении изменения этого словаря сливаются с тем, что за это время
+    записали другие процессы (smart_retry, анализатор, реорганизатор, монитор)
+    """
+
+    def __init__(self, path, depth=1):
+        self.path = path
+        self.depth = depth
+        self.lock = threading.Lock()
+
+    def load(self, default=None):
+        """StateDict со снимком файла; default (тоже со снимком), если файла нет"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                text = f.read()
+                stat = os.fstat(f.fileno())
+        except FileNotFoundError:
+            return None if default is None else StateDict(default)
+        return StateDict(json.loads(text), text, (stat.st_mtime_ns, stat.st_size, stat.st_ino))
+
+    def save(self, data):
+        """
+        Сохранение со слиянием; data дополняется изменениями других процессов.
+        Для словаря без снимка (не из load) чужие записи сохраняются, но удаления не переносятся.
+        """
+        base_text = getattr(data, 'base_text', None)
+        with timing.span('state_save'), self.lock:
+            with file_lock(self.path):
+                stamp = _file_stamp(self.path)
+                if stamp is not None and stamp != getattr(data, 'stamp', None):
+                    # Файл менялся другим процессом после снимка этого словаря
+                    theirs = load_json_state(self.path, {})
+                    base = json.loads(base_text) if base_text else {}
+                    _apply_in_place(data, merge_state(base, data, theirs, self.depth), self.depth)
+                    logger.debug(f"🔀 {self.path}: изменения другого процесса объединены")
+
+                text = json.dumps(data, indent=2, ensure_ascii=False)
+                _write_atomic(self.path, text)
+                if isinstance(data, StateDict):
+                    data.base_text = text
+                    data.stamp = _file_stamp(self.path)
+
+_state_files = {}
+_state_files_lock = threading.Lock()
+
+def state_file(path, depth=1):
+    """Общий на процесс StateFile для пути (одна блокировка на файл)"""
+    key = os.path.abspath(path)
+    with _state_files_lock:
+        if key not in _state_files:
+            _state_files[key] = StateFile(path, depth)
+        return _state_files[key]
+
+def downloaded_state():
+    return state_file(DOWNLOADED_FILES)
+
+def discovered_state():
+    # Слияние по ключам верхнего уровня и по URL внутри files/listings
+    return state_file(DISCOVERED_FILES, depth=2)
+
+def load_downloaded_history():
+    """Загрузка истории скачанных файлов"""
+    return downloaded_state().load({})
+
+def load_discovered_files():
+    """Загрузка списка всех обнаруженных файлов"""
+    return discovered_state().load({
+        'files': {},
+        'last_full_scan': None,
+        'initial_scan_completed': False,
+        'scan_start_date': datetime.now().isoformat()
+    })
+
+def save_downloaded_history(data):
+    """Сохранение истории скачанных файлов со слиянием чужих изменений"""
+    downloaded_state().save(data)
+
+def save_discovered_files(data):
+    """Сохранение списка обнаруженных файлов со слиянием чужих изменений"""
+    discovered_state().save(data)
+
+def is_first_run_completed():
+    """Проверка отметки о завершении первого запуска"""
+    return load_json_state(FIRST_RUN_FILE, {}).get('completed', False)
+
+def get_file_hash(filepath, chunk_size=65536):
+    """Получение MD5-хеша файла на диске (None, если файл не читается)"""
+    try:
+        file_hash = hashlib.md5()
+        with open(filepath, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                file_hash.update(chunk)
+        return file_hash.hexdigest()
+    except OSError:
+        return None
+
+def classify_url(url):
+    """Классификация URL для определения основной папки"""
+    url_lower = url.lower()
+
+    # Судебные решения и дела
+    if any(keyword in url_lower for keyword in JUDGMENT_KEYWORDS):
+        return 'Judgments'
+
+    # Законодательство и правила
+    if any(keyword in url_lower for keyword in LEGISLATION_KEYWORDS):
+        return 'Legislation'
+
+    # Специфические ключевые слова AIFC
+    if any(keyword in url_lower for keyword in AIFC_LEGISLATION_KEYWORDS):
+        return 'Legislation'
+
+    return 'Other_Documents'
+
+def get_document_dir(url, base_dir):
+    """Папка документа без обращения к файловой системе"""
+    folder_name = classify_url(url)
+    full_path = os.path.join(base_dir, 'AIFC_Court', folder_name)
+
+    # Для решений судов создаем подпапки по годам
+    if folder_name == 'Judgments':
+        year_match = re.search(r'20\d{2}', url)
+        if year_match:
+            full_path = os.path.join(full_path, year_match.group())
+
+    # Для законодательства создаем подпапки по типу
+    elif folder_name == 'Legislation':
+        url_lower = url.lower()
+        if 'consultation-paper' in url_lower:
+            full_path = os.path.join(full_path, 'Consultation_Papers')
+        elif 'guidance' in url_lower:
+            full_path = os.path.join(full_path, 'Guidance_Documents')
+        elif 'notice' in url_lower:
+            full_path = os.path.join(full_path, 'Notices')
+        elif 'template' in url_lower:
+            full_path = os.path.join(full_path, 'Templates')
+
+    return full_path
+
+def ensure_document_dir(url, base_dir, full_path=None):
+    """Создание папки документа с поддержкой длинных путей Windows"""
+    if full_path is None:
+        full_path = get_document_dir(url, base_dir)
+
+    # Включаем поддержку длинных путей в Windows
+    if os.name == 'nt':
+        if not full_path.startswith('\\\\?\\'):
+            full_path = '\\\\?\\' + os.path.abspath(full_path)
+
+    try:
+        os.makedirs(full_path, exist_ok=True)
+    except OSError as e:
+        if "path too long" in str(e).lower() or e.errno == 2:
+            # Fallback: создаем более короткий путь
+            logger.warning("⚠️ Путь слишком длинный, создаем сокращенную версию")
+            short_path = os.path.join(base_dir, 'AIFC_Court', classify_url(url)[:20])
+            os.makedirs(short_path, exist_ok=True)
+            return short_path
+        else:
+            raise
+
+    return full_path
+
+def get_clean_filename(url, max_length=150, content_disposition=None):
+    """Получение чистого имени файла с обработкой длинных имен"""
+    filename = None
+
+    if content_disposition:
+        filename_match = re.search(r'filename[*]?=["\']?([^"\';\r\n]+)', content_disposition)
+        if filename_match:
+            filename = filename_match.group(1).strip()
+            if filename:
+                filename = unquote(filename)
+    else:
+        parsed_url = urlparse(url)
+        filename = os.path.basename(unquote(parsed_url.path))
+
+    if 'court.aifc.kz' in url:
+        if filename:
+            filename = filename.replace('%20', ' ')
+            filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
+
+            if '.' not in filename and '/uploads/' in url:
+                filename += '.pdf'
+
+    # Обработка слишком длинных имен файлов
+    if filename and len(filename) > max_length:
+        name, ext = os.path.splitext(filename)
+
+        if len(name) > max_length - len(ext) - 10:  # Оставляем место для расширения и хеша
+            # Берем первые слова + хеш URL для уникальности
+            words = name.split('-')
+            short_name = '-'.join(words[:3])
+            url_hash = hashlib.md5(url.encode()).hexdigest()[:8]
+
+            available_length = max_length - len(ext) - len(url_hash) - 1
+            if len(short_name) > available_length:
+                short_name = short_name[:available_length]
+
+            filename = f"{short_name}_{url_hash}{ext}"
+            logger.debug(f"📝 Сокращено длинное имя файла: {name[:50]}... -> {filename}")
+
+    # Финальная проверка
+    if not filename or '.' not in filename:
+        url_hash = hashlib.md5(url.encode()).hexdigest()[:8]
+        if 'judgments' in url.lower():
+            filename = f"judgment_{url_hash}.pdf"
+        elif 'legislation' in url.lower() or 'legals' in url.lower():
+            filename = f"legislation_{url_hash}.pdf"
+        else:
+            filename = f"document_{url_hash}.pdf"
+
+    return filename
+
+def get_expected_path(url, config):
+    """Ожидаемый путь файла на диске (без создания папок) по правилам источника документа"""
+    from sources import get_registry
+    source = get_registry(config).for_url(url)
+    return os.path.join(
+        source.document_dir(url, config['download_dir']),
+        source.clean_filename(url, config.get('max_filename_length', 150))
+    )
+
+class DocumentState:
+    """Конфигурация и состояние монитора без сетевых компонентов"""
+
+    def __init__(self, config_file=CONFIG_FILE, config=None,
+                 downloaded_files=None, discovered_files=None):
+        self.config_file = config_file
+        self.config = config if config is not None else load_config(config_file)
+        self.downloaded_files = downloaded_files if downloaded_files is not None else load_downloaded_history()
+        self.discovered_files = discovered_files if discovered_files is not None else load_discovered_files()
+        # Общая блокировка состояния для потоков (несколько источников в одном процессе)
+        self.state_lock = threading.RLock()
+
+    def load_downloaded_history(self):
+        """Загрузка истории скачанных файлов"""
+        return load_downloaded_history()
+
+    def save_downloaded_history(self):
+        """Сохранение истории скачанных файлов"""
+        with self.state_lock:
+            save_downloaded_history(self.downloaded_files)
+
+    def load_discovered_files(self):
+        """Загрузка списка всех обнаруженных файлов"""
+        return load_discovered_files()
+
+    def save_discovered_files(self):
+        """Сохранение списка обнаруженных файлов"""
+        with self.state_lock:
+            save_discovered_files(self.discovered_files)
+
+    def get_expected_path(self, url):
+        """Ожидаемый путь файла на диске"""
+        return get_expected_path(url, self.config)
+
+    def apply_config(self, config):
+        """Применение перезагруженной конфигурации (пути и интервалы читаются из self.config)"""
+        self.config = config
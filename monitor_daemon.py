@@ -0,0 +1,120 @@
+"""
+Режим демона: один процесс ведет мониторинг непрерывно.
+Конфигурация, состояние, HTTP-сессия и браузер живут между циклами,
+сканирование и повторы запускаются по расписанию, состояние сохраняется после каждого задания.
+"""
+
+import time
+import signal
+import logging
+import threading
+
+from settings import ConfigWatcher
+import metrics
+
+class MonitorDaemon:
+    """Планировщик циклов мониторинга поверх одного экземпляра монитора"""
+
+    def __init__(self, monitor, logger=None, tick_seconds=30):
+        self.monitor = monitor
+        self.logger = logger or getattr(monitor, 'logger', None) or logging.getLogger(__name__)
+        self.tick_seconds = tick_seconds
+        self.watcher = ConfigWatcher(monitor.config_file, on_change=self.on_config_change, logger=self.logger)
+        self.scheduler = None
+        self.stop_event = threading.Event()
+        self.metrics_server = None
+        self.cycles = 0
+
+    def schedule_jobs(self):
+        """Расписание по текущей конфигурации (пересоздается при ее изменении)"""
+        import schedule
+
+        config = self.monitor.config
+        interval = config['check_interval_minutes']
+        variation = config['human_behavior'].get('interval_variation', 0)
+        low = max(int(interval * (1 - variation)), 1)
+        high = max(int(interval * (1 + variation)), low)
+
+        self.scheduler = schedule.Scheduler()
+        self.scheduler.every(low).to(high).minutes.do(self.run_job, self.scan_cycle)
+        self.scheduler.every(config['retry_interval_minutes']).minutes.do(self.run_job, self.retry_cycle)
+        self.logger.info(f"🗓️ Сканирование каждые {low}-{high} мин, повторы каждые {config['retry_interval_minutes']} мин")
+
+    def run_job(self, job):
+        """Выполнение задания: ошибка не останавливает демона, состояние сохраняется"""
+        started = time.monotonic()
+        try:
+            job()
+        except Exception as e:
+            self.logger.exception(f"❌ Ошибка задания {job.__name__}: {e}")
+        finally:
+            self.checkpoint()
+            self.logger.info(f"⏱️ {job.__name__} завершено за {time.monotonic() - started:.0f} сек")
+
+    def scan_cycle(self):
+        """Сканирование листингов, новые файлы и перепроверка по графику"""
+        self.cycles += 1
+        self.logger.info(f"🔁 Цикл мониторинга №{self.cycles}")
+        self.monitor.human_like_session(close_browser=False)
+
+    def retry_cycle(self):
+        """Повтор неудачных скачиваний, которым уже пора"""
+        self.monitor.retry_failed_downloads()
+
+    def checkpoint(self):
+        """Сохранение состояния и метрик на диск"""
+        self.monitor.save_downloaded_history()
+        self.monitor.save_discovered_files()
+        metrics.export(self.monitor.config, self.logger)
+
+    def start_metrics_server(self):
+        """HTTP /metrics на localhost, если задан metrics_port"""
+        port = self.monitor.config.get('metrics_port')
+        if not port:
+            return
+        try:
+            self.metrics_server = metrics.start_http_server(port)
+            self.logger.info(f"📈 Метрики: http://127.0.0.1:{port}/metrics")
+        except OSError as e:
+            self.logger.error(f"❌ Не удалось открыть порт метрик {port}: {e}")
+
+    def on_config_change(self, config):
+        self.monitor.apply_config(config)
+        self.schedule_jobs()
+
+    def stop(self, *args):
+        """Остановка после текущего задания"""
+        self.logger.info("🛑 Получен сигнал остановки")
+        self.stop_event.set()
+
+    def install_signal_handlers(self):
+        if threading.current_thread() is not threading.main_thread():
+            return
+        signal.signal(signal.SIGINT, self.stop)
+        if hasattr(signal, 'SIGTERM'):
+            signal.signal(signal.SIGTERM, self.stop)
+
+    def run(self, run_now=True):
+        """Главный цикл демона"""
+        self.install_signal_handlers()
+        self.schedule_jobs()
+        self.start_metrics_server()
+        self.logger.info("🤖 Демон мониторинга запущен")
+
+        try:
+            if run_now:
+                self.run_job(self.scan_cycle)
+
+            while not self.stop_event.is_set():
+                self.watcher.check()
+                self.scheduler.run_pending()
+
+                idle = self.scheduler.idle_seconds
+                wait = self.tick_seconds if idle is None else min(max(idle, 1), self.tick_seconds)
+                self.stop_event.wait(wait)
+        finally:
+            self.checkpoint()
+            self.monitor.close_browser_bot()
+            if self.metrics_server:
+                self.metrics_server.shutdown()
+            self.logger.info("👋 Демон мониторинга остановлен")
@@ -340,8 +340,8 @@ class ReportGenerator:
         
         print("=" * 80)
     
-    def generate_json_report(self, output_file="aifc_report.json"):
-        """Генерация JSON отчета"""
+    def build_report(self):
+        """Данные отчета в виде словаря"""
         downloaded_files, discovered_files, first_run_data = self.load_data()
         structure, total_disk_size, total_disk_files = self.analyze_file_structure()
         categories = self.categorize_documents(downloaded_files)
@@ -365,6 +365,12 @@ class ReportGenerator:
             'last_scan': discovered_files.get('last_full_scan')
         }
         
+        return report
+    
+    def generate_json_report(self, output_file="aifc_report.json"):
+        """Генерация JSON отчета"""
+        report = self.build_report()
+        
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(report, f, indent=2, ensure_ascii=False, default=str)
         
@@ -382,6 +388,6 @@ def main():
     print(f"\n💾 JSON отчет сохранен: {json_file}")
 
 if __name__ == "__main__":
-    import logging
-    logging.basicConfig(level=logging.INFO)
+    from logging_setup import setup_logging
+    setup_logging()
     main()
\ No newline at end of file
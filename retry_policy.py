@@ -0,0 +1,243 @@
+"""
+Единая политика повторов: классификация ошибок, пауза по классу ошибки
+с джиттером, общий дедлайн и счетчики.
+Неповторяемые ошибки (404 и прочие 4xx) завершаются сразу, без пауз.
+"""
+
+import time
+import socket
+import random
+import logging
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# Классы ошибок
+DNS = 'dns'
+CONNECT = 'connect'
+READ_TIMEOUT = 'read_timeout'
+HTTP_4XX = 'http_4xx'
+HTTP_5XX = 'http_5xx'
+RATE_LIMITED = 'rate_limited'
+TOO_SMALL = 'too_small'
+INVALID_CONTENT = 'invalid_content'
+BLOCKED = 'blocked'
+INTERNAL = 'internal'
+OTHER = 'other'
+
+# Класс ошибки -> (повторять ли, базовая пауза в секундах, максимальная пауза)
+CLASS_POLICIES = {
+    DNS: (True, 30, 300),
+    CONNECT: (True, 5, 60),
+    READ_TIMEOUT: (True, 10, 120),
+    HTTP_4XX: (False, 0, 0),
+    HTTP_5XX: (True, 10, 120),
+    RATE_LIMITED: (True, 60, 600),
+    TOO_SMALL: (True, 10, 60),
+    INVALID_CONTENT: (True, 10, 60),
+    BLOCKED: (True, 30, 300),
+    INTERNAL: (False, 0, 0),
+    OTHER: (True, 10, 60)
+}
+
+class ClassifiedError(Exception):
+    """Ошибка с заранее известным классом (для результатов без исключения)"""
+
+    def __init__(self, error_class, message='', http_status=None, retry_after=None, retryable=None):
+        super().__init__(message or error_class)
+        self.error_class = error_class
+        self.http_status = http_status
+        self.retry_after = retry_after
+        self.retryable = retryable
+
+class HTTPStatusError(ClassifiedError):
+    """Неуспешный HTTP-ответ"""
+
+    def __init__(self, response):
+        status = response.status_code
+        super().__init__(
+            classify_status(status),
+            f"HTTP {status}",
+            http_status=status,
+            retry_after=parse_retry_after(response.headers.get('Retry-After'))
+        )
+        self.response = response
+
+class ContentTooSmall(ClassifiedError):
+    """Ответ подозрительно мал для документа (часто страница-заглушка)"""
+
+    def __init__(self, size, minimum):
+        super().__init__(TOO_SMALL, f"Получено {size} байт (минимум {minimum})")
+        self.size = size
+
+class PageBlocked(ClassifiedError):
+    """Сайт показал страницу блокировки"""
+
+    def __init__(self, url):
+        super().__init__(BLOCKED, f"Страница блокировки: {url}")
+
+def parse_retry_after(value):
+    """Retry-After в секундах (число или HTTP-дата)"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
+    except (TypeError, ValueError):
+        return None
+
+def classify_status(status):
+    """Класс ошибки по HTTP-статусу"""
+    if status == 429:
+        return RATE_LIMITED
+    if status == 408:
+        return READ_TIMEOUT
+    if status >= 500:
+        return HTTP_5XX
+    return HTTP_4XX
+
+def get_http_status(error):
+    """HTTP-статус из исключения (requests кладет ответ в error.response)"""
+    status = getattr(error, 'http_status', None)
+    if status is not None:
+        return status
+    response = getattr(error, 'response', None)
+    return getattr(response, 'status_code', None)
+
+def classify_error(error):
+    """Класс ошибки для выбора паузы и решения о повторе"""
+    if isinstance(error, ClassifiedError):
+        return error.error_class
+
+    status = get_http_status(error)
+    if status is not None:
+        return classify_status(status)
+
+    # Ошибки в самой программе повтор не исправит
+    if isinstance(error, (ImportError, NameError, AttributeError, TypeError)):
+        return INTERNAL
+
+    name = type(error).__name__
+    text = str(error).lower()
+    if (isinstance(error, socket.gaierror) or 'NameResolution' in name or
+            'failed to resolve' in text or 'name or service not known' in text or 'getaddrinfo' in text):
+        return DNS
+    if 'ConnectTimeout' in name:
+        return CONNECT
+    if isinstance(error, (socket.timeout, TimeoutError)) or 'timeout' in name.lower():
+        return READ_TIMEOUT
+    if isinstance(error, ConnectionError) or 'connection' in name.lower():
+        return CONNECT
+    return OTHER
+
+def is_retryable(error):
+    """Имеет ли смысл повторять после этой ошибки"""
+    retryable = getattr(error, 'retryable', None)
+    if retryable is not None:
+        return retryable
+    return CLASS_POLICIES.get(classify_error(error), CLASS_POLICIES[OTHER])[0]
+
+class RetryMetrics:
+    """Счетчики попыток, повторов и пауз по классам ошибок"""
+
+    def __init__(self):
+        self.lock = threading.Lock()  # Политики работают из нескольких потоков
+        self.counters = Counter()
+        self.errors = Counter()
+        self.sleep_seconds = 0.0
+
+    def inc(self, name, value=1):
+        with self.lock:
+            self.counters[name] += value
+
+    def record_error(self, error_class):
+        with self.lock:
+            self.errors[error_class] += 1
+
+    def record_sleep(self, delay):
+        with self.lock:
+            self.counters['retries'] += 1
+            self.sleep_seconds += delay
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'counters': dict(self.counters),
+                'errors': dict(self.errors),
+                'sleep_seconds': round(self.sleep_seconds, 1)
+            }
+
+# Общие счетчики процесса
+metrics = RetryMetrics()
+
+class RetryPolicy:
+    """Повтор вызова с паузами по классу ошибки, джиттером и дедлайном"""
+
+    def __init__(self, max_attempts=3, deadline=None, policies=None, logger=None,
+                 on_retry=None, sleep=time.sleep, retry_metrics=None):
+        self.max_attempts = max(max_attempts, 1)
+        self.deadline = deadline  # Секунды на все попытки вместе с паузами
+        self.policies = dict(CLASS_POLICIES, **(policies or {}))
+        self.logger = logger or logging.getLogger(__name__)
+        self.on_retry = on_retry
+        self.sleep = sleep
+        self.metrics = retry_metrics or metrics
+
+    def get_delay(self, error, attempt):
+        """Пауза перед следующей попыткой (attempt - номер неудачной попытки)"""
+        error_class = classify_error(error)
+        _, base, maximum = self.policies.get(error_class, self.policies[OTHER])
+
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after is None:
+            response = getattr(error, 'response', None)
+            headers = getattr(response, 'headers', None) or {}
+            retry_after = parse_retry_after(headers.get('Retry-After'))
+        if retry_after is not None:
+            return max(retry_after, base) + random.uniform(0, 5)
+
+        # Экспоненциальная пауза с джиттером: половина фиксирована, половина случайна
+        delay = min(base * (2 ** (attempt - 1)), maximum)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def run(self, func, *args, description=None, **kwargs):
+        """Вызов func с повторами; последняя ошибка пробрасывается вызывающему"""
+        started = time.monotonic()
+        description = description or getattr(func, '__name__', 'операция')
+
+        for attempt in range(1, self.max_attempts + 1):
+            self.metrics.inc('attempts')
+            try:
+                result = func(*args, **kwargs)
+                self.metrics.inc('successes')
+                return result
+            except Exception as e:
+                error_class = classify_error(e)
+                self.metrics.record_error(error_class)
+
+                if not is_retryable(e):
+                    self.metrics.inc('not_retryable')
+                    self.logger.warning(f"⛔ {description}: {error_class} ({e}) - без повторов")
+                    raise
+
+                if attempt == self.max_attempts:
+                    self.metrics.inc('exhausted')
+                    raise
+
+                delay = self.get_delay(e, attempt)
+                if self.deadline is not None and time.monotonic() - started + delay > self.deadline:
+                    self.metrics.inc('deadline_exceeded')
+                    self.logger.warning(f"⌛ {description}: дедлайн {self.deadline} сек исчерпан")
+                    raise
+
+                self.logger.info(f"⏳ {description}: {error_class} на попытке {attempt}/{self.max_attempts}, "
+                                 f"пауза {delay:.1f} сек")
+                if self.on_retry:
+                    self.on_retry(e, attempt)
+                self.metrics.record_sleep(delay)
+                self.sleep(delay)
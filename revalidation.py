@@ -0,0 +1,70 @@
+"""
+Адаптивный график перепроверки скачанных документов.
+Статистика изменений хранится в записи downloaded_files.json:
+checks, changes, stable_checks, last_change, last_checked, next_check.
+Стабильные документы проверяются все реже (экспоненциально),
+часто меняющиеся - чаще.
+"""
+
+from datetime import datetime, timedelta
+
+DEFAULT_MIN_HOURS = 24
+DEFAULT_MAX_DAYS = 180
+
+def get_bounds(config=None):
+    """Минимальный и максимальный интервалы перепроверки из конфигурации"""
+    config = config or {}
+    min_interval = timedelta(hours=config.get('revalidation_min_hours', DEFAULT_MIN_HOURS))
+    max_interval = timedelta(days=config.get('revalidation_max_days', DEFAULT_MAX_DAYS))
+    return min_interval, max(max_interval, min_interval)
+
+def next_interval(record, config=None):
+    """Интервал до следующей проверки по истории изменений"""
+    min_interval, max_interval = get_bounds(config)
+
+    # Каждая проверка без изменений удваивает интервал
+    interval = min_interval * (2 ** min(record.get('stable_checks', 0), 16))
+
+    # Часто меняющиеся документы проверяем пропорционально чаще
+    checks = record.get('checks', 0)
+    if checks:
+        change_rate = record.get('changes', 0) / checks
+        interval = interval * (1 - change_rate)
+
+    return min(max(interval, min_interval), max_interval)
+
+def start_schedule(record, config=None, now=None):
+    """График для только что скачанного документа"""
+    now = now or datetime.now()
+    record.setdefault('checks', 0)
+    record.setdefault('changes', 0)
+    record.setdefault('stable_checks', 0)
+    record['last_checked'] = now.isoformat()
+    record['next_check'] = (now + next_interval(record, config)).isoformat()
+    return record
+
+def record_check(record, changed, config=None, now=None):
+    """Учет очередной проверки документа и расчет следующей"""
+    now = now or datetime.now()
+    record['checks'] = record.get('checks', 0) + 1
+
+    if changed:
+        record['changes'] = record.get('changes', 0) + 1
+        record['stable_checks'] = 0
+        record['last_change'] = now.isoformat()
+    else:
+        record['stable_checks'] = record.get('stable_checks', 0) + 1
+
+    record['last_checked'] = now.isoformat()
+    record['next_check'] = (now + next_interval(record, config)).isoformat()
+    return record
+
+def is_due(record, now=None):
+    """Пора ли перепроверить документ (записи без графика проверяются сразу)"""
+    next_check = (record or {}).get('next_check')
+    if not next_check:
+        return True
+    try:
+        return datetime.fromisoformat(next_check) <= (now or datetime.now())
+    except (TypeError, ValueError):
+        return True
@@ -9,15 +9,30 @@ import json
 import logging
 import hashlib
 import time
+import random
 import shutil
-import requests
 from datetime import datetime, timedelta
 from pathlib import Path
-from document_monitor import HumanLikeDocumentMonitor
+from monitor_core import DocumentState, ensure_document_dir, CONFIG_FILE
+from download_queue import build_download_queue
+from revalidation import start_schedule, record_check
+from failure_ledger import FailureLedger
+from retry_policy import RetryPolicy, ClassifiedError, HTTPStatusError
+from download_validator import download_to_part, commit_part
+from logging_setup import setup_logging, fields
+import timing
+import metrics
+import sampling_profiler
+from file_reconciler import reconcile_files, MISSING_COMPLETELY, MISSING_ON_DISK, OUTDATED_RECORDS
+
+# Сохранение состояния каждые N обработанных файлов
+SAVE_EVERY = 5
 
 class UnifiedAIFCMonitor:
-    def __init__(self):
-        self.monitor = HumanLikeDocumentMonitor()
+    def __init__(self, config_file=CONFIG_FILE):
+        self.state = DocumentState(config_file)
+        self.failure_ledger = FailureLedger(config=self.state.config)
+        self._monitor = None
         self.logger = self.setup_logging()
         self.session_report = {
             'start_time': datetime.now(),
@@ -31,74 +46,103 @@ class UnifiedAIFCMonitor:
             'errors': []
         }
         
+    @property
+    def monitor(self):
+        """Полный монитор (сеть, браузер) создается только при необходимости"""
+        if self._monitor is None:
+            from document_monitor import HumanLikeDocumentMonitor
+            self._monitor = HumanLikeDocumentMonitor(
+                self.state.config_file,
+                config=self.state.config,
+                downloaded_files=self.state.downloaded_files,
+                discovered_files=self.state.discovered_files,
+                failure_ledger=self.failure_ledger
+            )
+        return self._monitor
+    
+    def get_save_path(self, url):
+        """Путь сохранения файла (папка создается при необходимости)"""
+        expected_path = self.state.get_expected_path(url)
+        save_dir = ensure_document_dir(url, self.state.config['download_dir'], os.path.dirname(expected_path))
+        return os.path.join(save_dir, os.path.basename(expected_path))
+    
     def setup_logging(self):
-        """Настройка логирования"""
-        log_filename = f"aifc_monitor_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-        
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_filename, encoding='utf-8'),
-                logging.StreamHandler()
-            ]
-        )
+        """Настройка логирования (один файл на все запуски)"""
+        setup_logging('aifc_monitor.log', config=self.state.config)
         return logging.getLogger(__name__)
     
     def run_full_automation(self):
         """Полный автоматический цикл мониторинга"""
-        self.logger.info("🚀 АВТОМАТИЧЕСКИЙ МОНИТОРИНГ AIFC ДОКУМЕНТОВ")
-        self.logger.info("=" * 60)
-        self.logger.info(f"⏰ Начало сессии: {self.session_report['start_time'].strftime('%Y-%m-%d %H:%M:%S')}")
-        
-        try:
-            # Шаг 1: Анализ существующей базы данных
-            self.logger.info("\n📊 Шаг 1: Анализ существующей базы данных...")
-            local_status = self.analyze_local_database()
-            
-            # Шаг 2: Анализ файлов на диске и исправление записей
-            self.logger.info("\n🔍 Шаг 2: Анализ файлов на диске...")
-            file_status = self.analyze_and_fix_file_records()
-            
-            # Шаг 3: Определение файлов для скачивания
-            self.logger.info("\n🎯 Шаг 3: Определение файлов для скачивания...")
-            files_to_download = self.get_files_to_download()
-            
-            if not files_to_download:
-                self.logger.info("✅ Все файлы уже скачаны!")
-                # Но все равно проверим сайт на новые документы
-                self.logger.info("\n🌐 Проверяем сайт на новые документы...")
-                self.scan_website_for_updates()
-                files_to_download = self.get_files_to_download()
-            
-            # Шаг 4: Скачивание новых и недостающих файлов
-            if files_to_download:
-                self.logger.info(f"\n📥 Шаг 4: Скачивание {len(files_to_download)} файлов...")
-                download_results = self.download_files_smart(files_to_download)
-            else:
-                self.logger.info("\n✅ Скачивание не требуется - все файлы актуальны")
-                download_results = {'successful': 0, 'failed': 0}
-            
-            # Шаг 5: Организация файлов по папкам
-            self.logger.info("\n📁 Шаг 5: Организация файлов...")
-            self.organize_files_automatically()
+        with sampling_profiler.profiled('run_full_automation', self.state.config):
+            self.logger.info("🚀 АВТОМАТИЧЕСКИЙ МОНИТОРИНГ AIFC ДОКУМЕНТОВ")
+            self.logger.info("=" * 60)
+            self.logger.info(f"⏰ Начало сессии: {self.session_report['start_time'].strftime('%Y-%m-%d %H:%M:%S')}")
+            timing.run_profile.reset()
             
-            # Шаг 6: Генерация отчета
-            self.logger.info("\n📊 Шаг 6: Генерация отчета...")
-            final_report = self.generate_final_report()
-            
-            return final_report
+            try:
+                # Шаг 1: Анализ существующей базы данных
+                self.logger.info("\n📊 Шаг 1: Анализ существующей базы данных...")
+                with timing.span('step.database'):
+                    local_status = self.analyze_local_database()
+                
+                # Шаг 2: Анализ файлов на диске и исправление записей
+                self.logger.info("\n🔍 Шаг 2: Анализ файлов на диске...")
+                with timing.span('step.reconcile'):
+                    file_status = self.analyze_and_fix_file_records()
+                
+                # Шаг 3: Определение файлов для скачивания
+                self.logger.info("\n🎯 Шаг 3: Определение файлов для скачивания...")
+                with timing.span('step.plan'):
+                    files_to_download = self.get_files_to_download()
+                
+                if not files_to_download:
+                    self.logger.info("✅ Все файлы уже скачаны!")
+                    # Но все равно проверим сайт на новые документы
+                    self.logger.info("\n🌐 Проверяем сайт на новые документы...")
+                    with timing.span('step.discovery'):
+                        self.scan_website_for_updates()
+                        files_to_download = self.get_files_to_download()
+                
+                # Шаг 4: Скачивание новых и недостающих файлов
+                if files_to_download:
+                    self.logger.info(f"\n📥 Шаг 4: Скачивание {len(files_to_download)} файлов...")
+                    with timing.span('step.download'):
+                        download_results = self.download_files_smart(files_to_download)
+                else:
+                    self.logger.info("\n✅ Скачивание не требуется - все файлы актуальны")
+                    download_results = {'successful': 0, 'failed': 0}
+                
+                # Шаг 5: Организация файлов по папкам
+                self.logger.info("\n📁 Шаг 5: Организация файлов...")
+                with timing.span('step.organize'):
+                    self.organize_files_automatically()
+                
+                # Шаг 6: Генерация отчета
+                self.logger.info("\n📊 Шаг 6: Генерация отчета...")
+                with timing.span('step.report'):
+                    final_report = self.generate_final_report()
+                
+                return final_report
+                
+            except Exception as e:
+                self.logger.error(f"❌ Критическая ошибка: {e}")
+                self.session_report['errors'].append(f"Критическая ошибка: {e}")
+                return self.generate_error_report(e)
             
-        except Exception as e:
-            self.logger.error(f"❌ Критическая ошибка: {e}")
-            self.session_report['errors'].append(f"Критическая ошибка: {e}")
-            return self.generate_error_report(e)
+            finally:
+                self.close()
+    
+    def close(self):
+        """Закрытие браузера (он запускается не более одного раза за весь запуск) и запись метрик"""
+        if self._monitor is not None:
+            self._monitor.close_browser_bot()
+        metrics.export(self.state.config, self.logger)
     
     def analyze_local_database(self):
         """Анализ существующей локальной базы данных"""
         try:
-            discovered_files = self.monitor.load_discovered_files()
-            downloaded_files = self.monitor.load_downloaded_history()
+            discovered_files = self.state.discovered_files
+            downloaded_files = self.state.downloaded_files
             
             local_count = len(discovered_files.get('files', {}))
             downloaded_count = len(downloaded_files)
@@ -121,55 +165,43 @@ class UnifiedAIFCMonitor:
     def analyze_and_fix_file_records(self):
         """Анализ файлов на диске и исправление записей"""
         try:
-            discovered_files = self.monitor.discovered_files
-            downloaded_files = self.monitor.downloaded_files
+            discovered_files = self.state.discovered_files
+            downloaded_files = self.state.downloaded_files
             
             file_status = {
                 'missing_completely': [],
                 'missing_on_disk': [],
                 'outdated_records': [],
-                'correctly_tracked': []
+                'correctly_tracked': 0
             }
             
             fixed_records = 0
             
-            for url, file_info in discovered_files.get('files', {}).items():
-                # Определяем ожидаемый путь файла
-                expected_dir = self.monitor.create_aifc_directory_structure(url, self.monitor.config['download_dir'])
-                expected_filename = self.monitor.get_clean_filename(url)
-                expected_path = os.path.join(expected_dir, expected_filename)
+            for category, file_info in reconcile_files(discovered_files, downloaded_files,
+                                                       self.state.get_expected_path):
+                url = file_info['url']
                 
-                # Проверяем состояние файла
-                file_exists_on_disk = os.path.exists(expected_path)
-                is_in_download_records = url in downloaded_files
-                is_marked_downloaded = file_info.get('downloaded', False)
-                
-                if not file_exists_on_disk and not is_in_download_records:
-                    # Файл не скачан
-                    file_status['missing_completely'].append(url)
-                    
-                elif not file_exists_on_disk and is_in_download_records:
-                    # Файл потерян с диска
-                    file_status['missing_on_disk'].append(url)
-                    
-                elif file_exists_on_disk and not is_marked_downloaded:
+                if category == OUTDATED_RECORDS:
                     # Файл есть, но не помечен - исправляем
                     file_status['outdated_records'].append(url)
-                    self.fix_file_record(url, expected_path)
+                    self.fix_file_record(url, file_info['existing_path'])
                     fixed_records += 1
                     
+                elif category in (MISSING_COMPLETELY, MISSING_ON_DISK):
+                    file_status[category].append(url)
+                    
                 else:
-                    # Все правильно
-                    file_status['correctly_tracked'].append(url)
+                    # Все правильно - только считаем
+                    file_status['correctly_tracked'] += 1
             
-            self.logger.info(f"✅ Файлов отслеживается корректно: {len(file_status['correctly_tracked'])}")
+            self.logger.info(f"✅ Файлов отслеживается корректно: {file_status['correctly_tracked']}")
             self.logger.info(f"❌ Не скачано: {len(file_status['missing_completely'])}")
             self.logger.info(f"💾 Потеряно с диска: {len(file_status['missing_on_disk'])}")
             self.logger.info(f"🔧 Исправлено записей: {fixed_records}")
             
             if fixed_records > 0:
-                self.monitor.save_discovered_files()
-                self.monitor.save_downloaded_history()
+                self.state.save_discovered_files()
+                self.state.save_downloaded_history()
             
             return file_status
             
@@ -187,13 +219,13 @@ class UnifiedAIFCMonitor:
             file_size = os.path.getsize(file_path)
             
             # Обновляем discovered_files
-            if url in self.monitor.discovered_files['files']:
-                self.monitor.discovered_files['files'][url]['downloaded'] = True
-                self.monitor.discovered_files['files'][url]['last_downloaded'] = datetime.now().isoformat()
-                self.monitor.discovered_files['files'][url]['is_new'] = False
+            if url in self.state.discovered_files['files']:
+                self.state.discovered_files['files'][url]['downloaded'] = True
+                self.state.discovered_files['files'][url]['last_downloaded'] = datetime.now().isoformat()
+                self.state.discovered_files['files'][url]['is_new'] = False
             
             # Обновляем downloaded_files
-            self.monitor.downloaded_files[url] = {
+            self.state.downloaded_files[url] = {
                 'hash': file_hash,
                 'path': file_path,
                 'downloaded_at': datetime.now().isoformat(),
@@ -208,7 +240,11 @@ class UnifiedAIFCMonitor:
         """Получение списка файлов для скачивания"""
         files_to_download = []
         
-        for url, file_info in self.monitor.discovered_files.get('files', {}).items():
+        for url, file_info in self.state.discovered_files.get('files', {}).items():
+            # Документы, удаленные с сайта, не скачиваем
+            if file_info.get('removed_at'):
+                continue
+            
             is_downloaded = file_info.get('downloaded', False)
             
             if not is_downloaded:
@@ -216,12 +252,20 @@ class UnifiedAIFCMonitor:
                 continue
             
             # Проверяем существует ли файл на диске
-            if url in self.monitor.downloaded_files:
-                file_path = self.monitor.downloaded_files[url].get('path')
+            if url in self.state.downloaded_files:
+                file_path = self.state.downloaded_files[url].get('path')
                 if file_path and not os.path.exists(file_path):
                     files_to_download.append(url)
         
-        return files_to_download
+        # URL после недавних неудач ждут своего времени
+        files_to_download, deferred = self.failure_ledger.filter_eligible(files_to_download)
+        if deferred:
+            self.logger.info(f"⏸️ Отложено после неудач: {len(deferred)} файлов")
+        
+        # Сначала первые скачивания, затем перепроверка, внутри - по приоритету
+        queue = build_download_queue(files_to_download, self.state.discovered_files, self.state.downloaded_files,
+                                     self.failure_ledger.failure_counts())
+        return list(queue.drain())
     
     def scan_website_for_updates(self):
         """Быстрое сканирование сайта на обновления"""
@@ -233,7 +277,7 @@ class UnifiedAIFCMonitor:
                 '/en/practice-directions'
             ]
             
-            before_count = len(self.monitor.discovered_files.get('files', {}))
+            before_count = len(self.state.discovered_files.get('files', {}))
             
             for section in sections_to_scan:
                 self.logger.info(f"📄 Быстрое сканирование: {section}")
@@ -243,12 +287,12 @@ class UnifiedAIFCMonitor:
                 except Exception as e:
                     self.logger.warning(f"⚠️ Ошибка сканирования {section}: {e}")
             
-            after_count = len(self.monitor.discovered_files.get('files', {}))
+            after_count = len(self.state.discovered_files.get('files', {}))
             new_discoveries = after_count - before_count
             
             if new_discoveries > 0:
                 self.logger.info(f"🆕 Найдено новых файлов: {new_discoveries}")
-                self.monitor.save_discovered_files()
+                self.state.save_discovered_files()
             else:
                 self.logger.info("ℹ️ Новых файлов не найдено")
             
@@ -264,6 +308,7 @@ class UnifiedAIFCMonitor:
         failed_downloads = 0
         
         total_files = len(files_to_download)
+        processed = 0
         
         # Определяем размер пакета в зависимости от времени
         current_hour = datetime.now().hour
@@ -287,25 +332,30 @@ class UnifiedAIFCMonitor:
             
             for file_num, url in enumerate(batch, 1):
                 filename = os.path.basename(url)
-                self.logger.info(f"📥 [{file_num}/{len(batch)}] {filename}")
+                self.logger.debug("📥 [%d/%d] %s", file_num, len(batch), filename)
                 
                 try:
                     # Определяем путь сохранения
-                    save_dir = self.monitor.create_aifc_directory_structure(url, self.monitor.config['download_dir'])
-                    clean_filename = self.monitor.get_clean_filename(url)
-                    save_path = os.path.join(save_dir, clean_filename)
+                    save_path = self.get_save_path(url)
+                    clean_filename = os.path.basename(save_path)
                     
                     # Скачиваем файл
                     success = self.download_single_file_with_retry(url, save_path)
+                    processed += 1
+                    
+                    # Периодически сохраняем прогресс
+                    if processed % SAVE_EVERY == 0:
+                        self.state.save_downloaded_history()
+                        self.state.save_discovered_files()
                     
                     if success:
                         successful_downloads += 1
                         self.session_report['total_downloaded'] += 1
-                        self.logger.info(f"✅ Успешно: {clean_filename}")
+                        self.logger.info("✅ Успешно: %s", clean_filename, extra=fields(url=url, stage='download'))
                     else:
                         failed_downloads += 1
                         self.session_report['download_errors'] += 1
-                        self.logger.warning(f"❌ Неудача: {filename}")
+                        self.logger.warning("❌ Неудача: %s", filename, extra=fields(url=url, stage='download'))
                     
                     # Задержка между файлами
                     if file_num < len(batch):
@@ -314,7 +364,7 @@ class UnifiedAIFCMonitor:
                 except Exception as e:
                     failed_downloads += 1
                     self.session_report['download_errors'] += 1
-                    self.logger.error(f"❌ Ошибка {filename}: {e}")
+                    self.logger.error("❌ Ошибка %s: %s", filename, e, extra=fields(url=url, stage='download'))
             
             # Пауза между пакетами
             if batch_num < len(batches):
@@ -322,6 +372,9 @@ class UnifiedAIFCMonitor:
                 self.logger.info(f"😴 Пауза между пакетами: {pause_time:.0f} сек")
                 time.sleep(pause_time)
         
+        self.state.save_downloaded_history()
+        self.state.save_discovered_files()
+        
         self.logger.info(f"\n📊 ИТОГИ СКАЧИВАНИЯ:")
         self.logger.info(f"✅ Успешно: {successful_downloads}")
         self.logger.info(f"❌ Ошибок: {failed_downloads}")
@@ -329,104 +382,123 @@ class UnifiedAIFCMonitor:
         return {'successful': successful_downloads, 'failed': failed_downloads}
     
     def download_single_file_with_retry(self, url, save_path, max_retries=3):
-        """Скачивание одного файла с повторами"""
-        import random
+        """Скачивание одного файла с повторами по классу ошибки"""
+        import requests
         
-        for attempt in range(max_retries):
-            try:
-                if attempt > 0:
-                    retry_delay = [10, 30, 60][min(attempt-1, 2)] + random.uniform(-5, 15)
-                    self.logger.debug(f"⏳ Задержка перед повтором: {retry_delay:.1f} сек")
-                    time.sleep(retry_delay)
-                
-                # Метод 1: Прямое скачивание
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                    'Accept': 'application/pdf,application/octet-stream,*/*',
-                    'Accept-Language': 'en-US,en;q=0.9,ru;q=0.8',
-                    'Referer': 'https://court.aifc.kz/en/legislation'
-                }
-                
-                response = requests.get(url, headers=headers, timeout=30, stream=True)
-                
-                if response.status_code == 200:
-                    os.makedirs(os.path.dirname(save_path), exist_ok=True)
-                    
-                    with open(save_path, 'wb') as f:
-                        for chunk in response.iter_content(chunk_size=8192):
-                            if chunk:
-                                f.write(chunk)
-                    
-                    # Проверяем размер файла
-                    if os.path.getsize(save_path) > 1000:  # Больше 1KB
-                        self.update_file_records(url, save_path)
-                        return True
-                    else:
-                        os.remove(save_path)
-                        self.logger.warning(f"⚠️ Файл слишком мал: {url}")
-                
-                # Метод 2: Через браузерный бот
-                if hasattr(self.monitor, 'download_with_browser_bot'):
+        old_hash = self.state.downloaded_files.get(url, {}).get('hash')
+        
+        def attempt():
+            # Метод 1: Прямое скачивание
+            headers = {
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+                'Accept': 'application/pdf,application/octet-stream,*/*',
+                'Accept-Language': 'en-US,en;q=0.9,ru;q=0.8',
+                'Referer': 'https://court.aifc.kz/en/legislation'
+            }
+            
+            response = requests.get(url, headers=headers, timeout=30, stream=True)
+            
+            if response.status_code == 200:
+                # Тип, сигнатура, полнота и размер (больше 1KB) проверяются до записи на место
+                try:
+                    with timing.span('transfer', key=url) as transfer:
+                        part_path, file_hash, file_size = download_to_part(response, save_path, min_size=1000)
+                        transfer.bytes = file_size
+                    with timing.span('commit', key=url):
+                        commit_part(part_path, save_path)
+                    self.update_file_records(url, save_path, file_hash, file_size)
+                    self.failure_ledger.record_success(url)
+                    metrics.record_result('new' if not old_hash else 'unchanged' if old_hash == file_hash else 'updated')
+                    return True
+                except ClassifiedError as e:
+                    self.logger.warning("⚠️ Ответ не прошел проверку (%s): %s", e, url, extra=fields(url=url, stage='download'))
+                    error = e
+            else:
+                error = HTTPStatusError(response)
+            
+            # Метод 2: Через браузерный бот (записи о файле он обновляет сам,
+            # неудача учитывается в журнале один раз, когда политика сдастся)
+            if hasattr(self.monitor, 'download_with_browser_bot'):
+                with self.failure_ledger.suppress_failures():
                     result = self.monitor.download_with_browser_bot(url, save_path)
-                    if result in ['new', 'updated']:
-                        self.update_file_records(url, save_path)
-                        return True
-                
-            except Exception as e:
-                self.logger.debug(f"🔄 Попытка {attempt + 1} неудачна: {e}")
+                if result in ['new', 'updated']:
+                    metrics.record_result(result)
+                    return True
+            
+            raise error
         
-        return False
+        policy = RetryPolicy(
+            max_attempts=max_retries,
+            deadline=self.state.config.get('retry_deadline_seconds'),
+            logger=self.logger
+        )
+        try:
+            with timing.span(timing.FILE_STAGE, key=url):
+                return policy.run(attempt, description=os.path.basename(url))
+        except Exception as e:
+            self.failure_ledger.record_failure(url, e)
+            metrics.record_result('failed')
+            self.logger.debug("🔄 Скачивание не удалось: %s", e, extra=fields(url=url, stage='download'))
+            return False
     
-    def update_file_records(self, url, save_path):
-        """Обновление записей о скачанном файле"""
+    def update_file_records(self, url, save_path, file_hash=None, file_size=None):
+        """
+        Обновление записей о скачанном файле (хеш и размер считаются, если не переданы).
+        Записи сохраняются пакетно в download_files_smart.
+        """
         try:
-            with open(save_path, 'rb') as f:
-                file_hash = hashlib.md5(f.read()).hexdigest()
-            
-            file_size = os.path.getsize(save_path)
-            
-            # Обновляем downloaded_files
-            self.monitor.downloaded_files[url] = {
+            if file_hash is None:
+                with timing.span('hash', key=url):
+                    with open(save_path, 'rb') as f:
+                        file_hash = hashlib.md5(f.read()).hexdigest()
+            
+            if file_size is None:
+                file_size = os.path.getsize(save_path)
+            
+            # Обновляем downloaded_files (статистика изменений сохраняется)
+            record = self.state.downloaded_files.setdefault(url, {})
+            old_hash = record.get('hash')
+            record.update({
                 'hash': file_hash,
                 'path': save_path,
                 'downloaded_at': datetime.now().isoformat(),
                 'size': file_size,
                 'method': 'unified_monitor'
-            }
+            })
+            if old_hash:
+                # График сбрасывается только при изменении содержимого
+                record_check(record, changed=old_hash != file_hash, config=self.state.config)
+            else:
+                start_schedule(record, self.state.config)
             
             # Обновляем discovered_files
-            if url in self.monitor.discovered_files['files']:
-                self.monitor.discovered_files['files'][url]['downloaded'] = True
-                self.monitor.discovered_files['files'][url]['last_downloaded'] = datetime.now().isoformat()
-                self.monitor.discovered_files['files'][url]['is_new'] = False
-            
-            # Сохраняем
-            self.monitor.save_downloaded_history()
-            self.monitor.save_discovered_files()
+            if url in self.state.discovered_files['files']:
+                self.state.discovered_files['files'][url]['downloaded'] = True
+                self.state.discovered_files['files'][url]['last_downloaded'] = datetime.now().isoformat()
+                self.state.discovered_files['files'][url]['is_new'] = False
             
         except Exception as e:
-            self.logger.warning(f"⚠️ Ошибка обновления записей: {e}")
+            self.logger.warning("⚠️ Ошибка обновления записей: %s", e, extra=fields(url=url, stage='download'))
     
     def organize_files_automatically(self):
         """Автоматическая организация файлов по папкам"""
         try:
             moved_files = 0
             
-            for url, file_info in self.monitor.discovered_files.get('files', {}).items():
+            for url, file_info in self.state.discovered_files.get('files', {}).items():
                 if not file_info.get('downloaded', False):
                     continue
                 
-                if url not in self.monitor.downloaded_files:
+                if url not in self.state.downloaded_files:
                     continue
                 
-                current_path = self.monitor.downloaded_files[url].get('path')
+                current_path = self.state.downloaded_files[url].get('path')
                 if not current_path or not os.path.exists(current_path):
                     continue
                 
                 # Определяем правильный путь
-                correct_dir = self.monitor.create_aifc_directory_structure(url, self.monitor.config['download_dir'])
-                correct_filename = self.monitor.get_clean_filename(url)
-                correct_path = os.path.join(correct_dir, correct_filename)
+                correct_path = self.state.get_expected_path(url)
+                correct_dir = os.path.dirname(correct_path)
                 
                 # Если файл уже в правильном месте
                 if os.path.normpath(current_path) == os.path.normpath(correct_path):
@@ -438,15 +510,15 @@ class UnifiedAIFCMonitor:
                     shutil.move(current_path, correct_path)
                     
                     # Обновляем путь в базе
-                    self.monitor.downloaded_files[url]['path'] = correct_path
+                    self.state.downloaded_files[url]['path'] = correct_path
                     moved_files += 1
                     
                 except Exception as e:
-                    self.logger.warning(f"⚠️ Не удалось переместить {os.path.basename(current_path)}: {e}")
+                    self.logger.warning("⚠️ Не удалось переместить %s: %s", os.path.basename(current_path), e)
             
             if moved_files > 0:
                 self.logger.info(f"📁 Перемещено файлов: {moved_files}")
-                self.monitor.save_downloaded_history()
+                self.state.save_downloaded_history()
             else:
                 self.logger.info("📁 Все файлы уже организованы правильно")
             
@@ -461,7 +533,8 @@ class UnifiedAIFCMonitor:
         self.session_report.update({
             'end_time': end_time,
             'duration_seconds': duration.total_seconds(),
-            'duration_formatted': str(duration).split('.')[0]
+            'duration_formatted': str(duration).split('.')[0],
+            'profile': timing.run_profile.summary()
         })
         
         report = f"""
@@ -479,7 +552,7 @@ class UnifiedAIFCMonitor:
    ❌ Ошибок скачивания: {self.session_report['download_errors']}
 
 📁 РЕЗУЛЬТАТ:
-   ✅ Все файлы организованы в: {self.monitor.config['download_dir']}
+   ✅ Все файлы организованы в: {self.state.config['download_dir']}
    📋 Структура папок создана автоматически
    💾 База данных обновлена
 
@@ -490,6 +563,10 @@ class UnifiedAIFCMonitor:
             for i, error in enumerate(self.session_report['errors'], 1):
                 report += f"   {i}. {error}\n"
         
+        profile = timing.run_profile.format_summary()
+        if profile:
+            report += f"\n⏱️ ПРОФИЛЬ ЗАПУСКА:\n{profile}\n"
+        
         report += f"""
 {'=' * 60}
 🎉 МОНИТОРИНГ ЗАВЕРШЕН!
@@ -533,6 +610,15 @@ def main():
     """Главная функция"""
     show_banner()
     
+    if '--profile' in sys.argv:
+        sampling_profiler.enable()
+    
+    # Фоновый режим без вопросов
+    if '--daemon' in sys.argv:
+        from monitor_daemon import MonitorDaemon
+        MonitorDaemon(UnifiedAIFCMonitor().monitor).run()
+        return
+    
     print("\n🚀 РЕЖИМЫ РАБОТЫ:")
     print("1. Автоматический мониторинг (рекомендуется)")
     print("2. Быстрый анализ (без скачивания)")
@@ -606,5 +692,4 @@ def main():
         print("❌ Неверный выбор")
 
 if __name__ == "__main__":
-    import random  # Для задержек
     main()
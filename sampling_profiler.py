@@ -0,0 +1,130 @@
+"""
+Выборочный профилировщик для долгих запусков: фоновый поток периодически снимает
+стеки всех потоков (sys._current_frames) и в конце пишет их в свернутом формате
+flamegraph (flamegraph.pl, speedscope, inferno), плюс топ выделений памяти tracemalloc.
+
+Включается флагом profiling в конфигурации или ключом --profile в командной строке.
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+# Сколько строк в отчете tracemalloc
+TRACEMALLOC_TOP = 25
+
+logger = logging.getLogger(__name__)
+
+_forced = False
+_active = False
+
+def enable():
+    """Включить профилирование независимо от конфигурации (ключ --profile)"""
+    global _forced
+    _forced = True
+
+def is_enabled(config):
+    return _forced or bool(config.get('profiling'))
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+class SamplingProfiler:
+    """Снимок стеков всех потоков каждые interval секунд"""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def sample(self):
+        own_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            stack.append(names.get(thread_id, str(thread_id)))
+            self.stacks[';'.join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+
+    def write_collapsed(self, path):
+        """Строки 'поток;модуль:функция;... N' - вход для flamegraph.pl"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+def write_tracemalloc_report(snapshot, path, top=TRACEMALLOC_TOP):
+    """Топ мест выделения памяти по строкам кода"""
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ))
+    stats = snapshot.statistics('lineno')
+    total = sum(stat.size for stat in stats)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"Всего выделено (живые объекты): {total / 1048576:.1f} МБ\n\n")
+        for index, stat in enumerate(stats[:top], 1):
+            frame = stat.traceback[0]
+            f.write(f"{index:>3}. {frame.filename}:{frame.lineno}  "
+                    f"{stat.size / 1024:.1f} КБ в {stat.count} блоках\n")
+
+@contextmanager
+def profiled(name, config):
+    """Профилирование блока, если оно включено (вложенные блоки не профилируются повторно)"""
+    global _active
+    if _active or not is_enabled(config):
+        yield
+        return
+
+    output_dir = config.get('profiling_dir') or 'profiles'
+    os.makedirs(output_dir, exist_ok=True)
+    base = os.path.join(output_dir, f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+
+    _active = True
+    started_tracemalloc = not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start()
+    profiler = SamplingProfiler(config.get('profiling_interval_ms', 10) / 1000).start()
+    started = time.monotonic()
+    logger.info(f"🔬 Профилирование {name} включено")
+
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        snapshot = tracemalloc.take_snapshot()
+        if started_tracemalloc:
+            tracemalloc.stop()
+        _active = False
+
+        profiler.write_collapsed(base + '.collapsed')
+        write_tracemalloc_report(snapshot, base + '.tracemalloc.txt')
+        logger.info(f"🔬 Профиль {name}: {profiler.samples} выборок за {time.monotonic() - started:.0f} сек, "
+                    f"файлы {base}.collapsed и {base}.tracemalloc.txt")
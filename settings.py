@@ -0,0 +1,342 @@
+"""
+Конфигурация монитора: значения по умолчанию, проверка по схеме,
+неизменяемый объект настроек, кеш по времени изменения файла и
+наблюдатель для горячей перезагрузки в долгоживущем процессе.
+"""
+
+import os
+import json
+import logging
+import threading
+from collections.abc import Mapping
+
+CONFIG_FILE = 'monitor_config.json'
+
+DEFAULT_CONFIG = {
+    "urls": [
+        "https://court.aifc.kz/en/judgments",
+        "https://court.aifc.kz/en/legislation"
+    ],
+    "download_dir": "aifc_documents",
+    "check_interval_minutes": 120,
+    "retry_interval_minutes": 360,
+    "file_extensions": [".pdf", ".doc", ".docx", ".xls", ".xlsx", ".txt", ".zip", ".rar"],
+    "max_depth": 3,
+    "timeout": 30,
+    "browser_enabled": True,
+    "browser_headless": True,
+    "browser_fallback": True,
+    "browser_worker": True,
+    "browser_worker_call_timeout": 600,
+    "browser_worker_health_interval": 60,
+    "browser_worker_max_memory_mb": 1500,
+    "browser_worker_max_calls": 500,
+    "browser_session_ttl_minutes": 30,
+    "revalidation_min_hours": 24,
+    "revalidation_max_days": 180,
+    "failure_backoff_minutes": 30,
+    "failure_backoff_max_hours": 24,
+    "failure_breaker_threshold": 5,
+    "failure_park_days": 7,
+    "retry_deadline_seconds": 600,
+    "max_filename_length": 150,
+    "max_listing_pages": 20,
+    "log_level": "INFO",
+    "log_format": "text",
+    "metrics_port": 0,
+    "metrics_textfile": "",
+    "profiling": False,
+    "profiling_interval_ms": 10,
+    "profiling_dir": "profiles",
+    "court_requests_per_minute": 20,
+    "sources": [],
+    "work_queue_path": "work_queue.db",
+    "work_queue_lease_seconds": 300,
+    "work_queue_batch_size": 20,
+    "work_queue_max_attempts": 3,
+    "human_behavior": {
+        "browsing_probability": 0.7,
+        "min_session_time": 120,
+        "max_session_time": 600,
+        "pages_per_session": [3, 8],
+        "interval_variation": 0.3,
+        "short_break_probability": 0.05,
+        "long_break_probability": 0.05,
+        "mini_visit_probability": 0.001,
+        "initial_scan_days": 15,
+        "monitoring_cycle_days_min": 7,
+        "monitoring_cycle_days_max": 10,
+        "working_hours_start": 9,
+        "working_hours_end": 18,
+        "working_days": [0, 1, 2, 3, 4],
+        "first_run_always_download": True,
+        "initial_download_probability_min": 0.5,
+        "initial_download_probability_max": 0.8,
+        "monitoring_download_probability_min": 0.15,
+        "monitoring_download_probability_max": 0.45
+    }
+}
+
+# Параметры, которые должны быть строго положительными
+POSITIVE_KEYS = {
+    'check_interval_minutes', 'retry_interval_minutes', 'max_depth', 'timeout', 'max_filename_length',
+    'browser_worker_call_timeout', 'browser_worker_health_interval',
+    'browser_worker_max_memory_mb', 'browser_worker_max_calls', 'browser_session_ttl_minutes',
+    'revalidation_min_hours', 'revalidation_max_days',
+    'failure_backoff_minutes', 'failure_backoff_max_hours', 'failure_breaker_threshold',
+    'failure_park_days', 'retry_deadline_seconds', 'profiling_interval_ms', 'court_requests_per_minute',
+    'max_listing_pages', 'work_queue_lease_seconds', 'work_queue_batch_size', 'work_queue_max_attempts'
+}
+
+# Поля описания дополнительного источника документов (секция sources)
+SOURCE_FIELDS = {
+    'name', 'base_url', 'listing_urls', 'folder', 'categories', 'link_pattern',
+    'file_extensions', 'requests_per_minute', 'max_pages', 'use_browser'
+}
+
+TYPE_NAMES = {bool: 'true/false', int: 'число', float: 'число', str: 'строка', list: 'список', dict: 'объект'}
+
+logger = logging.getLogger(__name__)
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+class ConfigError(ValueError):
+    """Конфигурация не прошла проверку"""
+
+    def __init__(self, path, errors):
+        super().__init__(f"Ошибки в {path}: " + '; '.join(errors))
+        self.path = path
+        self.errors = errors
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return Settings(value)
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def _thaw(value):
+    if isinstance(value, Settings):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+class Settings(Mapping):
+    """Неизменяемая конфигурация: config['key'], config.get('key') и config.key"""
+
+    __slots__ = ('_data',)
+
+    def __init__(self, data):
+        object.__setattr__(self, '_data', {key: _freeze(value) for key, value in data.items()})
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __getattr__(self, name):
+        try:
+            return self._data[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        raise TypeError("Конфигурация неизменяема")
+
+    def __repr__(self):
+        return f"Settings({self._data!r})"
+
+    def to_dict(self):
+        """Изменяемая копия (для сохранения в JSON)"""
+        return _thaw(self)
+
+def _type_matches(value, default):
+    if isinstance(default, bool):
+        return isinstance(value, bool)
+    if isinstance(default, (int, float)):
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    return isinstance(value, type(default))
+
+def validate_config(data, defaults=DEFAULT_CONFIG, prefix=''):
+    """Список ошибок конфигурации (пустой, если все в порядке)"""
+    errors = []
+    for key, default in defaults.items():
+        if key not in data:
+            continue
+        value = data[key]
+        name = prefix + key
+
+        if not _type_matches(value, default):
+            errors.append(f"{name}: ожидается {TYPE_NAMES.get(type(default), type(default).__name__)}, "
+                          f"получено {type(value).__name__}")
+            continue
+
+        if isinstance(default, dict):
+            errors.extend(validate_config(value, default, name + '.'))
+        elif key in POSITIVE_KEYS and value <= 0:
+            errors.append(f"{name}: должно быть больше 0")
+        elif 'probability' in key and not 0 <= value <= 1:
+            errors.append(f"{name}: вероятность должна быть от 0 до 1")
+
+    if not prefix:
+        for url in data.get('urls', []):
+            if not isinstance(url, str) or not url.startswith(('http://', 'https://')):
+                errors.append(f"urls: некорректный адрес {url!r}")
+        if data.get('log_format', 'text') not in ('text', 'json'):
+            errors.append("log_format: допустимо text или json")
+        if data.get('log_level', 'INFO') not in ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'):
+            errors.append("log_level: допустимо DEBUG, INFO, WARNING, ERROR или CRITICAL")
+        port = data.get('metrics_port', 0)
+        if isinstance(port, int) and not 0 <= port <= 65535:
+            errors.append("metrics_port: порт от 1 до 65535 (0 - выключено)")
+        for ext in data.get('file_extensions', []):
+            if not isinstance(ext, str) or not ext.startswith('.'):
+                errors.append(f"file_extensions: расширение должно начинаться с точки: {ext!r}")
+        names = ['aifc_court']
+        for index, source in enumerate(data.get('sources', [])):
+            errors.extend(validate_source(source, f"sources[{index}]"))
+            if isinstance(source, dict):
+                if source.get('name') in names:
+                    errors.append(f"sources[{index}].name: имя {source.get('name')!r} уже занято")
+                names.append(source.get('name'))
+
+    return errors
+
+def validate_source(source, name):
+    """Ошибки описания одного источника документов"""
+    if not isinstance(source, dict):
+        return [f"{name}: ожидается объект"]
+    errors = [f"{name}.{key}: неизвестное поле" for key in sorted(set(source) - SOURCE_FIELDS)]
+    if not isinstance(source.get('name'), str) or not source.get('name'):
+        errors.append(f"{name}.name: нужно непустое имя")
+    if not isinstance(source.get('base_url'), str) or not source['base_url'].startswith(('http://', 'https://')):
+        errors.append(f"{name}.base_url: некорректный адрес {source.get('base_url')!r}")
+    listing_urls = source.get('listing_urls')
+    if not isinstance(listing_urls, list) or not all(
+            isinstance(url, str) and url.startswith(('http://', 'https://')) for url in listing_urls):
+        errors.append(f"{name}.listing_urls: нужен список адресов")
+    categories = source.get('categories', {})
+    if not isinstance(categories, dict) or not all(
+            isinstance(keywords, list) and all(isinstance(keyword, str) for keyword in keywords)
+            for keywords in categories.values()):
+        errors.append(f"{name}.categories: нужен объект папка -> список ключевых слов")
+    rate = source.get('requests_per_minute', 1)
+    if not isinstance(rate, (int, float)) or isinstance(rate, bool) or rate <= 0:
+        errors.append(f"{name}.requests_per_minute: должно быть больше 0")
+    return errors
+
+def merge_defaults(data, defaults=DEFAULT_CONFIG):
+    """Подстановка значений по умолчанию (включая вложенные разделы)"""
+    merged = dict(data)
+    for key, default in defaults.items():
+        if key not in merged:
+            merged[key] = json.loads(json.dumps(default))
+        elif isinstance(default, dict) and isinstance(merged[key], dict):
+            merged[key] = merge_defaults(merged[key], default)
+    return merged
+
+def _file_stamp(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+def parse_settings(path):
+    """Чтение, проверка и заморозка конфигурации без кеша"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ConfigError(path, ["корень конфигурации должен быть объектом"])
+
+    errors = validate_config(data)
+    if errors:
+        raise ConfigError(path, errors)
+
+    unknown = sorted(set(data) - set(DEFAULT_CONFIG))
+    if unknown:
+        logger.debug(f"Неизвестные параметры конфигурации: {', '.join(unknown)}")
+
+    return Settings(merge_defaults(data))
+
+def load_settings(path=CONFIG_FILE):
+    """Конфигурация из файла; повторные вызовы не перечитывают неизмененный файл"""
+    key = os.path.abspath(path)
+    try:
+        stamp = _file_stamp(path)
+    except FileNotFoundError:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(DEFAULT_CONFIG, f, indent=4, ensure_ascii=False)
+        print(f"Создан файл конфигурации: {path}")
+        stamp = _file_stamp(path)
+
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached and cached[0] == stamp:
+            return cached[1]
+
+        settings = parse_settings(path)
+        _cache[key] = (stamp, settings)
+        return settings
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+class ConfigWatcher:
+    """Отслеживание изменений файла конфигурации для горячей перезагрузки"""
+
+    def __init__(self, path=CONFIG_FILE, on_change=None, interval=5, logger=None):
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self.logger = logger or logging.getLogger(__name__)
+        self.current = load_settings(path)
+        self.failed_stamp = None  # Версия файла, ошибка которой уже записана в лог
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check(self):
+        """Перечитать файл, если он изменился; возвращает новую конфигурацию или None"""
+        try:
+            settings = load_settings(self.path)
+        except (OSError, ValueError) as e:
+            # Ошибочная правка не должна ронять работающий процесс; сообщаем один раз на версию файла
+            try:
+                stamp = _file_stamp(self.path)
+            except OSError:
+                stamp = 'missing'
+            if stamp != self.failed_stamp:
+                self.failed_stamp = stamp
+                self.logger.error(f"⚙️ Конфигурация не применена, остается прежняя: {e}")
+            return None
+
+        self.failed_stamp = None
+        if settings is self.current:
+            return None
+
+        self.current = settings
+        self.logger.info(f"⚙️ Конфигурация перезагружена: {self.path}")
+        if self.on_change:
+            self.on_change(settings)
+        return settings
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self):
+        """Фоновая проверка файла каждые interval секунд"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='config-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.interval + 1)
+            self._thread = None
@@ -3,44 +3,39 @@
 """
 
 import os
-import json
 import logging
+import logging_setup
 import time
 import random
 from datetime import datetime
-from document_monitor import HumanLikeDocumentMonitor
+import monitor_core
+from failure_ledger import FailureLedger
+from retry_policy import RetryPolicy, ClassifiedError, OTHER
+import metrics
 
 def setup_logging():
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler('smart_retry_downloads.log', encoding='utf-8'),
-            logging.StreamHandler()
-        ]
-    )
+    logging_setup.setup_logging('smart_retry_downloads.log')
     return logging.getLogger(__name__)
 
-def smart_retry_with_anti_blocking():
+def smart_retry_with_anti_blocking(config_file=monitor_core.CONFIG_FILE):
     """Умное повторное скачивание с защитой от блокировок"""
     logger = setup_logging()
     
     logger.info("🛡️ Умное повторное скачивание с защитой от блокировок")
     logger.info("=" * 60)
     
-    # Находим неудачные файлы
-    try:
-        with open('discovered_files.json', 'r', encoding='utf-8') as f:
-            discovered_data = json.load(f)
-        
-        with open('downloaded_files.json', 'r', encoding='utf-8') as f:
-            downloaded_data = json.load(f)
-    except FileNotFoundError as e:
-        logger.error(f"❌ Файл не найден: {e}")
+    # Находим неудачные файлы (без запуска полного монитора)
+    discovered_data = monitor_core.discovered_state().load()
+    downloaded_data = monitor_core.downloaded_state().load()
+    if discovered_data is None or downloaded_data is None:
+        logger.error("❌ Файлы состояния не найдены")
         return
     
     failed_files = []
     for url, file_info in discovered_data.get('files', {}).items():
+        if file_info.get('removed_at'):
+            continue  # Документ удален с сайта
+        
         is_downloaded = file_info.get('downloaded', False)
         is_in_downloads = url in downloaded_data
         
@@ -53,7 +48,16 @@ def smart_retry_with_anti_blocking():
     
     if not failed_files:
         logger.info("✅ Нет файлов для повторного скачивания!")
-        return
+        return {'total': 0, 'success': 0, 'errors': 0, 'deferred': 0}
+    
+    # Тратим время только на URL, которые сейчас могут скачаться
+    failure_ledger = FailureLedger(config=monitor_core.load_config(config_file))
+    failed_files, deferred = failure_ledger.filter_eligible(failed_files)
+    if deferred:
+        logger.info(f"⏸️ Отложено после прошлых неудач: {len(deferred)} файлов")
+    if not failed_files:
+        logger.info("✅ Нет файлов, доступных для повтора сейчас")
+        return {'total': 0, 'success': 0, 'errors': 0, 'deferred': len(deferred)}
     
     logger.info(f"📊 Найдено неудачных файлов: {len(failed_files)}")
     
@@ -84,17 +88,15 @@ def smart_retry_with_anti_blocking():
     batches = [failed_files[i:i + batch_size] for i in range(0, len(failed_files), batch_size)]
     logger.info(f"📦 Разбито на {len(batches)} пакетов по {batch_size} файлов")
     
-    # Инициализируем монитор
+    # Инициализируем монитор только когда есть что скачивать
     try:
-        monitor = HumanLikeDocumentMonitor()
-        # Переключаем на улучшенный браузерный бот, если доступен
-        try:
-            from enhanced_browser_bot import SuperHumanBrowserBot
-            monitor.browser_bot = None  # Сбрасываем старый бот
-            logger.info("🚀 Используем улучшенный браузерный бот")
-        except ImportError:
-            logger.info("⚠️ Используем стандартный браузерный бот")
-            
+        from document_monitor import HumanLikeDocumentMonitor
+        monitor = HumanLikeDocumentMonitor(
+            config_file,
+            downloaded_files=downloaded_data,
+            discovered_files=discovered_data,
+            failure_ledger=failure_ledger
+        )
     except Exception as e:
         logger.error(f"❌ Не удалось инициализировать монитор: {e}")
         return
@@ -128,7 +130,7 @@ def smart_retry_with_anti_blocking():
         
         for file_num, url in enumerate(batch, 1):
             filename = os.path.basename(url)
-            logger.info(f"📥 [{file_num}/{len(batch)}] {filename}")
+            logger.debug("📥 [%d/%d] %s", file_num, len(batch), filename)
             
             try:
                 # Умная задержка перед каждым файлом
@@ -140,7 +142,7 @@ def smart_retry_with_anti_blocking():
                         base_delay *= 2
                         logger.info("⚠️ Много ошибок - увеличиваем задержку")
                     
-                    logger.info(f"⏱️ Задержка: {base_delay:.1f} сек")
+                    logger.debug("⏱️ Задержка: %.1f сек", base_delay)
                     time.sleep(base_delay)
                 
                 # Создаем путь для сохранения
@@ -161,17 +163,17 @@ def smart_retry_with_anti_blocking():
                         monitor.discovered_files['files'][url]['last_downloaded'] = datetime.now().isoformat()
                         monitor.discovered_files['files'][url]['is_new'] = False
                     
-                    logger.info(f"✅ Успешно скачан: {filename_clean}")
+                    logger.info("✅ Успешно скачан: %s", filename_clean, extra=logging_setup.fields(url=url, stage='retry'))
                 else:
                     total_errors += 1
-                    logger.warning(f"❌ Не удалось скачать: {filename}")
+                    logger.warning("❌ Не удалось скачать: %s", filename, extra=logging_setup.fields(url=url, stage='retry'))
                 
                 # Сохраняем прогресс
                 monitor.save_downloaded_history()
                 monitor.save_discovered_files()
                 
             except Exception as e:
-                logger.error(f"❌ Ошибка при обработке {url}: {e}")
+                logger.error("❌ Ошибка при обработке %s: %s", url, e, extra=logging_setup.fields(url=url, stage='retry'))
                 total_errors += 1
         
         # Статистика пакета
@@ -184,11 +186,10 @@ def smart_retry_with_anti_blocking():
             logger.info(f"😴 Пауза между пакетами: {pause_time:.0f} сек")
             time.sleep(pause_time)
             
-            # Сброс браузерной сессии для следующего пакета
+            # Сброс браузерной сессии для следующего пакета (без перезапуска Chrome)
             if monitor.browser_bot:
                 try:
-                    monitor.browser_bot.close()
-                    monitor.browser_bot = None
+                    monitor.browser_bot.reset_session()
                     logger.info("🔄 Браузерная сессия сброшена")
                 except Exception as e:
                     logger.warning(f"⚠️ Ошибка сброса сессии: {e}")
@@ -205,52 +206,51 @@ def smart_retry_with_anti_blocking():
     logger.info(f"📈 Успешность: {final_success_rate:.1%}")
     
     # Закрываем браузер
-    if monitor.browser_bot:
-        try:
-            monitor.browser_bot.close()
-        except:
-            pass
+    monitor.close_browser_bot()
     
     if total_success > 0:
         logger.info("🎉 Умное скачивание завершено успешно!")
     else:
         logger.info("😞 Файлы все еще не удается скачать. Возможно, они недоступны на сайте.")
+    
+    metrics.export(monitor.config, logger)
+    return {'total': total_files, 'success': total_success, 'errors': total_errors, 'deferred': len(deferred)}
 
 def smart_download_with_retries(monitor, url, save_path, logger, max_retries=3):
-    """Умное скачивание с продвинутыми повторами"""
+    """Умное скачивание с повторами по классу ошибки"""
     
-    for attempt in range(max_retries):
-        try:
-            logger.debug(f"🔄 Попытка {attempt + 1}/{max_retries}: {os.path.basename(url)}")
-            
-            # Увеличивающиеся задержки
-            if attempt > 0:
-                retry_delay = [10, 30, 60][min(attempt-1, 2)]
-                jitter = random.uniform(-5, 15)
-                total_delay = retry_delay + jitter
-                
-                logger.info(f"⏳ Задержка перед повтором: {total_delay:.1f} сек")
-                time.sleep(total_delay)
-            
-            # Пытаемся скачать
-            result = monitor.download_with_browser_bot(url, save_path)
-            
-            if result in ["new", "updated"]:
-                return True
-            elif result == "unchanged":
-                logger.info("ℹ️ Файл уже существует и не изменился")
-                return True
-                
-        except Exception as e:
-            logger.warning(f"⚠️ Ошибка на попытке {attempt + 1}: {e}")
-            
-            # При ошибке делаем дополнительную паузу
-            if attempt < max_retries - 1:
-                error_delay = random.uniform(20, 60)
-                logger.info(f"😴 Пауза после ошибки: {error_delay:.1f} сек")
-                time.sleep(error_delay)
+    def attempt():
+        result = monitor.download_with_browser_bot(url, save_path)
+        
+        if result in ["new", "updated"]:
+            metrics.record_result(result)
+            return True
+        elif result == "unchanged":
+            metrics.record_result(result)
+            logger.info("ℹ️ Файл уже существует и не изменился")
+            return True
+        
+        # Класс ошибки берем из журнала неудач, который ведет монитор
+        entry = monitor.failure_ledger.entries.get(url, {})
+        raise ClassifiedError(
+            entry.get('error_class', OTHER),
+            entry.get('message') or '',
+            http_status=entry.get('http_status'),
+            # Выключатель сработал - дальше не пытаемся
+            retryable=False if monitor.failure_ledger.is_parked(url) else None
+        )
     
-    return False
+    policy = RetryPolicy(
+        max_attempts=max_retries,
+        deadline=monitor.config.get('retry_deadline_seconds'),
+        logger=logger
+    )
+    try:
+        return policy.run(attempt, description=os.path.basename(url))
+    except Exception as e:
+        metrics.record_result('failed')
+        logger.warning("⚠️ Скачивание не удалось: %s", e, extra=logging_setup.fields(url=url, stage='retry'))
+        return False
 
 if __name__ == "__main__":
     print("🛡️ Умное повторное скачивание с защитой от блокировок")
@@ -0,0 +1,246 @@
+"""
+Реестр источников документов: у каждого источника свои листинги, правила ссылок,
+классификация по папкам и бюджет запросов. Суд МФЦА - встроенный источник,
+остальные описываются в конфигурации (секция sources).
+MultiSourceEngine обходит источники параллельно в одном процессе с общей
+HTTP-сессией, состоянием и кешами.
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import monitor_core
+import metrics
+import timing
+
+COURT_SOURCE = 'aifc_court'
+SAVE_EVERY = 5  # Сохранять состояние каждые N обработанных файлов (по всем источникам)
+
+class RateBudget:
+    """Бюджет запросов источника: не больше requests_per_minute, равномерно"""
+
+    def __init__(self, requests_per_minute):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0
+        self.lock = threading.Lock()
+        self.next_slot = 0.0
+
+    def acquire(self):
+        """Ожидание своего слота (потокобезопасно, ожидание вне блокировки)"""
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+class Source:
+    """Источник документов, описанный в конфигурации"""
+
+    def __init__(self, name, base_url, listing_urls=(), folder=None, categories=None, link_pattern=None,
+                 file_extensions=None, requests_per_minute=30, max_pages=20, use_browser=False):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.netloc = urlparse(base_url).netloc.lower()
+        self.listing_urls = list(listing_urls)
+        self.folder = folder or name
+        self.categories = dict(categories or {})  # Папка -> ключевые слова, по порядку проверки
+        self.link_pattern = re.compile(link_pattern, re.IGNORECASE) if link_pattern else None
+        self.file_extensions = tuple(file_extensions) if file_extensions else None
+        self.budget = RateBudget(requests_per_minute)
+        self.max_pages = max_pages
+        self.use_browser = use_browser
+
+    def __repr__(self):
+        return f"Source({self.name!r}, {self.base_url!r})"
+
+    def owns(self, url):
+        return urlparse(url).netloc.lower() == self.netloc
+
+    def accepts_link(self, url):
+        """Ссылка на документ подходит под правила источника"""
+        return self.link_pattern is None or self.link_pattern.search(url) is not None
+
+    def classify(self, url):
+        url_lower = url.lower()
+        for category, keywords in self.categories.items():
+            if any(keyword in url_lower for keyword in keywords):
+                return category
+        return 'Other_Documents'
+
+    def document_dir(self, url, base_dir):
+        return os.path.join(base_dir, self.folder, self.classify(url))
+
+    def clean_filename(self, url, max_length=150, content_disposition=None):
+        return monitor_core.get_clean_filename(url, max_length, content_disposition)
+
+class CourtSource(Source):
+    """Суд МФЦА: правила классификации и имен файлов из monitor_core, обход через браузер"""
+
+    def __init__(self, config):
+        super().__init__(
+            COURT_SOURCE, 'https://court.aifc.kz',
+            listing_urls=config.get('urls', ()),
+            folder='AIFC_Court',
+            requests_per_minute=config.get('court_requests_per_minute', 20),
+            use_browser=True
+        )
+
+    def classify(self, url):
+        return monitor_core.classify_url(url)
+
+    def document_dir(self, url, base_dir):
+        return monitor_core.get_document_dir(url, base_dir)
+
+class SourceRegistry:
+    """Источники по имени и поиск источника по домену URL (по умолчанию - суд)"""
+
+    def __init__(self, sources):
+        self.sources = {source.name: source for source in sources}
+        self.by_netloc = {}
+        for source in sources:
+            self.by_netloc.setdefault(source.netloc, source)
+        self.default = self.sources.get(COURT_SOURCE) or sources[0]
+
+    def __iter__(self):
+        return iter(self.sources.values())
+
+    def __len__(self):
+        return len(self.sources)
+
+    def get(self, name):
+        return self.sources[name]
+
+    def for_url(self, url):
+        return self.by_netloc.get(urlparse(url).netloc.lower(), self.default)
+
+def build_registry(config):
+    """Реестр из конфигурации: встроенный суд плюс секция sources"""
+    sources = [CourtSource(config)]
+    for options in config.get('sources', ()):
+        options = dict(options)
+        sources.append(Source(options.pop('name'), options.pop('base_url'), **options))
+    return SourceRegistry(sources)
+
+_registry_cache = (None, None)
+_registry_lock = threading.Lock()
+
+def get_registry(config):
+    """Реестр для конфигурации (пересобирается только при ее смене)"""
+    global _registry_cache
+    with _registry_lock:
+        cached_config, registry = _registry_cache
+        if cached_config is not config:
+            registry = build_registry(config)
+            _registry_cache = (config, registry)
+        return registry
+
+class MultiSourceEngine:
+    """Параллельный обход источников поверх одного монитора (сессия, состояние, кеши общие)"""
+
+    def __init__(self, monitor, registry=None, logger=None):
+        self.monitor = monitor
+        self.registry = registry or get_registry(monitor.config)
+        self.logger = logger or getattr(monitor, 'logger', None) or logging.getLogger(__name__)
+        self.browser_lock = threading.Lock()  # Браузер один на процесс
+        self.progress_lock = threading.Lock()
+        self.processed = 0
+
+    def crawl_http(self, source, listing_url):
+        """Обход листинга по HTTP со страницами пагинации: (документы, пагинация, обойдены ли все)"""
+        from link_extractor import parse_listing
+
+        extensions = source.file_extensions or self.monitor.config['file_extensions']
+        documents, pagination_seen, queue = [], [], [listing_url]
+        pages = 0
+        while queue and pages < source.max_pages:
+            page_url = queue.pop(0)
+            pages += 1
+            source.budget.acquire()
+            response = self.monitor.session.get(page_url, timeout=self.monitor.config['timeout'])
+            response.raise_for_status()
+            page_documents, pagination = parse_listing(response.text, page_url, extensions)
+            documents.extend(doc['url'] for doc in page_documents)
+            for next_url in pagination:
+                if next_url != listing_url and next_url not in pagination_seen:
+                    pagination_seen.append(next_url)
+                    queue.append(next_url)
+        return documents, pagination_seen, not queue
+
+    def crawl(self, source, listing_url):
+        if source.use_browser:
+            with self.browser_lock:
+                return self.monitor.crawl_listing(listing_url, budget=source.budget)
+        return self.crawl_http(source, listing_url)
+
+    def download(self, source, url):
+        save_dir = self.monitor.create_aifc_directory_structure(url, self.monitor.config['download_dir'])
+        save_path = os.path.join(save_dir, self.monitor.get_clean_filename(url))
+        source.budget.acquire()
+        if source.use_browser:
+            with self.browser_lock:
+                return self.monitor.download_with_browser_bot(url, save_path)
+        return self.monitor.download_file_simple(url, save_path)
+
+    def note_processed(self):
+        """Учет обработанного файла и периодическое сохранение прогресса"""
+        with self.progress_lock:
+            self.processed += 1
+            save_now = self.processed % SAVE_EVERY == 0
+        if save_now:
+            self.monitor.save_downloaded_history()
+            self.monitor.save_discovered_files()
+
+    def run_source(self, source):
+        """Обнаружение и скачивание для одного источника"""
+        stats = {'documents': 0, 'new': 0, 'updated': 0, 'unchanged': 0, 'failed': 0}
+        documents = []
+        for listing_url in source.listing_urls:
+            try:
+                with timing.span('listing'):
+                    found, pagination, complete = self.crawl(source, listing_url)
+            except Exception as e:
+                self.logger.warning(f"⚠️ [{source.name}] Ошибка обхода {listing_url}: {e}")
+                continue
+            found = [url for url in found if source.accepts_link(url)]
+            documents.extend(found)
+
+            with self.monitor.state_lock:
+                listing_diff = self.monitor.diff_listing(listing_url, found, pagination, complete) if found else None
+                if listing_diff and (listing_diff[0] or listing_diff[1]):
+                    self.monitor.update_discovered_files(listing_diff[0], listing_diff[1])
+
+        stats['documents'] = len(documents)
+        with self.monitor.state_lock:
+            files_to_download = self.monitor.get_files_to_download(documents)
+        self.logger.info(f"🌐 [{source.name}] Документов: {len(documents)}, к обработке: {len(files_to_download)}")
+
+        for url in files_to_download:
+            try:
+                result = self.download(source, url)
+            except Exception as e:
+                self.logger.error(f"❌ [{source.name}] Ошибка обработки {url}: {e}")
+                result = 'failed'
+            metrics.record_result(result)
+            self.note_processed()
+            stats[result if result in stats else 'failed'] += 1
+
+        return stats
+
+    def run(self):
+        """Все источники параллельно; результат {имя источника: статистика}"""
+        sources = list(self.registry)
+        with ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix='source') as executor:
+            results = dict(zip((source.name for source in sources), executor.map(self.run_source, sources)))
+
+        self.monitor.save_downloaded_history()
+        self.monitor.save_discovered_files()
+        for name, stats in results.items():
+            self.logger.info(f"📊 [{name}] {stats}")
+        return results
@@ -0,0 +1,68 @@
+"""
+Очередь скачивания: первые скачивания раньше перепроверки, внутри полосы - по приоритету
+"""
+
+import unittest
+from datetime import datetime
+
+from download_queue import (
+    DownloadQueue, build_download_queue, score_item, lane_for, FIRST_DOWNLOAD, REVALIDATION
+)
+from monitor_core import classify_url
+
+NOW = datetime(2026, 1, 1)
+JUDGMENT = 'https://court.aifc.kz/uploads/Case No. 1 of 2024 judgment.pdf'
+OTHER = 'https://court.aifc.kz/files/brochure.pdf'
+
+class DownloadQueueTest(unittest.TestCase):
+
+    def test_first_download_lane_drains_first(self):
+        queue = DownloadQueue()
+        queue.push('https://a/old.pdf', 1000, REVALIDATION)
+        queue.push('https://a/new.pdf', 1, FIRST_DOWNLOAD)
+        self.assertEqual(queue.pop(), (FIRST_DOWNLOAD, 'https://a/new.pdf'))
+        self.assertEqual(queue.pop(), (REVALIDATION, 'https://a/old.pdf'))
+        self.assertIsNone(queue.pop())
+
+    def test_priority_and_stable_order(self):
+        queue = DownloadQueue()
+        for url, score in [('https://a/1', 5), ('https://a/2', 10), ('https://a/3', 5)]:
+            queue.push(url, score)
+        self.assertEqual(list(queue.drain()), ['https://a/2', 'https://a/1', 'https://a/3'])
+
+    def test_duplicate_push_ignored(self):
+        queue = DownloadQueue()
+        self.assertTrue(queue.push('https://a/1', 1))
+        self.assertFalse(queue.push('https://a/1', 99, REVALIDATION))
+        self.assertEqual((queue.depth(FIRST_DOWNLOAD), queue.depth(REVALIDATION)), (1, 0))
+
+    def test_lane_for(self):
+        self.assertEqual(lane_for({'downloaded': True}, {'hash': 'x'}), REVALIDATION)
+        self.assertEqual(lane_for({'downloaded': True}, None), FIRST_DOWNLOAD)
+        self.assertEqual(lane_for({}, None), FIRST_DOWNLOAD)
+
+class ScoreTest(unittest.TestCase):
+
+    def test_new_and_category_raise_score(self):
+        self.assertEqual(classify_url(JUDGMENT), 'Judgments')
+        self.assertGreater(score_item(JUDGMENT, {}, now=NOW), score_item(OTHER, {}, now=NOW))
+        self.assertGreater(score_item(OTHER, {'is_new': True}, now=NOW), score_item(JUDGMENT, {}, now=NOW))
+
+    def test_failures_and_size_lower_score(self):
+        base = score_item(OTHER, {}, now=NOW)
+        self.assertEqual(score_item(OTHER, {}, failure_count=2, now=NOW), base - 30)
+        self.assertEqual(score_item(OTHER, {}, {'size': 50 * 1024 * 1024}, now=NOW), base - 10)
+
+    def test_build_queue(self):
+        discovered = {'files': {
+            JUDGMENT: {'downloaded': True},
+            OTHER: {'is_new': True},
+            'https://court.aifc.kz/files/failing.pdf': {'is_new': True}
+        }}
+        downloaded = {JUDGMENT: {'hash': 'x', 'last_checked': '2025-12-01T00:00:00'}}
+        queue = build_download_queue(list(discovered['files']), discovered, downloaded,
+                                     {'https://court.aifc.kz/files/failing.pdf': 5}, now=NOW)
+        self.assertEqual(list(queue.drain()), [OTHER, 'https://court.aifc.kz/files/failing.pdf', JUDGMENT])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Проверка скачивания на лету: сигнатура, Content-Length, временный .part файл
+"""
+
+import os
+import shutil
+import hashlib
+import tempfile
+import unittest
+from unittest import mock
+
+from download_validator import (
+    download_to_part, commit_part, get_part_path, DownloadValidationError, SNIFF_SIZE
+)
+from retry_policy import ContentTooSmall
+
+PDF = b'%PDF-1.7\n' + b'x' * 100
+
+class FakeResponse:
+
+    def __init__(self, chunks, headers=None):
+        self.chunks = chunks
+        self.headers = headers or {}
+        self.closed = False
+
+    def iter_content(self, chunk_size=None):
+        return iter(self.chunks)
+
+    def close(self):
+        self.closed = True
+
+class DownloadToPartTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='download_validator_test_')
+        self.save_path = os.path.join(self.work_dir, 'docs', 'a.pdf')
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def leftovers(self):
+        return [name for name in os.listdir(os.path.dirname(self.save_path)) if name.endswith('.part')]
+
+    def test_valid_file_is_committed(self):
+        response = FakeResponse([PDF[:3], PDF[3:10], PDF[10:]], {'Content-Length': str(len(PDF))})
+        part_path, file_hash, size = download_to_part(response, self.save_path)
+        self.assertFalse(os.path.exists(self.save_path))
+        commit_part(part_path, self.save_path)
+        with open(self.save_path, 'rb') as f:
+            self.assertEqual(f.read(), PDF)
+        self.assertEqual((file_hash, size), (hashlib.md5(PDF).hexdigest(), len(PDF)))
+        self.assertEqual(self.leftovers(), [])
+
+    def test_short_first_chunk_checked_before_write(self):
+        html = b'<html><body>Login</body></html>'
+        written = []
+        real_open = open
+
+        def spy_open(path, mode='r', *args, **kwargs):
+            f = real_open(path, mode, *args, **kwargs)
+            if path.endswith('.part'):
+                original_write = f.write
+                f.write = lambda data: written.append(data) or original_write(data)
+            return f
+
+        with mock.patch('builtins.open', spy_open), self.assertRaises(DownloadValidationError):
+            download_to_part(FakeResponse([html[:4], html[4:]]), self.save_path)
+        self.assertEqual(written, [])
+        self.assertEqual(self.leftovers(), [])
+
+    def test_wrong_signature_rejected(self):
+        with self.assertRaises(DownloadValidationError):
+            download_to_part(FakeResponse([b'PK\x03\x04' + b'0' * 50]), self.save_path)
+
+    def test_html_content_type_rejected(self):
+        response = FakeResponse([PDF], {'Content-Type': 'text/html; charset=utf-8'})
+        with self.assertRaises(DownloadValidationError):
+            download_to_part(response, self.save_path)
+
+    def test_content_length_mismatch(self):
+        response = FakeResponse([PDF], {'Content-Length': str(len(PDF) + 10)})
+        with self.assertRaises(DownloadValidationError):
+            download_to_part(response, self.save_path)
+        self.assertTrue(response.closed)
+        self.assertEqual(self.leftovers(), [])
+
+    def test_compressed_length_not_compared(self):
+        response = FakeResponse([PDF], {'Content-Length': '5', 'Content-Encoding': 'gzip'})
+        part_path, _, size = download_to_part(response, self.save_path)
+        self.assertEqual(size, len(PDF))
+        os.remove(part_path)
+
+    def test_body_shorter_than_sniff_window(self):
+        body = b'%PDF-1.4'
+        self.assertLess(len(body), SNIFF_SIZE)
+        part_path, _, size = download_to_part(FakeResponse([body]), self.save_path)
+        self.assertEqual(size, len(body))
+        os.remove(part_path)
+
+    def test_too_small(self):
+        with self.assertRaises(ContentTooSmall):
+            download_to_part(FakeResponse([PDF]), self.save_path, min_size=len(PDF) + 1)
+
+    def test_part_path_unique_per_writer(self):
+        part_path = get_part_path(self.save_path)
+        self.assertTrue(part_path.startswith(self.save_path + '.'))
+        self.assertIn(str(os.getpid()), part_path)
+        self.assertTrue(part_path.endswith('.part'))
+
+if __name__ == '__main__':
+    unittest.main()
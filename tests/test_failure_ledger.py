@@ -0,0 +1,82 @@
+"""
+Журнал неудач: экспоненциальная пауза, выключатель и постоянные HTTP-ошибки
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from failure_ledger import FailureLedger
+
+NOW = datetime(2026, 1, 1, 12, 0)
+URL = 'https://court.aifc.kz/files/doc.pdf'
+CONFIG = {
+    'failure_backoff_minutes': 30,
+    'failure_backoff_max_hours': 24,
+    'failure_breaker_threshold': 3,
+    'failure_park_days': 7
+}
+
+class FailureLedgerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'failure_ledger.json')
+        self.ledger = FailureLedger(self.path, CONFIG, autosave=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def next_eligible(self, entry):
+        return datetime.fromisoformat(entry['next_eligible']) - NOW
+
+    def test_backoff_doubles(self):
+        first = self.ledger.record_failure(URL, http_status=503, now=NOW)
+        self.assertEqual(self.next_eligible(first), timedelta(minutes=30))
+        second = self.ledger.record_failure(URL, http_status=503, now=NOW)
+        self.assertEqual(self.next_eligible(second), timedelta(minutes=60))
+        self.assertFalse(second['parked'])
+        self.assertEqual(second['error_class'], 'http_5xx')
+
+    def test_breaker_parks_at_threshold(self):
+        for _ in range(3):
+            entry = self.ledger.record_failure(URL, http_status=503, now=NOW)
+        self.assertTrue(entry['parked'])
+        self.assertEqual(self.next_eligible(entry), timedelta(days=7))
+        self.assertTrue(self.ledger.is_parked(URL, NOW))
+        # Каждая следующая неудача удваивает срок парковки
+        entry = self.ledger.record_failure(URL, http_status=503, now=NOW)
+        self.assertEqual(self.next_eligible(entry), timedelta(days=14))
+
+    def test_permanent_status_parks_after_two_attempts(self):
+        self.assertFalse(self.ledger.record_failure(URL, http_status=404, now=NOW)['parked'])
+        self.assertTrue(self.ledger.record_failure(URL, http_status=404, now=NOW)['parked'])
+
+    def test_success_clears_entry(self):
+        self.ledger.record_failure(URL, http_status=503, now=NOW)
+        self.ledger.record_success(URL)
+        self.assertEqual(self.ledger.failure_count(URL), 0)
+        self.assertTrue(self.ledger.is_eligible(URL, NOW))
+
+    def test_filter_eligible(self):
+        other = 'https://court.aifc.kz/files/other.pdf'
+        self.ledger.record_failure(URL, http_status=503, now=NOW)
+        self.assertEqual(self.ledger.filter_eligible([URL, other], NOW), ([other], [URL]))
+        later = NOW + timedelta(minutes=31)
+        self.assertEqual(self.ledger.filter_eligible([URL, other], later), ([URL, other], []))
+
+    def test_suppress_failures(self):
+        with self.ledger.suppress_failures():
+            self.ledger.record_failure(URL, http_status=503, now=NOW)
+        self.assertEqual(self.ledger.failure_counts(), {})
+
+    def test_save_and_reload(self):
+        self.ledger.record_failure(URL, http_status=503, now=NOW)
+        self.ledger.save()
+        reloaded = FailureLedger(self.path, CONFIG, autosave=False)
+        self.assertEqual(reloaded.failure_count(URL), 1)
+
+if __name__ == '__main__':
+    unittest.main()
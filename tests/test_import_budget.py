@@ -0,0 +1,32 @@
+"""
+Бюджет времени импорта: модули укладываются в IMPORT_TIME_BUDGETS и не тянут HEAVY_MODULES
+"""
+
+import os
+import re
+import glob
+import unittest
+
+from check_setup import IMPORT_TIME_BUDGETS, HEAVY_MODULES, measure_import_time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_MODULES = {os.path.splitext(os.path.basename(path))[0] for path in glob.glob(os.path.join(ROOT, '*.py'))}
+
+class ImportBudgetTest(unittest.TestCase):
+
+    def test_modules_within_budget(self):
+        for module_name, budget in IMPORT_TIME_BUDGETS.items():
+            with self.subTest(module=module_name):
+                try:
+                    measurement = measure_import_time(module_name)
+                except ImportError as e:
+                    missing = re.search(r"No module named '([\w.]+)'", str(e))
+                    if missing and missing.group(1).split('.')[0] not in REPO_MODULES:
+                        self.skipTest(f"{module_name}: не установлен {missing.group(1)}")
+                    raise
+                self.assertEqual(measurement['heavy'], [], f"{module_name} загружает {HEAVY_MODULES}")
+                self.assertLessEqual(measurement['elapsed'], budget,
+                                     f"{module_name}: {measurement['elapsed'] * 1000:.0f} мс > {budget * 1000:.0f} мс")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+"""
+Все модули верхнего уровня импортируются (недостающие сторонние пакеты - пропуск)
+"""
+
+import os
+import glob
+import importlib
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = sorted(os.path.splitext(os.path.basename(path))[0] for path in glob.glob(os.path.join(ROOT, '*.py')))
+
+class ImportTest(unittest.TestCase):
+
+    def test_all_modules_import(self):
+        for name in MODULES:
+            with self.subTest(module=name):
+                try:
+                    importlib.import_module(name)
+                except ModuleNotFoundError as e:
+                    if e.name in MODULES:
+                        raise
+                    # Не установлен сторонний пакет (requests, selenium) - это не ошибка кода
+                    self.skipTest(f"{name}: нет модуля {e.name}")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+"""
+Ключи ссылок из листингов должны совпадать с уже сохраненными в discovered_files.json
+"""
+
+import os
+import json
+import unittest
+from urllib.parse import unquote
+
+from link_extractor import normalize_link, parse_listing
+
+STATE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'discovered_files.json')
+
+class NormalizeLinkTest(unittest.TestCase):
+
+    def test_spaces_are_encoded_like_browser(self):
+        html = '<a href="/uploads/Case No. 1 of 2019 - A v B_eng.pdf">Judgment</a>'
+        documents, _ = parse_listing(html, 'https://court.aifc.kz/en/judgments', ('.pdf',))
+        self.assertEqual(documents[0]['url'], 'https://court.aifc.kz/uploads/Case%20No.%201%20of%202019%20-%20A%20v%20B_eng.pdf')
+
+    def test_already_encoded_link_is_unchanged(self):
+        url = 'https://court.aifc.kz/uploads/Case%20No.%201%20of%202019.pdf?lang=en&x=%D0%B0'
+        self.assertEqual(normalize_link(url), url)
+
+    def test_non_ascii_is_utf8_encoded(self):
+        self.assertEqual(normalize_link('https://court.aifc.kz/files/решение.pdf'),
+                         'https://court.aifc.kz/files/%D1%80%D0%B5%D1%88%D0%B5%D0%BD%D0%B8%D0%B5.pdf')
+
+    @unittest.skipUnless(os.path.exists(STATE_FILE), "нет discovered_files.json")
+    def test_matches_existing_state_keys(self):
+        with open(STATE_FILE, 'r', encoding='utf-8') as f:
+            keys = list(json.load(f)['files'])
+        for key in keys:
+            self.assertEqual(normalize_link(key), key)
+            # Та же ссылка в сыром виде из HTML (с пробелами) дает тот же ключ
+            self.assertEqual(normalize_link(unquote(key)), key)
+
+if __name__ == '__main__':
+    unittest.main()
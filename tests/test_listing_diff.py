@@ -0,0 +1,35 @@
+"""
+Разница листингов: удаленными считаются только документы, которых нет ни в одном листинге
+"""
+
+import importlib.util
+import unittest
+
+@unittest.skipUnless(importlib.util.find_spec('requests'), "нет requests")
+class DiffListingTest(unittest.TestCase):
+
+    def setUp(self):
+        from document_monitor import HumanLikeDocumentMonitor
+        # Для diff_listing нужен только discovered_files, сеть и браузер не создаются
+        self.monitor = HumanLikeDocumentMonitor.__new__(HumanLikeDocumentMonitor)
+        self.monitor.discovered_files = {'files': {}, 'listings': {}}
+
+    def test_removed_from_complete_listing(self):
+        self.monitor.diff_listing('https://a/judgments', ['https://a/1.pdf', 'https://a/2.pdf'])
+        added, removed, still_present = self.monitor.diff_listing('https://a/judgments', ['https://a/1.pdf'])
+        self.assertEqual(removed, ['https://a/2.pdf'])
+        self.assertEqual(still_present, {'https://a/1.pdf'})
+
+    def test_partial_crawl_removes_nothing(self):
+        self.monitor.diff_listing('https://a/judgments', ['https://a/1.pdf', 'https://a/2.pdf'])
+        _, removed, _ = self.monitor.diff_listing('https://a/judgments', ['https://a/1.pdf'], complete=False)
+        self.assertEqual(removed, [])
+
+    def test_document_moved_to_other_listing_is_kept(self):
+        self.monitor.diff_listing('https://a/judgments', ['https://a/1.pdf', 'https://a/2.pdf'])
+        self.monitor.diff_listing('https://a/archive', ['https://a/2.pdf'])
+        _, removed, _ = self.monitor.diff_listing('https://a/judgments', ['https://a/1.pdf'])
+        self.assertEqual(removed, [])
+
+if __name__ == '__main__':
+    unittest.main()
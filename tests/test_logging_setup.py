@@ -0,0 +1,62 @@
+"""
+JSON-лог через фоновый слушатель: структурные поля и трассировка исключения
+"""
+
+import os
+import json
+import shutil
+import logging
+import tempfile
+import unittest
+
+import logging_setup
+
+class JsonLogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='logging_setup_test_')
+        self.log_file = os.path.join(self.work_dir, 'test.log')
+        self.root = logging.getLogger()
+        self.saved_handlers = self.root.handlers[:]
+        self.saved_level = self.root.level
+        self.root.handlers = []
+
+    def tearDown(self):
+        listener = logging_setup._listener
+        logging_setup.shutdown_logging()
+        for handler in listener.handlers if listener else ():
+            handler.close()
+        self.root.handlers = self.saved_handlers
+        self.root.setLevel(self.saved_level)
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def read_entries(self):
+        logging_setup.shutdown_logging()
+        with open(self.log_file, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_exception_and_fields_in_json(self):
+        logging_setup.setup_logging(self.log_file, log_format='json', console=False)
+        logger = logging.getLogger('test_logging_setup')
+        logger.info("Скачан %s", 'a.pdf', extra=logging_setup.fields(url='https://a/a.pdf', stage='download', bytes=10))
+        try:
+            raise ValueError("сломано")
+        except ValueError:
+            logger.exception("Ошибка %s", 'a.pdf')
+
+        info, error = self.read_entries()
+        self.assertEqual(info['message'], "Скачан a.pdf")
+        self.assertEqual((info['url'], info['stage'], info['bytes']), ('https://a/a.pdf', 'download', 10))
+        self.assertNotIn('exc', info)
+        self.assertEqual(error['message'], "Ошибка a.pdf")
+        self.assertIn("ValueError: сломано", error['exc'])
+
+    def test_config_sets_level(self):
+        logging_setup.setup_logging(self.log_file, console=False, config={'log_level': 'WARNING', 'log_format': 'json'})
+        logger = logging.getLogger('test_logging_setup')
+        logger.info("не попадает")
+        logger.warning("попадает")
+        self.assertEqual([entry['message'] for entry in self.read_entries()], ["попадает"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Метрики: текстовый формат Prometheus, гистограммы и выдача по HTTP
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import urllib.error
+import urllib.request
+
+import metrics
+from metrics import Counter, Gauge, Histogram
+
+class FormatTest(unittest.TestCase):
+
+    def test_counter_with_labels(self):
+        counter = Counter('test_documents_total', "Документы", ['result'])
+        counter.inc(1, 'new')
+        counter.inc(2, 'new')
+        counter.inc(1, 'fa"il\\ed\n')
+        self.assertEqual(counter.render(), [
+            '# HELP test_documents_total Документы',
+            '# TYPE test_documents_total counter',
+            'test_documents_total{result="fa\\"il\\\\ed\\n"} 1',
+            'test_documents_total{result="new"} 3'
+        ])
+
+    def test_counter_without_labels(self):
+        counter = Counter('test_bytes_total', "Байты")
+        counter.inc(1024)
+        self.assertEqual(counter.render()[-1], 'test_bytes_total 1024')
+
+    def test_gauge_set(self):
+        gauge = Gauge('test_depth', "Очередь", ['lane'])
+        gauge.set(5, 'first_download')
+        gauge.set(3, 'first_download')
+        self.assertEqual(gauge.render()[1], '# TYPE test_depth gauge')
+        self.assertEqual(gauge.render()[-1], 'test_depth{lane="first_download"} 3')
+
+    def test_histogram_cumulative_buckets(self):
+        histogram = Histogram('test_seconds', "Время", (0.5, 1))
+        for value in (0.2, 0.5, 0.7, 3):
+            histogram.observe(value)
+        self.assertEqual(histogram.render()[2:], [
+            'test_seconds_bucket{le="0.5"} 2',
+            'test_seconds_bucket{le="1"} 3',
+            'test_seconds_bucket{le="+Inf"} 4',
+            'test_seconds_sum 4.4',
+            'test_seconds_count 4'
+        ])
+
+    def test_render_ends_with_newline(self):
+        text = metrics.render()
+        self.assertTrue(text.endswith('\n'))
+        for metric in metrics.REGISTRY:
+            self.assertIn(f"# TYPE {metric.name} {metric.kind}", text)
+        self.assertIn('# TYPE aifc_retry_events_total counter', text)
+
+class ExportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_write_textfile(self):
+        path = os.path.join(self.temp_dir, 'aifc.prom')
+        metrics.export({'metrics_textfile': path})
+        with open(path, encoding='utf-8') as f:
+            self.assertIn('# TYPE aifc_documents_total counter', f.read())
+        self.assertFalse(os.path.exists(path + '.tmp'))
+
+    def test_http_endpoint(self):
+        server = metrics.start_http_server(0)
+        try:
+            base = f"http://127.0.0.1:{server.server_address[1]}"
+            with urllib.request.urlopen(base + '/metrics', timeout=5) as response:
+                self.assertEqual(response.headers['Content-Type'], metrics.CONTENT_TYPE)
+                self.assertIn('aifc_download_duration_seconds', response.read().decode('utf-8'))
+            with self.assertRaises(urllib.error.HTTPError) as raised:
+                urllib.request.urlopen(base + '/other', timeout=5)
+            self.assertEqual(raised.exception.code, 404)
+            raised.exception.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+"""
+Политика повторов: классы ошибок, Retry-After, дедлайн и счетчики
+"""
+
+import socket
+import threading
+import unittest
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+from retry_policy import (
+    RetryPolicy, RetryMetrics, ClassifiedError, HTTPStatusError, ContentTooSmall,
+    classify_error, classify_status, is_retryable, parse_retry_after,
+    DNS, CONNECT, READ_TIMEOUT, HTTP_4XX, HTTP_5XX, RATE_LIMITED, INTERNAL, OTHER
+)
+
+class FakeResponse:
+
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+class ClassifyTest(unittest.TestCase):
+
+    def test_statuses(self):
+        self.assertEqual(classify_status(429), RATE_LIMITED)
+        self.assertEqual(classify_status(408), READ_TIMEOUT)
+        self.assertEqual(classify_status(503), HTTP_5XX)
+        self.assertEqual(classify_status(404), HTTP_4XX)
+
+    def test_errors(self):
+        self.assertEqual(classify_error(socket.gaierror("getaddrinfo failed")), DNS)
+        self.assertEqual(classify_error(ConnectionResetError()), CONNECT)
+        self.assertEqual(classify_error(socket.timeout()), READ_TIMEOUT)
+        self.assertEqual(classify_error(AttributeError('x')), INTERNAL)
+        self.assertEqual(classify_error(RuntimeError('x')), OTHER)
+        self.assertEqual(classify_error(HTTPStatusError(FakeResponse(500))), HTTP_5XX)
+
+    def test_retryable(self):
+        self.assertFalse(is_retryable(HTTPStatusError(FakeResponse(404))))
+        self.assertTrue(is_retryable(HTTPStatusError(FakeResponse(503))))
+        self.assertTrue(is_retryable(ContentTooSmall(10, 1000)))
+        self.assertFalse(is_retryable(ClassifiedError(OTHER, retryable=False)))
+
+class RetryAfterTest(unittest.TestCase):
+
+    def test_seconds_and_date(self):
+        self.assertEqual(parse_retry_after('120'), 120)
+        self.assertEqual(parse_retry_after('-5'), 0)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after('скоро'))
+        retry_at = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=300), usegmt=True)
+        self.assertAlmostEqual(parse_retry_after(retry_at), 300, delta=5)
+
+    def test_retry_after_overrides_backoff(self):
+        error = HTTPStatusError(FakeResponse(429, {'Retry-After': '900'}))
+        delay = RetryPolicy().get_delay(error, 1)
+        self.assertGreaterEqual(delay, 900)
+        self.assertLessEqual(delay, 905)
+
+    def test_backoff_is_capped(self):
+        policy = RetryPolicy()
+        error = HTTPStatusError(FakeResponse(503))
+        self.assertLessEqual(policy.get_delay(error, 20), 120)
+        self.assertGreaterEqual(policy.get_delay(error, 20), 60)
+
+class RetryPolicyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sleeps = []
+        self.metrics = RetryMetrics()
+
+    def policy(self, **kwargs):
+        return RetryPolicy(sleep=self.sleeps.append, retry_metrics=self.metrics, **kwargs)
+
+    def test_retries_until_success(self):
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise HTTPStatusError(FakeResponse(503))
+            return 'ok'
+
+        self.assertEqual(self.policy(max_attempts=3).run(flaky), 'ok')
+        self.assertEqual(len(self.sleeps), 2)
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot['counters']['attempts'], 3)
+        self.assertEqual(snapshot['counters']['retries'], 2)
+        self.assertEqual(snapshot['errors'], {HTTP_5XX: 2})
+
+    def test_not_retryable_raises_immediately(self):
+        def missing():
+            raise HTTPStatusError(FakeResponse(404))
+
+        with self.assertRaises(HTTPStatusError):
+            self.policy(max_attempts=5).run(missing)
+        self.assertEqual(self.sleeps, [])
+        self.assertEqual(self.metrics.snapshot()['counters']['not_retryable'], 1)
+
+    def test_deadline_stops_retries(self):
+        def limited():
+            raise HTTPStatusError(FakeResponse(429, {'Retry-After': '600'}))
+
+        with self.assertRaises(HTTPStatusError):
+            self.policy(max_attempts=5, deadline=60).run(limited)
+        self.assertEqual(self.sleeps, [])
+        self.assertEqual(self.metrics.snapshot()['counters']['deadline_exceeded'], 1)
+
+    def test_exhausted(self):
+        def broken():
+            raise RuntimeError("сбой")
+
+        with self.assertRaises(RuntimeError):
+            self.policy(max_attempts=2).run(broken)
+        self.assertEqual(self.metrics.snapshot()['counters']['exhausted'], 1)
+
+    def test_metrics_are_thread_safe(self):
+        def work():
+            for _ in range(2000):
+                self.metrics.inc('attempts')
+                self.metrics.record_error(OTHER)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot['counters']['attempts'], 16000)
+        self.assertEqual(snapshot['errors'][OTHER], 16000)
+
+if __name__ == '__main__':
+    unittest.main()
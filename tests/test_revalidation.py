@@ -0,0 +1,50 @@
+"""
+График перепроверки: стабильные документы реже, часто меняющиеся - чаще
+"""
+
+import unittest
+from datetime import datetime, timedelta
+
+from revalidation import start_schedule, record_check, next_interval, is_due
+
+NOW = datetime(2026, 1, 1, 12, 0)
+CONFIG = {'revalidation_min_hours': 24, 'revalidation_max_days': 30}
+
+class ScheduleTest(unittest.TestCase):
+
+    def test_new_document_checked_after_min_interval(self):
+        record = start_schedule({}, CONFIG, now=NOW)
+        self.assertEqual(record['next_check'], (NOW + timedelta(hours=24)).isoformat())
+        self.assertEqual((record['checks'], record['changes'], record['stable_checks']), (0, 0, 0))
+
+    def test_stable_checks_double_interval(self):
+        record = start_schedule({}, CONFIG, now=NOW)
+        record_check(record, changed=False, config=CONFIG, now=NOW)
+        self.assertEqual(datetime.fromisoformat(record['next_check']) - NOW, timedelta(hours=48))
+        record_check(record, changed=False, config=CONFIG, now=NOW)
+        self.assertEqual(datetime.fromisoformat(record['next_check']) - NOW, timedelta(hours=96))
+
+    def test_interval_capped(self):
+        self.assertEqual(next_interval({'stable_checks': 40}, CONFIG), timedelta(days=30))
+
+    def test_change_resets_and_shortens(self):
+        record = {'checks': 3, 'changes': 0, 'stable_checks': 3}
+        record_check(record, changed=True, config=CONFIG, now=NOW)
+        self.assertEqual(record['stable_checks'], 0)
+        self.assertEqual(record['last_change'], NOW.isoformat())
+        self.assertEqual(datetime.fromisoformat(record['next_check']) - NOW, timedelta(hours=24))
+
+    def test_frequent_changes_checked_sooner(self):
+        stable = next_interval({'checks': 10, 'changes': 0, 'stable_checks': 3}, CONFIG)
+        volatile = next_interval({'checks': 10, 'changes': 5, 'stable_checks': 3}, CONFIG)
+        self.assertLess(volatile, stable)
+        self.assertGreaterEqual(volatile, timedelta(hours=24))
+
+    def test_is_due(self):
+        self.assertTrue(is_due({}, NOW))
+        self.assertTrue(is_due({'next_check': 'испорчено'}, NOW))
+        self.assertTrue(is_due({'next_check': (NOW - timedelta(seconds=1)).isoformat()}, NOW))
+        self.assertFalse(is_due({'next_check': (NOW + timedelta(hours=1)).isoformat()}, NOW))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+"""
+Конфигурация: проверка по схеме, значения по умолчанию, кеш и горячая перезагрузка
+"""
+
+import os
+import json
+import shutil
+import logging
+import tempfile
+import unittest
+
+import settings
+from settings import (
+    ConfigError, ConfigWatcher, Settings, load_settings, merge_defaults, parse_settings,
+    validate_config, validate_source
+)
+
+SOURCE = {
+    'name': 'other_court',
+    'base_url': 'https://example.org',
+    'listing_urls': ['https://example.org/judgments'],
+    'categories': {'Judgments': ['judgment']}
+}
+
+class ValidateConfigTest(unittest.TestCase):
+
+    def test_defaults_are_valid(self):
+        self.assertEqual(validate_config(settings.DEFAULT_CONFIG), [])
+
+    def test_type_and_range_errors(self):
+        errors = validate_config({
+            'timeout': 'быстро',
+            'max_depth': 0,
+            'log_format': 'xml',
+            'urls': ['ftp://court.aifc.kz'],
+            'human_behavior': {'browsing_probability': 1.5}
+        })
+        self.assertEqual(len(errors), 5)
+        self.assertTrue(any(error.startswith('timeout:') for error in errors))
+        self.assertTrue(any(error.startswith('max_depth:') for error in errors))
+        self.assertTrue(any(error.startswith('human_behavior.browsing_probability:') for error in errors))
+
+    def test_bool_is_not_a_number(self):
+        self.assertEqual(len(validate_config({'timeout': True})), 1)
+
+    def test_source_errors(self):
+        self.assertEqual(validate_source(SOURCE, 'sources[0]'), [])
+        errors = validate_source(dict(SOURCE, categories={'Judgments': 'judgment'}, extra=1), 'sources[0]')
+        self.assertEqual(errors, [
+            'sources[0].extra: неизвестное поле',
+            'sources[0].categories: нужен объект папка -> список ключевых слов'
+        ])
+        self.assertEqual(validate_source([], 'sources[0]'), ['sources[0]: ожидается объект'])
+
+    def test_duplicate_source_names(self):
+        errors = validate_config({'sources': [SOURCE, SOURCE, dict(SOURCE, name='aifc_court')]})
+        self.assertEqual(len(errors), 2)
+
+    def test_merge_defaults_nested(self):
+        merged = merge_defaults({'timeout': 5, 'human_behavior': {'working_hours_start': 8}})
+        self.assertEqual(merged['timeout'], 5)
+        self.assertEqual(merged['human_behavior']['working_hours_start'], 8)
+        self.assertEqual(merged['human_behavior']['working_hours_end'], 18)
+        self.assertEqual(merged['max_depth'], settings.DEFAULT_CONFIG['max_depth'])
+        # Значения по умолчанию копируются, а не разделяются
+        merged['urls'].append('https://example.org')
+        self.assertEqual(len(settings.DEFAULT_CONFIG['urls']), 2)
+
+class LoadSettingsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'monitor_config.json')
+        self.version = 0
+        settings.clear_cache()
+
+    def tearDown(self):
+        settings.clear_cache()
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, data):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(data if isinstance(data, str) else json.dumps(data))
+        # Гарантированно новое время изменения, даже на грубых файловых системах
+        self.version += 1
+        os.utime(self.path, ns=(self.version * 10 ** 9, self.version * 10 ** 9))
+
+    def test_parse_errors(self):
+        self.write({'timeout': -1})
+        with self.assertRaises(ConfigError) as raised:
+            parse_settings(self.path)
+        self.assertEqual(raised.exception.errors, ['timeout: должно быть больше 0'])
+
+        self.write('[]')
+        self.assertRaises(ConfigError, parse_settings, self.path)
+
+    def test_cached_until_file_changes(self):
+        self.write({'timeout': 5})
+        first = load_settings(self.path)
+        self.assertIsInstance(first, Settings)
+        self.assertEqual(first.timeout, 5)
+        self.assertIs(load_settings(self.path), first)
+
+        self.write({'timeout': 7})
+        second = load_settings(self.path)
+        self.assertIsNot(second, first)
+        self.assertEqual(second['timeout'], 7)
+
+    def test_settings_are_immutable(self):
+        self.write({})
+        config = load_settings(self.path)
+        with self.assertRaises(TypeError):
+            config.timeout = 1
+        self.assertIsInstance(config['urls'], tuple)
+        self.assertIsInstance(config.to_dict()['urls'], list)
+
+    def test_watcher_reports_bad_file_once(self):
+        self.write({'timeout': 5})
+        changes = []
+        logger = logging.getLogger('test_settings.watcher')
+        watcher = ConfigWatcher(self.path, on_change=changes.append, logger=logger)
+        self.assertIsNone(watcher.check())
+
+        self.write({'timeout': 'быстро'})
+        with self.assertLogs(logger, logging.ERROR) as logs:
+            self.assertIsNone(watcher.check())
+            self.assertIsNone(watcher.check())
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(watcher.current.timeout, 5)
+
+        self.write({'timeout': 9})
+        reloaded = watcher.check()
+        self.assertEqual(reloaded.timeout, 9)
+        self.assertEqual(changes, [reloaded])
+        self.assertIsNone(watcher.failed_stamp)
+
+if __name__ == '__main__':
+    unittest.main()
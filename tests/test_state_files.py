@@ -0,0 +1,95 @@
+"""
+Слияние файлов состояния при одновременной записи несколькими процессами
+"""
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from monitor_core import StateFile, merge_state
+
+class MergeStateTest(unittest.TestCase):
+
+    def test_keeps_other_writers_keys(self):
+        base = {'a': 1}
+        ours = {'a': 1, 'c': 3}
+        theirs = {'a': 1, 'b': 2}
+        self.assertEqual(merge_state(base, ours, theirs), {'a': 1, 'b': 2, 'c': 3})
+
+    def test_own_changes_and_deletions_win(self):
+        base = {'a': 1, 'gone': 0, 'kept': 0}
+        ours = {'a': 'ours', 'kept': 0}
+        theirs = {'a': 1, 'gone': 0, 'kept': 'theirs'}
+        self.assertEqual(merge_state(base, ours, theirs), {'a': 'ours', 'kept': 'theirs'})
+
+    def test_nested_merge_by_url(self):
+        base = {'files': {'u1': {}}, 'last_full_scan': None}
+        ours = {'files': {'u1': {}, 'u2': {}}, 'last_full_scan': 'ours'}
+        theirs = {'files': {'u1': {'downloaded': True}, 'u3': {}}, 'last_full_scan': None}
+        merged = merge_state(base, ours, theirs, depth=2)
+        self.assertEqual(merged['files'], {'u1': {'downloaded': True}, 'u2': {}, 'u3': {}})
+        self.assertEqual(merged['last_full_scan'], 'ours')
+
+class StateFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='state_files_test_')
+        self.path = os.path.join(self.work_dir, 'downloaded_files.json')
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'a': 1}, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def read(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_concurrent_writers_do_not_lose_updates(self):
+        ours = StateFile(self.path).load()
+        theirs = StateFile(self.path).load()
+
+        theirs['b'] = 2
+        StateFile(self.path).save(theirs)
+
+        ours['c'] = 3
+        StateFile(self.path).save(ours)
+
+        self.assertEqual(self.read(), {'a': 1, 'b': 2, 'c': 3})
+        self.assertEqual(ours, {'a': 1, 'b': 2, 'c': 3})
+
+    def test_reload_does_not_reset_snapshot_of_kept_dict(self):
+        state = StateFile(self.path)
+        ours = state.load()
+
+        other = StateFile(self.path).load()
+        other['b'] = 2
+        StateFile(self.path).save(other)
+
+        state.load()  # Повторная загрузка, результат которой выбрасывается
+        ours['c'] = 3
+        state.save(ours)
+
+        self.assertEqual(self.read(), {'a': 1, 'b': 2, 'c': 3})
+
+    def test_deletion_is_propagated(self):
+        state = StateFile(self.path)
+        ours = state.load()
+        ours.pop('a')
+        ours['c'] = 3
+        state.save(ours)
+        self.assertEqual(self.read(), {'c': 3})
+
+    def test_missing_file_returns_default_with_snapshot(self):
+        os.remove(self.path)
+        state = StateFile(self.path)
+        self.assertIsNone(state.load())
+        data = state.load({})
+        data['x'] = 1
+        state.save(data)
+        self.assertEqual(self.read(), {'x': 1})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+Профиль запуска: перцентили по ближайшему рангу, вложенные замеры и самые медленные файлы
+"""
+
+import unittest
+
+from timing import RunProfile, percentile, FILE_STAGE
+
+class PercentileTest(unittest.TestCase):
+
+    def test_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 100), 100)
+        self.assertEqual(percentile(values, 0), 1)
+
+    def test_small_and_empty(self):
+        self.assertEqual(percentile([], 95), 0.0)
+        self.assertEqual(percentile([7], 50), 7)
+        self.assertEqual(percentile([1, 2, 3], 50), 2)
+        self.assertEqual(percentile([1, 2, 3], 95), 3)
+
+class RunProfileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.profile = RunProfile()
+
+    def test_summary_stats(self):
+        for ms in range(1, 21):
+            self.profile.record('transfer', ms / 1000, nbytes=100)
+        stats = self.profile.summary()['stages']['transfer']
+        self.assertEqual(stats['count'], 20)
+        self.assertEqual(stats['p50_ms'], 10.0)
+        self.assertEqual(stats['p95_ms'], 19.0)
+        self.assertEqual(stats['max_ms'], 20.0)
+        self.assertEqual(stats['bytes'], 2000)
+
+    def test_nested_same_stage_counted_once(self):
+        with self.profile.span('transfer') as outer:
+            with self.profile.span('transfer') as inner:
+                inner.bytes = 10
+            outer.bytes = 5
+        stats = self.profile.summary()['stages']['transfer']
+        self.assertEqual((stats['count'], stats['bytes']), (1, 5))
+
+    def test_slowest_files(self):
+        self.profile.record(FILE_STAGE, 1.0, key='https://a/slow.pdf')
+        self.profile.record('transfer', 0.8, nbytes=300, key='https://a/slow.pdf')
+        self.profile.record(FILE_STAGE, 0.1, key='https://a/fast.pdf')
+        self.profile.record('transfer', 0.5, key='https://a/no-file-stage.pdf')
+
+        slowest = self.profile.summary(top=1)['slowest_files']
+        self.assertEqual(slowest, [{
+            'url': 'https://a/slow.pdf', 'seconds': 1.0, 'bytes': 300, 'stages': {'transfer': 0.8}
+        }])
+        self.assertEqual(len(self.profile.summary()['slowest_files']), 2)
+
+    def test_listeners_and_reset(self):
+        calls = []
+        self.profile.listeners.append(lambda *args: calls.append(args))
+        self.profile.record('parse', 0.2, 1, 'https://a/1')
+        self.assertEqual(calls, [('parse', 0.2, 1, 'https://a/1')])
+        self.profile.reset()
+        self.assertEqual(self.profile.summary(), {'stages': {}, 'slowest_files': []})
+        self.assertEqual(self.profile.format_summary(), "")
+
+if __name__ == '__main__':
+    unittest.main()
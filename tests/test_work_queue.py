@@ -0,0 +1,89 @@
+"""
+Очередь работ: аренда, продление, истечение аренды и отчет о результатах
+"""
+
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+from work_queue import WorkQueue, QUEUED, LEASED, DONE, FAILED, absolute_record, relative_record
+
+class WorkQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='work_queue_test_')
+        self.queue = WorkQueue(os.path.join(self.work_dir, 'work_queue.db'), lease_seconds=60, max_attempts=2)
+        self.queue.enqueue([('https://a/1.pdf', 'first'), ('https://a/2.pdf', 'first')])
+
+    def tearDown(self):
+        self.queue.close()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def state(self, url):
+        with self.queue.lock:
+            return self.queue.connection.execute(
+                "SELECT state, worker, lease_expires FROM jobs WHERE url = ?", (url,)
+            ).fetchone()
+
+    def expire(self, url):
+        with self.queue.lock:
+            self.queue.connection.execute("UPDATE jobs SET lease_expires = ? WHERE url = ?", (time.time() - 1, url))
+
+    def test_claims_do_not_overlap(self):
+        first = self.queue.claim('w1', limit=1)
+        second = self.queue.claim('w2', limit=5)
+        self.assertEqual(first, [('https://a/1.pdf', 'first')])
+        self.assertEqual(second, [('https://a/2.pdf', 'first')])
+        self.assertEqual(self.queue.claim('w3'), [])
+        self.assertEqual(self.state('https://a/1.pdf')[:2], (LEASED, 'w1'))
+
+    def test_expired_lease_is_requeued(self):
+        self.queue.claim('w1', limit=1)
+        self.expire('https://a/1.pdf')
+        self.assertEqual(self.queue.claim('w2', limit=1), [('https://a/1.pdf', 'first')])
+        self.assertFalse(self.queue.complete('w1', 'https://a/1.pdf', 'new'))
+        self.assertTrue(self.queue.complete('w2', 'https://a/1.pdf', 'new'))
+
+    def test_heartbeat_extends_lease(self):
+        self.queue.claim('w1')
+        self.expire('https://a/1.pdf')
+        self.assertEqual(self.queue.heartbeat('w1'), 2)
+        self.assertGreater(self.state('https://a/1.pdf')[2], time.time())
+        self.assertEqual(self.queue.claim('w2'), [])
+
+    def test_complete_success_and_failure(self):
+        self.queue.claim('w1')
+        self.assertTrue(self.queue.complete('w1', 'https://a/1.pdf', 'new', {'path': '1.pdf'}))
+        self.assertTrue(self.queue.complete('w1', 'https://a/2.pdf', 'failed', not_before=time.time() + 60))
+        self.assertEqual(self.state('https://a/1.pdf')[0], DONE)
+        self.assertEqual(self.state('https://a/2.pdf')[0], QUEUED)
+        self.assertEqual(self.queue.uncollected(), [('https://a/1.pdf', 'new', {'path': '1.pdf'})])
+
+        # Неудачный URL не выдается до конца паузы
+        self.assertEqual(self.queue.claim('w1'), [])
+        with self.queue.lock:
+            self.queue.connection.execute("UPDATE jobs SET not_before = ? WHERE url = ?", (time.time() - 1, 'https://a/2.pdf'))
+        self.assertEqual(self.queue.claim('w1'), [('https://a/2.pdf', 'first')])
+        self.queue.complete('w1', 'https://a/2.pdf', 'failed')
+        self.assertEqual(self.state('https://a/2.pdf')[0], FAILED)
+
+    def test_enqueue_keeps_uncollected_results(self):
+        self.queue.claim('w1', limit=1)
+        self.queue.complete('w1', 'https://a/1.pdf', 'new', {'path': '1.pdf'})
+        self.assertEqual(self.queue.enqueue([('https://a/1.pdf', 'first')]), 0)
+        self.assertEqual(len(self.queue.uncollected()), 1)
+
+        self.queue.mark_collected(['https://a/1.pdf'])
+        self.assertEqual(self.queue.enqueue([('https://a/1.pdf', 'revalidation')]), 1)
+        self.assertEqual(self.state('https://a/1.pdf')[0], QUEUED)
+
+    def test_record_paths_are_relative_to_download_dir(self):
+        record = {'path': os.path.join('worker_docs', 'AIFC_Court', 'a.pdf'), 'hash': 'x'}
+        stored = relative_record(record, 'worker_docs')
+        self.assertEqual(stored['path'], os.path.join('AIFC_Court', 'a.pdf'))
+        self.assertEqual(absolute_record(stored, 'main_docs')['path'], os.path.join('main_docs', 'AIFC_Court', 'a.pdf'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+Замер времени по этапам запуска: span() записывает длительность и объем данных
+по этапу и по файлу, summary() дает p50/p95 по этапам и самые медленные файлы.
+
+    with timing.span('transfer', key=url) as s:
+        ...
+        s.bytes = size
+"""
+
+import math
+import time
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Этап, длительность которого считается временем обработки файла
+FILE_STAGE = 'file'
+
+# Сколько самых медленных файлов показывать
+TOP_FILES = 10
+
+class Span:
+    """Один замер: этап, файл (url) и переданные байты"""
+
+    __slots__ = ('stage', 'key', 'bytes', 'started', 'duration')
+
+    def __init__(self, stage, key=None):
+        self.stage = stage
+        self.key = key
+        self.bytes = 0
+        self.started = time.perf_counter()
+        self.duration = None
+
+    def elapsed_ms(self):
+        """Сколько прошло с начала замера (для логов внутри блока)"""
+        return round((time.perf_counter() - self.started) * 1000, 1)
+
+def percentile(values, q):
+    """Перцентиль по ближайшему рангу (values отсортированы)"""
+    if not values:
+        return 0.0
+    return values[max(math.ceil(q / 100 * len(values)) - 1, 0)]
+
+class RunProfile:
+    """Накопитель замеров за запуск (потокобезопасный)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.listeners = []  # Вызываются на каждый замер: listener(stage, seconds, bytes, key)
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.durations = defaultdict(list)
+            self.bytes = defaultdict(int)
+            self.files = defaultdict(lambda: defaultdict(float))
+            self.file_bytes = defaultdict(int)
+
+    def _active(self):
+        active = getattr(self.local, 'stages', None)
+        if active is None:
+            active = self.local.stages = set()
+        return active
+
+    @contextmanager
+    def span(self, stage, key=None):
+        """Замер блока кода; вложенный замер того же этапа (fallback-метод) не считается дважды"""
+        active = self._active()
+        current = Span(stage, key)
+        if stage in active:
+            yield current
+            return
+
+        active.add(stage)
+        try:
+            yield current
+        finally:
+            active.discard(stage)
+            current.duration = time.perf_counter() - current.started
+            self.record(stage, current.duration, current.bytes, key)
+
+    def record(self, stage, seconds, nbytes=0, key=None):
+        """Запись готового замера"""
+        with self.lock:
+            self.durations[stage].append(seconds)
+            self.bytes[stage] += nbytes
+            if key is not None:
+                self.files[key][stage] += seconds
+                self.file_bytes[key] += nbytes
+        for listener in self.listeners:
+            listener(stage, seconds, nbytes, key)
+
+    def summary(self, top=TOP_FILES):
+        """p50/p95 по этапам и самые медленные файлы с разбивкой по этапам"""
+        with self.lock:
+            stages = {}
+            for stage, values in self.durations.items():
+                ordered = sorted(values)
+                stages[stage] = {
+                    'count': len(ordered),
+                    'total_seconds': round(sum(ordered), 3),
+                    'p50_ms': round(percentile(ordered, 50) * 1000, 1),
+                    'p95_ms': round(percentile(ordered, 95) * 1000, 1),
+                    'max_ms': round(ordered[-1] * 1000, 1),
+                    'bytes': self.bytes[stage]
+                }
+
+            timed_files = [(key, file_stages) for key, file_stages in self.files.items() if FILE_STAGE in file_stages]
+            timed_files.sort(key=lambda item: item[1][FILE_STAGE], reverse=True)
+            slowest = [{
+                'url': key,
+                'seconds': round(file_stages[FILE_STAGE], 3),
+                'bytes': self.file_bytes[key],
+                'stages': {stage: round(seconds, 3) for stage, seconds in file_stages.items() if stage != FILE_STAGE}
+            } for key, file_stages in timed_files[:top]]
+
+        return {'stages': stages, 'slowest_files': slowest}
+
+    def format_summary(self, top=TOP_FILES):
+        """Текстовый профиль запуска для отчета"""
+        summary = self.summary(top)
+        if not summary['stages']:
+            return ""
+
+        lines = [f"{'Этап':<16} {'N':>5} {'всего, с':>9} {'p50, мс':>9} {'p95, мс':>9} {'МБ':>8}"]
+        for stage, stats in sorted(summary['stages'].items(), key=lambda item: -item[1]['total_seconds']):
+            lines.append(f"{stage:<16} {stats['count']:>5} {stats['total_seconds']:>9.1f} "
+                         f"{stats['p50_ms']:>9.0f} {stats['p95_ms']:>9.0f} {stats['bytes'] / 1048576:>8.1f}")
+
+        if summary['slowest_files']:
+            lines.append("")
+            lines.append(f"Самые медленные файлы (топ {len(summary['slowest_files'])}):")
+            for item in summary['slowest_files']:
+                stages = ", ".join(f"{stage} {seconds:.1f}" for stage, seconds in item['stages'].items())
+                lines.append(f"  {item['seconds']:>7.1f} с  {item['url']}" + (f"  ({stages})" if stages else ""))
+
+        return "\n".join(lines)
+
+# Общий профиль процесса
+run_profile = RunProfile()
+
+def span(stage, key=None):
+    """Замер этапа в общем профиле процесса"""
+    return run_profile.span(stage, key)
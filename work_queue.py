@@ -0,0 +1,371 @@
+"""
+Общая очередь работ в SQLite с арендой и продлением (heartbeat), чтобы несколько
+процессов-исполнителей (на одной или нескольких машинах) делили большой запуск:
+первое скачивание всего сайта или перепроверку.
+
+Координатор планирует работу (plan_work) по тем же правилам, что и обычная сессия
+(get_files_to_download: первый запуск - все документы, дальше - новые и те, кому пора
+на перепроверку). Исполнители берут непересекающиеся пачки URL в аренду (claim),
+продлевают аренду, пока работают, и сообщают результат (complete). Аренда умершего
+исполнителя истекает, и его URL возвращаются в очередь. Неудачный URL возвращается
+в очередь не раньше, чем разрешает журнал неудач исполнителя. Записи о скачанных
+файлах хранятся в очереди с путями относительно папки загрузок, координатор
+сливает их в свою базу (collect_results).
+
+Для нескольких машин файл базы должен лежать на файловой системе с рабочими
+блокировками (журнал rollback, без WAL).
+"""
+
+import os
+import json
+import time
+from datetime import datetime
+import socket
+import sqlite3
+import logging
+import threading
+
+WORK_QUEUE_DB = 'work_queue.db'
+
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_MAX_ATTEMPTS = 3
+
+QUEUED = 'queued'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+# Результаты методов скачивания, которые считаются успешными
+SUCCESS_RESULTS = ('new', 'updated', 'unchanged')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    url TEXT PRIMARY KEY,
+    lane TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    record TEXT,
+    collected INTEGER NOT NULL DEFAULT 0,
+    not_before REAL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (state, priority);
+CREATE INDEX IF NOT EXISTS jobs_worker ON jobs (worker, state);
+"""
+
+logger = logging.getLogger(__name__)
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class WorkQueue:
+    """Очередь URL с арендой; все изменения - короткие транзакции BEGIN IMMEDIATE"""
+
+    def __init__(self, path=WORK_QUEUE_DB, lease_seconds=DEFAULT_LEASE_SECONDS,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS, timeout=30):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()  # Соединение общее для исполнителя и потока heartbeat
+        self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(jobs)")}
+        if 'not_before' not in columns:
+            try:
+                self.connection.execute("ALTER TABLE jobs ADD COLUMN not_before REAL")
+            except sqlite3.OperationalError:
+                pass  # Колонку уже добавил другой исполнитель
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            config.get('work_queue_path', WORK_QUEUE_DB),
+            lease_seconds=config.get('work_queue_lease_seconds', DEFAULT_LEASE_SECONDS),
+            max_attempts=config.get('work_queue_max_attempts', DEFAULT_MAX_ATTEMPTS)
+        )
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def _transaction(self, func, *args):
+        """Выполнение func(cursor, ...) в транзакции с блокировкой записи"""
+        with self.lock:
+            cursor = self.connection.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                result = func(cursor, *args)
+            except BaseException:
+                cursor.execute('ROLLBACK')
+                raise
+            cursor.execute('COMMIT')
+            return result
+
+    def enqueue(self, items):
+        """
+        Постановка (url, полоса) в порядке приоритета. Завершенные URL ставятся заново;
+        арендованные и завершенные, но еще не собранные координатором, не трогаются.
+        Возвращает число поставленных.
+        """
+        def apply(cursor, items):
+            now = time.time()
+            queued = 0
+            for priority, (url, lane) in enumerate(items):
+                cursor.execute(
+                    "INSERT INTO jobs (url, lane, priority, state, updated_at) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(url) DO UPDATE SET lane = excluded.lane, priority = excluded.priority, "
+                    "state = excluded.state, attempts = 0, updated_at = excluded.updated_at "
+                    "WHERE state != ? AND NOT (state = ? AND collected = 0)",
+                    (url, lane, priority, QUEUED, now, LEASED, DONE)
+                )
+                queued += cursor.rowcount
+            return queued
+        return self._transaction(apply, list(items))
+
+    def _requeue_expired(self, cursor, now):
+        # Истекшая аренда считается попыткой: URL, который роняет исполнителей, в итоге станет failed
+        cursor.execute(
+            "UPDATE jobs SET state = CASE WHEN attempts + 1 >= ? THEN ? ELSE ? END, "
+            "attempts = attempts + 1, worker = NULL, lease_expires = NULL, result = 'lease_expired', updated_at = ? "
+            "WHERE state = ? AND lease_expires < ?",
+            (self.max_attempts, FAILED, QUEUED, now, LEASED, now)
+        )
+        if cursor.rowcount:
+            logger.warning(f"⏰ Возвращено в очередь после истечения аренды: {cursor.rowcount}")
+        return cursor.rowcount
+
+    def requeue_expired(self):
+        """Возврат в очередь URL с истекшей арендой"""
+        return self._transaction(self._requeue_expired, time.time())
+
+    def claim(self, worker, limit=DEFAULT_BATCH_SIZE):
+        """Аренда следующей пачки URL: список (url, полоса)"""
+        def apply(cursor):
+            now = time.time()
+            self._requeue_expired(cursor, now)
+            rows = cursor.execute(
+                "SELECT url, lane FROM jobs WHERE state = ? AND (not_before IS NULL OR not_before <= ?) "
+                "ORDER BY priority LIMIT ?", (QUEUED, now, limit)
+            ).fetchall()
+            cursor.executemany(
+                "UPDATE jobs SET state = ?, worker = ?, lease_expires = ?, updated_at = ? WHERE url = ?",
+                [(LEASED, worker, now + self.lease_seconds, now, url) for url, _ in rows]
+            )
+            return rows
+        return self._transaction(apply)
+
+    def heartbeat(self, worker):
+        """Продление аренды всех URL исполнителя; возвращает число продленных"""
+        def apply(cursor):
+            now = time.time()
+            cursor.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE worker = ? AND state = ?",
+                (now + self.lease_seconds, now, worker, LEASED)
+            )
+            return cursor.rowcount
+        return self._transaction(apply)
+
+    def complete(self, worker, url, result, record=None, not_before=None):
+        """
+        Результат обработки URL. Неудача возвращает URL в очередь, пока не исчерпаны попытки,
+        но выдавать его снова можно не раньше not_before (time.time()).
+        False, если аренда уже потеряна (URL отдан другому исполнителю).
+        """
+        def apply(cursor):
+            now = time.time()
+            if result in SUCCESS_RESULTS:
+                cursor.execute(
+                    "UPDATE jobs SET state = ?, worker = NULL, lease_expires = NULL, result = ?, record = ?, "
+                    "collected = 0, not_before = NULL, updated_at = ? WHERE url = ? AND worker = ? AND state = ?",
+                    (DONE, result, json.dumps(record, ensure_ascii=False) if record else None,
+                     now, url, worker, LEASED)
+                )
+            else:
+                cursor.execute(
+                    "UPDATE jobs SET state = CASE WHEN attempts + 1 >= ? THEN ? ELSE ? END, "
+                    "attempts = attempts + 1, worker = NULL, lease_expires = NULL, result = ?, not_before = ?, "
+                    "updated_at = ? WHERE url = ? AND worker = ? AND state = ?",
+                    (self.max_attempts, FAILED, QUEUED, result or FAILED, not_before, now, url, worker, LEASED)
+                )
+            return cursor.rowcount == 1
+        return self._transaction(apply)
+
+    def release(self, worker):
+        """Возврат всех URL исполнителя в очередь (штатная остановка)"""
+        def apply(cursor):
+            cursor.execute(
+                "UPDATE jobs SET state = ?, worker = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE worker = ? AND state = ?",
+                (QUEUED, time.time(), worker, LEASED)
+            )
+            return cursor.rowcount
+        return self._transaction(apply)
+
+    def uncollected(self):
+        """Успешные результаты, еще не слитые в базу координатора: (url, результат, запись)"""
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT url, result, record FROM jobs WHERE state = ? AND collected = 0", (DONE,)
+            ).fetchall()
+        return [(url, result, json.loads(record) if record else None) for url, result, record in rows]
+
+    def mark_collected(self, urls):
+        def apply(cursor, urls):
+            cursor.executemany("UPDATE jobs SET collected = 1 WHERE url = ?", [(url,) for url in urls])
+        self._transaction(apply, list(urls))
+
+    def counts(self):
+        """Число URL по состояниям и полосам: {состояние: {полоса: N}}"""
+        with self.lock:
+            rows = self.connection.execute("SELECT state, lane, COUNT(*) FROM jobs GROUP BY state, lane").fetchall()
+        counts = {}
+        for state, lane, count in rows:
+            counts.setdefault(state, {})[lane] = count
+        return counts
+
+    def pending(self):
+        """Сколько URL еще в работе (в очереди или в аренде)"""
+        with self.lock:
+            return self.connection.execute(
+                "SELECT COUNT(*) FROM jobs WHERE state IN (?, ?)", (QUEUED, LEASED)
+            ).fetchone()[0]
+
+class Heartbeat:
+    """Фоновое продление аренды исполнителя (каждую треть срока аренды)"""
+
+    def __init__(self, queue, worker, interval=None):
+        self.queue = queue
+        self.worker = worker
+        self.interval = interval or max(queue.lease_seconds / 3, 1)
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.queue.heartbeat(self.worker)
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Не удалось продлить аренду: {e}")
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self._run, name='work-queue-heartbeat', daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop_event.set()
+        self.thread.join()
+
+def relative_record(record, download_dir):
+    """Запись для очереди: путь относительно папки загрузок исполнителя"""
+    if not record or not record.get('path'):
+        return record
+    return dict(record, path=os.path.relpath(record['path'], download_dir))
+
+def absolute_record(record, download_dir):
+    """Запись из очереди: путь в папке загрузок координатора"""
+    if not record or not record.get('path') or os.path.isabs(record['path']):
+        return record
+    return dict(record, path=os.path.join(download_dir, record['path']))
+
+def retry_not_before(failure_ledger, url):
+    """Когда неудачный URL можно выдавать снова (пауза и выключатель журнала неудач)"""
+    entry = failure_ledger.entries.get(url) if failure_ledger else None
+    if not entry or not entry.get('next_eligible'):
+        return None
+    try:
+        return datetime.fromisoformat(entry['next_eligible']).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+def plan_work(monitor, queue, documents=None):
+    """
+    Постановка работы по известным документам (discovered_files, без удаленных):
+    первый запуск - все документы, дальше - новые и те, кому пора на перепроверку.
+    """
+    from download_queue import lane_for
+
+    if documents is None:
+        documents = [url for url, info in monitor.discovered_files['files'].items() if not info.get('removed_at')]
+    files_to_download = monitor.get_files_to_download(documents)
+
+    files = monitor.discovered_files['files']
+    items = [(url, lane_for(files.get(url, {}), monitor.downloaded_files.get(url))) for url in files_to_download]
+    queued = queue.enqueue(items)
+    logger.info(f"📋 В очередь работ поставлено: {queued} URL")
+    return queued
+
+def run_worker(monitor, queue, worker=None, batch_size=DEFAULT_BATCH_SIZE, max_items=0):
+    """Цикл исполнителя: аренда пачки, скачивание, отчет о результатах; статистика по результатам"""
+    import metrics
+    from sources import MultiSourceEngine
+
+    worker = worker or default_worker_id()
+    engine = MultiSourceEngine(monitor)
+    stats = {'new': 0, 'updated': 0, 'unchanged': 0, 'failed': 0, 'lost_leases': 0}
+    processed = 0
+
+    logger.info(f"👷 Исполнитель {worker} начинает работу")
+    with Heartbeat(queue, worker):
+        try:
+            while not max_items or processed < max_items:
+                limit = min(batch_size, max_items - processed) if max_items else batch_size
+                batch = queue.claim(worker, limit)
+                if not batch:
+                    break
+
+                for url, lane in batch:
+                    try:
+                        result = engine.download(monitor.sources.for_url(url), url)
+                    except Exception as e:
+                        logger.error(f"❌ Ошибка обработки {url}: {e}")
+                        result = FAILED
+                    metrics.record_result(result)
+                    stats[result if result in stats else FAILED] += 1
+                    processed += 1
+
+                    record, not_before = None, None
+                    if result in SUCCESS_RESULTS:
+                        record = relative_record(monitor.downloaded_files.get(url), monitor.config['download_dir'])
+                    else:
+                        not_before = retry_not_before(getattr(monitor, 'failure_ledger', None), url)
+                    if not queue.complete(worker, url, result, record, not_before):
+                        stats['lost_leases'] += 1
+                        logger.warning(f"⚠️ Аренда потеряна, результат не учтен в очереди: {url}")
+
+                monitor.save_downloaded_history()
+                monitor.save_discovered_files()
+        finally:
+            queue.release(worker)
+
+    # Первый запуск завершен, когда вся поставленная работа выполнена
+    if monitor.is_first_run and not queue.pending():
+        monitor.mark_first_run_completed()
+        logger.info("🎉 Очередь первого запуска выполнена")
+
+    logger.info(f"👷 Исполнитель {worker} закончил: {stats}")
+    return stats
+
+def collect_results(state, queue):
+    """Слияние записей о скачанных файлах от всех исполнителей в базу координатора"""
+    collected = []
+    files = state.discovered_files['files']
+    with state.state_lock:
+        for url, result, record in queue.uncollected():
+            record = absolute_record(record, state.config['download_dir'])
+            if record:
+                state.downloaded_files[url] = record
+            if url in files:
+                files[url].update(downloaded=True, is_new=False,
+                                  last_downloaded=(record or {}).get('downloaded_at', datetime.now().isoformat()))
+            collected.append(url)
+        if collected:
+            state.save_downloaded_history()
+            state.save_discovered_files()
+    queue.mark_collected(collected)
+    return len(collected)